@@ -0,0 +1,98 @@
+"""add external data generated columns and partial indexes
+
+Revision ID: a1e4c7f20b3d
+Revises: 9d3e5a7b1c2f
+Create Date: 2026-10-19 10:00:00.000000+00:00
+
+"""
+
+# mypy: ignore-errors
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a1e4c7f20b3d"
+down_revision: Union[str, None] = "9d3e5a7b1c2f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Adding stored generated columns rewrites external_data once.
+    op.add_column(
+        "external_data",
+        sa.Column(
+            "publish_date",
+            sa.String(),
+            sa.Computed("raw_data ->> 'publish_date'", persisted=True),
+            nullable=True,
+        ),
+    )
+    op.add_column(
+        "external_data",
+        sa.Column(
+            "genre_id",
+            sa.Integer(),
+            sa.Computed(
+                "CASE WHEN ((raw_data -> 'genre') ->> 'id') ~ '^[0-9]{1,9}$' "
+                "THEN ((raw_data -> 'genre') ->> 'id')::integer END",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_external_data_beatport_track_unprocessed",
+        "external_data",
+        ["id"],
+        unique=False,
+        postgresql_where=sa.text(
+            "provider = 'BEATPORT' AND entity_type = 'TRACK' AND entity_id IS NULL"
+        ),
+    )
+    op.create_index(
+        "ix_external_data_beatport_track_genre_publish_date",
+        "external_data",
+        ["genre_id", "publish_date"],
+        unique=False,
+        postgresql_include=["entity_id"],
+        postgresql_where=sa.text("provider = 'BEATPORT' AND entity_type = 'TRACK'"),
+    )
+    op.create_index(
+        "ix_external_data_spotify_track_entity_id",
+        "external_data",
+        ["entity_id"],
+        unique=False,
+        postgresql_where=sa.text("provider = 'SPOTIFY' AND entity_type = 'TRACK'"),
+    )
+    op.create_index(
+        "ix_external_data_spotify_artist_entity_id",
+        "external_data",
+        ["entity_id"],
+        unique=False,
+        postgresql_where=sa.text("provider = 'SPOTIFY' AND entity_type = 'ARTIST'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_external_data_spotify_artist_entity_id", table_name="external_data"
+    )
+    op.drop_index(
+        "ix_external_data_spotify_track_entity_id", table_name="external_data"
+    )
+    op.drop_index(
+        "ix_external_data_beatport_track_genre_publish_date",
+        table_name="external_data",
+    )
+    op.drop_index(
+        "ix_external_data_beatport_track_unprocessed", table_name="external_data"
+    )
+    op.drop_column("external_data", "genre_id")
+    op.drop_column("external_data", "publish_date")
@@ -0,0 +1,156 @@
+"""partition external_data by provider and entity type
+
+Revision ID: a8e3c5f1d7b2
+Revises: f2d7b9c4e6a1
+Create Date: 2026-10-19 16:00:00.000000+00:00
+
+"""
+
+# mypy: ignore-errors
+
+from __future__ import annotations
+
+from typing import List, Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a8e3c5f1d7b2"
+down_revision: Union[str, None] = "f2d7b9c4e6a1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Entity types with a partition of their own under each provider partition.
+# Other entity types land in the provider's default partition, and other
+# providers in external_data_default.
+PARTITIONS = {
+    "BEATPORT": ["ARTIST", "LABEL", "RELEASE", "TRACK"],
+    "SPOTIFY": ["ARTIST", "TRACK"],
+}
+
+COLUMNS = "id, provider, entity_type, entity_id, external_id, raw_data, updated_at"
+
+TABLE_DEFINITION = """
+    CREATE TABLE external_data (
+        id integer NOT NULL DEFAULT nextval('external_data_id_seq'),
+        provider provider_enum NOT NULL,
+        entity_type entity_type_enum NOT NULL,
+        entity_id integer,
+        external_id varchar NOT NULL,
+        raw_data jsonb,
+        updated_at timestamptz NOT NULL DEFAULT now(),
+        publish_date varchar
+            GENERATED ALWAYS AS (raw_data ->> 'publish_date') STORED,
+        genre_id integer GENERATED ALWAYS AS (
+            CASE WHEN ((raw_data -> 'genre') ->> 'id') ~ '^[0-9]{{1,9}}$'
+            THEN ((raw_data -> 'genre') ->> 'id')::integer END
+        ) STORED,
+        content_hash varchar(32) GENERATED ALWAYS AS (md5(raw_data::text)) STORED
+    ){partition_by}
+"""
+
+
+def _partition_statements() -> List[str]:
+    statements = []
+    for provider, entity_types in PARTITIONS.items():
+        parent = f"external_data_{provider.lower()}"
+        statements.append(
+            f"CREATE TABLE {parent} PARTITION OF external_data "
+            f"FOR VALUES IN ('{provider}') PARTITION BY LIST (entity_type)"
+        )
+        statements.extend(
+            f"CREATE TABLE {parent}_{entity_type.lower()} PARTITION OF {parent} "
+            f"FOR VALUES IN ('{entity_type}')"
+            for entity_type in entity_types
+        )
+        statements.append(
+            f"CREATE TABLE {parent}_default PARTITION OF {parent} DEFAULT"
+        )
+    statements.append(
+        "CREATE TABLE external_data_default PARTITION OF external_data DEFAULT"
+    )
+    return statements
+
+
+def _replace_table(partition_by: str, statements: List[str]) -> None:
+    """
+    Recreates external_data with the given layout and moves all rows into it.
+    The id sequence is detached from the old table so that dropping the old
+    table keeps it, and indexes are built after the copy.
+    """
+    op.execute("ALTER TABLE external_data RENAME TO external_data_old")
+    op.execute("ALTER SEQUENCE external_data_id_seq OWNED BY NONE")
+    op.execute(TABLE_DEFINITION.format(partition_by=partition_by))
+    for statement in statements:
+        op.execute(statement)
+    op.execute(
+        f"INSERT INTO external_data ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM external_data_old"
+    )
+    op.execute("DROP TABLE external_data_old")
+    op.execute("ALTER SEQUENCE external_data_id_seq OWNED BY external_data.id")
+
+
+def _create_indexes() -> None:
+    op.create_unique_constraint(
+        "uq_external_data_provider_entity_external_id",
+        "external_data",
+        ["provider", "entity_type", "external_id"],
+    )
+    op.create_index(op.f("ix_external_data_id"), "external_data", ["id"], unique=False)
+    op.create_index(
+        "ix_external_data_provider_entity_id",
+        "external_data",
+        ["provider", "entity_type", "entity_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_external_data_beatport_track_unprocessed",
+        "external_data",
+        ["id"],
+        unique=False,
+        postgresql_where=sa.text(
+            "provider = 'BEATPORT' AND entity_type = 'TRACK' AND entity_id IS NULL"
+        ),
+    )
+    op.create_index(
+        "ix_external_data_beatport_track_genre_publish_date",
+        "external_data",
+        ["genre_id", "publish_date"],
+        unique=False,
+        postgresql_include=["entity_id"],
+        postgresql_where=sa.text("provider = 'BEATPORT' AND entity_type = 'TRACK'"),
+    )
+    op.create_index(
+        "ix_external_data_spotify_track_entity_id",
+        "external_data",
+        ["entity_id"],
+        unique=False,
+        postgresql_where=sa.text("provider = 'SPOTIFY' AND entity_type = 'TRACK'"),
+    )
+    op.create_index(
+        "ix_external_data_spotify_artist_entity_id",
+        "external_data",
+        ["entity_id"],
+        unique=False,
+        postgresql_where=sa.text("provider = 'SPOTIFY' AND entity_type = 'ARTIST'"),
+    )
+    # Autovacuum never analyzes a partitioned parent itself.
+    op.execute("ANALYZE external_data")
+
+
+def upgrade() -> None:
+    _replace_table(" PARTITION BY LIST (provider)", _partition_statements())
+    # A partitioned table's primary key must contain the partition keys.
+    op.create_primary_key(
+        "external_data_pkey", "external_data", ["id", "provider", "entity_type"]
+    )
+    _create_indexes()
+
+
+def downgrade() -> None:
+    _replace_table("", [])
+    op.create_primary_key("external_data_pkey", "external_data", ["id"])
+    _create_indexes()
@@ -0,0 +1,105 @@
+"""add track_catalog
+
+Revision ID: b3f9d2e7c5a4
+Revises: a8e3c5f1d7b2
+Create Date: 2026-10-19 17:00:00.000000+00:00
+
+"""
+
+# mypy: ignore-errors
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b3f9d2e7c5a4"
+down_revision: Union[str, None] = "a8e3c5f1d7b2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same rows as TrackCatalogRepository.refresh, for every track at once.
+BACKFILL = r"""
+    INSERT INTO track_catalog (
+        track_id, style_id, publish_date, spotify_uri, album_type,
+        album_release_date, bpm, key
+    )
+    SELECT
+        t.id,
+        s.id,
+        CASE WHEN bp.publish_date ~ '^\d{4}-\d{2}-\d{2}'
+            THEN left(bp.publish_date, 10)::date END,
+        sp.raw_data ->> 'uri',
+        sp.raw_data -> 'album' ->> 'album_type',
+        CASE WHEN sp.raw_data -> 'album' ->> 'release_date' ~ '^\d{4}-\d{2}-\d{2}'
+            THEN left(sp.raw_data -> 'album' ->> 'release_date', 10)::date END,
+        t.bpm,
+        t.key
+    FROM tracks t
+    JOIN (
+        SELECT DISTINCT ON (entity_id) entity_id, genre_id, publish_date
+        FROM external_data
+        WHERE provider = 'BEATPORT' AND entity_type = 'TRACK'
+            AND entity_id IS NOT NULL
+        ORDER BY entity_id, id DESC
+    ) AS bp ON bp.entity_id = t.id
+    LEFT JOIN (
+        SELECT DISTINCT ON (entity_id) entity_id, raw_data
+        FROM external_data
+        WHERE provider = 'SPOTIFY' AND entity_type = 'TRACK'
+            AND entity_id IS NOT NULL
+        ORDER BY entity_id, id DESC
+    ) AS sp ON sp.entity_id = t.id
+    LEFT JOIN styles s ON s.beatport_style_id = bp.genre_id
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "track_catalog",
+        sa.Column("track_id", sa.Integer(), nullable=False),
+        sa.Column("style_id", sa.Integer(), nullable=True),
+        sa.Column("publish_date", sa.Date(), nullable=True),
+        sa.Column("spotify_uri", sa.String(), nullable=True),
+        sa.Column("album_type", sa.String(), nullable=True),
+        sa.Column("album_release_date", sa.Date(), nullable=True),
+        sa.Column("bpm", sa.Float(), nullable=True),
+        sa.Column("key", sa.String(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["style_id"], ["styles.id"]),
+        sa.ForeignKeyConstraint(["track_id"], ["tracks.id"]),
+        sa.PrimaryKeyConstraint("track_id"),
+    )
+    op.execute(BACKFILL)
+    op.create_index(
+        "ix_track_catalog_style_publish_date",
+        "track_catalog",
+        ["style_id", "publish_date"],
+        unique=False,
+        postgresql_where=sa.text("spotify_uri IS NOT NULL"),
+    )
+    op.execute("ANALYZE track_catalog")
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_track_catalog_style_publish_date",
+        table_name="track_catalog",
+        postgresql_where=sa.text("spotify_uri IS NOT NULL"),
+    )
+    op.drop_table("track_catalog")
@@ -0,0 +1,40 @@
+"""add external data content hash
+
+Revision ID: b7d2e9a4c1f6
+Revises: a1e4c7f20b3d
+Create Date: 2026-10-19 11:00:00.000000+00:00
+
+"""
+
+# mypy: ignore-errors
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7d2e9a4c1f6"
+down_revision: Union[str, None] = "a1e4c7f20b3d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Stored generated column: existing rows are hashed during the table rewrite.
+    op.add_column(
+        "external_data",
+        sa.Column(
+            "content_hash",
+            sa.String(length=32),
+            sa.Computed("md5(raw_data::text)", persisted=True),
+            nullable=True,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("external_data", "content_hash")
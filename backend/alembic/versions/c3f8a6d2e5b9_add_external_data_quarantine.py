@@ -0,0 +1,60 @@
+"""add external data quarantine
+
+Revision ID: c3f8a6d2e5b9
+Revises: b7d2e9a4c1f6
+Create Date: 2026-10-19 12:00:00.000000+00:00
+
+"""
+
+# mypy: ignore-errors
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c3f8a6d2e5b9"
+down_revision: Union[str, None] = "b7d2e9a4c1f6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "external_data_quarantine",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("external_data_id", sa.Integer(), nullable=False),
+        sa.Column("content_hash", sa.String(length=32), nullable=True),
+        sa.Column("error", sa.Text(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("external_data_id"),
+    )
+    op.create_index(
+        op.f("ix_external_data_quarantine_id"),
+        "external_data_quarantine",
+        ["id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_external_data_quarantine_id"), table_name="external_data_quarantine"
+    )
+    op.drop_table("external_data_quarantine")
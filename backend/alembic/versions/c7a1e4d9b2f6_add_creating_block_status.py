@@ -0,0 +1,35 @@
+"""add creating raw layer block status
+
+Revision ID: c7a1e4d9b2f6
+Revises: b3f9d2e7c5a4
+Create Date: 2026-10-19 18:00:00.000000+00:00
+
+"""
+
+# mypy: ignore-errors
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c7a1e4d9b2f6"
+down_revision: Union[str, None] = "b3f9d2e7c5a4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TYPE raw_layer_block_status_enum ADD VALUE IF NOT EXISTS 'CREATING'"
+    )
+
+
+def downgrade() -> None:
+    # Postgres cannot drop an enum value, so blocks left in CREATING are marked
+    # deleted instead.
+    op.execute(
+        "UPDATE raw_layer_blocks SET status = 'DELETED' WHERE status = 'CREATING'"
+    )
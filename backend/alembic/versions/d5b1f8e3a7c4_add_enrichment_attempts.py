@@ -0,0 +1,100 @@
+"""add enrichment attempts and drop not-found external data
+
+Revision ID: d5b1f8e3a7c4
+Revises: c3f8a6d2e5b9
+Create Date: 2026-10-19 13:00:00.000000+00:00
+
+"""
+
+# mypy: ignore-errors
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d5b1f8e3a7c4"
+down_revision: Union[str, None] = "c3f8a6d2e5b9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "enrichment_attempts",
+        sa.Column(
+            "provider",
+            postgresql.ENUM(name="provider_enum", create_type=False),
+            nullable=False,
+        ),
+        sa.Column(
+            "entity_type",
+            postgresql.ENUM(name="entity_type_enum", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), server_default="1", nullable=False),
+        sa.Column("next_retry_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("provider", "entity_type", "entity_id"),
+    )
+    # Fold every entity's NOT_FOUND_ placeholder rows into one attempt, keeping
+    # the latest status and backing off by the number of rows, with the
+    # default 24 hour base delay and 90 day cap.
+    op.execute("""
+        INSERT INTO enrichment_attempts (
+            provider, entity_type, entity_id, status, attempts,
+            next_retry_at, created_at, updated_at
+        )
+        SELECT DISTINCT ON (provider, entity_type, entity_id)
+            provider,
+            entity_type,
+            entity_id,
+            coalesce(raw_data ->> 'status', 'not_found'),
+            count(*) OVER entity,
+            max(updated_at) OVER entity + least(
+                interval '24 hours' * power(2, count(*) OVER entity - 1),
+                interval '90 days'
+            ),
+            min(updated_at) OVER entity,
+            max(updated_at) OVER entity
+        FROM external_data
+        WHERE external_id LIKE 'NOT\\_FOUND\\_%' AND entity_id IS NOT NULL
+        WINDOW entity AS (PARTITION BY provider, entity_type, entity_id)
+        ORDER BY provider, entity_type, entity_id, updated_at DESC
+        """)
+    op.execute("DELETE FROM external_data WHERE external_id LIKE 'NOT\\_FOUND\\_%'")
+
+
+def downgrade() -> None:
+    op.execute("""
+        INSERT INTO external_data (
+            provider, entity_type, entity_id, external_id, raw_data, updated_at
+        )
+        SELECT
+            provider,
+            entity_type,
+            entity_id,
+            'NOT_FOUND_' || entity_id || '_' || gen_random_uuid(),
+            jsonb_build_object('status', status),
+            updated_at
+        FROM enrichment_attempts
+        """)
+    op.drop_table("enrichment_attempts")
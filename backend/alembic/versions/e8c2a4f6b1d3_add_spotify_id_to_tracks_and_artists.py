@@ -0,0 +1,51 @@
+"""add spotify_id to tracks and artists
+
+Revision ID: e8c2a4f6b1d3
+Revises: d5b1f8e3a7c4
+Create Date: 2026-10-19 14:00:00.000000+00:00
+
+"""
+
+# mypy: ignore-errors
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e8c2a4f6b1d3"
+down_revision: Union[str, None] = "d5b1f8e3a7c4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL = """
+    UPDATE {table} SET spotify_id = link.external_id
+    FROM (
+        SELECT DISTINCT ON (entity_id) entity_id, external_id
+        FROM external_data
+        WHERE provider = 'SPOTIFY' AND entity_type = '{entity_type}'
+            AND entity_id IS NOT NULL
+        ORDER BY entity_id, updated_at DESC
+    ) AS link
+    WHERE {table}.id = link.entity_id
+"""
+
+
+def upgrade() -> None:
+    for table, entity_type in (("tracks", "TRACK"), ("artists", "ARTIST")):
+        op.add_column(table, sa.Column("spotify_id", sa.String(), nullable=True))
+        op.execute(BACKFILL.format(table=table, entity_type=entity_type))
+        # Built after the backfill, which is cheaper than maintaining it.
+        op.create_index(
+            op.f(f"ix_{table}_spotify_id"), table, ["spotify_id"], unique=True
+        )
+
+
+def downgrade() -> None:
+    for table in ("artists", "tracks"):
+        op.drop_index(op.f(f"ix_{table}_spotify_id"), table_name=table)
+        op.drop_column(table, "spotify_id")
@@ -0,0 +1,49 @@
+"""prune bulky fields from stored spotify payloads
+
+Revision ID: f2d7b9c4e6a1
+Revises: e8c2a4f6b1d3
+Create Date: 2026-10-19 15:00:00.000000+00:00
+
+"""
+
+# mypy: ignore-errors
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f2d7b9c4e6a1"
+down_revision: Union[str, None] = "e8c2a4f6b1d3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The default SPOTIFY_*_PAYLOAD_PRUNE_PATHS at the time of this revision.
+    # Only rows that still carry a pruned field are rewritten.
+    op.execute("""
+        UPDATE external_data
+        SET raw_data = raw_data
+            - 'available_markets'
+            #- '{album,available_markets}'
+            #- '{album,images}'
+        WHERE provider = 'SPOTIFY' AND entity_type = 'TRACK'
+            AND (
+                raw_data ? 'available_markets'
+                OR raw_data -> 'album' ?| array['available_markets', 'images']
+            )
+        """)
+    op.execute("""
+        UPDATE external_data
+        SET raw_data = raw_data - 'images'
+        WHERE provider = 'SPOTIFY' AND entity_type = 'ARTIST'
+            AND raw_data ? 'images'
+        """)
+
+
+def downgrade() -> None:
+    # Pruned fields cannot be restored.
+    pass
@@ -29,6 +29,7 @@ async def run_beatport_collection_task(params: BeatportCollectionRequest):
         style_id=params.style_id,
         date_from=params.date_from.isoformat(),
         date_to=params.date_to.isoformat(),
+        engine=params.engine,
     )
     return {"task_id": task.task_id}
 
@@ -36,9 +37,16 @@ async def run_beatport_collection_task(params: BeatportCollectionRequest):
 @router.post(
     "/spotify/enrich", status_code=202, dependencies=[Depends(get_current_user)]
 )
-async def run_spotify_enrichment_task(similarity_threshold: int = 80):
-    """Endpoint to start a Spotify enrichment task for all tracks."""
-    task = await enrich_spotify_data_task.kiq(similarity_threshold=similarity_threshold)
+async def run_spotify_enrichment_task(
+    similarity_threshold: int = 80, shards: int | None = None
+):
+    """
+    Endpoint to start a Spotify enrichment task for all tracks, split into
+    `shards` parallel shard tasks (ENRICHMENT_SHARDS by default).
+    """
+    task = await enrich_spotify_data_task.kiq(
+        similarity_threshold=similarity_threshold, shards=shards
+    )
     return {"task_id": task.task_id}
 
 
@@ -47,9 +55,12 @@ async def run_spotify_enrichment_task(similarity_threshold: int = 80):
     status_code=202,
     dependencies=[Depends(get_current_user)],
 )
-async def run_spotify_artist_enrichment_task():
-    """Endpoint to start a Spotify enrichment task for all artists."""
-    task = await enrich_spotify_artist_data_task.kiq()
+async def run_spotify_artist_enrichment_task(shards: int | None = None):
+    """
+    Endpoint to start a Spotify enrichment task for all artists, split into
+    `shards` parallel shard tasks (ENRICHMENT_SHARDS by default).
+    """
+    task = await enrich_spotify_artist_data_task.kiq(shards=shards)
     return {"task_id": task.task_id}
 
 
@@ -77,6 +88,8 @@ async def get_stats(uow: AbstractUnitOfWork = Depends(get_uow)):
         release_repo=uow.releases,
         track_repo=uow.tracks,
         external_data_repo=uow.external_data,
+        quarantine_repo=uow.external_data_quarantine,
+        track_catalog_repo=uow.track_catalog,
     )
 
     service = CollectionService(
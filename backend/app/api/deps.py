@@ -54,6 +54,17 @@ async def get_current_user(
     return user
 
 
+async def get_streaming_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    uow: AbstractUnitOfWork = Depends(get_uow, scope="function"),
+) -> User:
+    """
+    Authenticates like get_current_user, but releases the DB session before the
+    response is sent, so long-lived streaming responses do not hold it open.
+    """
+    return await get_current_user(credentials=credentials, uow=uow)
+
+
 async def get_spotify_api_client() -> AsyncGenerator[SpotifyAPIClient, None]:
     async with httpx.AsyncClient() as client:
         yield SpotifyAPIClient(client=client)
@@ -5,14 +5,21 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from app.api.deps import get_current_user, get_uow, get_user_spotify_client
 from app.api.pagination import PaginatedResponse, PaginationParams
 from app.clients.spotify import UserSpotifyClient
+from app.core.exceptions import (
+    RawLayerBlockBuildRunningError,
+    RawLayerBlockNotCreatingError,
+)
+from app.db.models.raw_layer import RawLayerBlockStatus
 from app.db.models.user import User
 from app.db.uow import AbstractUnitOfWork
+from app.repositories.advisory_locks import LockNamespace, is_session_lock_held
 from app.schemas.raw_layer import (
     RawLayerBlockCreate,
     RawLayerBlockResponse,
     RawLayerBlockSummary,
 )
 from app.services.raw_layer import RawLayerService
+from app.tasks import create_raw_layer_block_task
 
 router = APIRouter(prefix="/curation", tags=["curation"])
 
@@ -46,6 +53,68 @@ async def create_raw_layer_block(
     )
 
 
+@router.post("/styles/{style_id}/raw-blocks/tasks", status_code=202)
+async def start_raw_layer_block_task(
+    style_id: int,
+    block_in: RawLayerBlockCreate,
+    current_user: User = Depends(get_current_user),
+    uow: AbstractUnitOfWork = Depends(get_uow),
+    user_spotify_client: UserSpotifyClient = Depends(get_user_spotify_client),
+):
+    """
+    Creates a Raw Layer block in the background.
+
+    The block is stored with status CREATING and its ID returned along with the
+    ID of the task that sets it up like the synchronous endpoint does. The
+    task's progress is available under /tasks. A block whose task failed can
+    be continued with /raw-blocks/{block_id}/resume.
+    """
+    raw_layer_service = RawLayerService(
+        db=uow.session, user_spotify_client=user_spotify_client
+    )
+    block = await raw_layer_service.reserve_raw_layer_block(
+        style_id=style_id, block_in=block_in, user=current_user
+    )
+    # The task reads the block from its own session.
+    await uow.commit()
+    task = await create_raw_layer_block_task.kiq(
+        block_id=block.id, user_id=current_user.id
+    )
+    return {"task_id": task.task_id, "block_id": block.id}
+
+
+@router.post(
+    "/raw-blocks/{block_id}/resume",
+    status_code=202,
+    dependencies=[Depends(get_user_spotify_client)],
+)
+async def resume_raw_layer_block_task(
+    block_id: int,
+    current_user: User = Depends(get_current_user),
+    uow: AbstractUnitOfWork = Depends(get_uow),
+):
+    """
+    Starts a new task continuing the set-up of a block whose task failed. The
+    playlists and tracks already added to Spotify are not added again. Refused
+    while a task is still building the block.
+    """
+    block = await uow.raw_layer.get_with_playlists_for_user(
+        block_id=block_id, user_id=current_user.id
+    )
+    if not block:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Block not found"
+        )
+    if block.status != RawLayerBlockStatus.CREATING:
+        raise RawLayerBlockNotCreatingError(block_id=block_id)
+    if await is_session_lock_held(uow.session, LockNamespace.RAW_LAYER_BLOCK, block.id):
+        raise RawLayerBlockBuildRunningError(block_id=block_id)
+    task = await create_raw_layer_block_task.kiq(
+        block_id=block.id, user_id=current_user.id
+    )
+    return {"task_id": task.task_id, "block_id": block.id}
+
+
 @router.get(
     "/raw-blocks",
     response_model=PaginatedResponse[RawLayerBlockSummary],
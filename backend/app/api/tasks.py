@@ -1,14 +1,20 @@
 from __future__ import annotations
 
-from typing import Any
+import json
+from typing import Any, AsyncIterator, Dict
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 
-from app.api.deps import get_current_user
-from app.broker import broker
+from app.api.deps import get_current_user, get_streaming_user
+from app.broker import broker, redis_client
+from app.tasks.progress import TERMINAL_PHASES, progress_channel
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
+# Seconds of silence after which an idle progress stream sends a keep-alive.
+STREAM_KEEPALIVE_S = 15.0
+
 
 @router.get(
     "/status/{task_id}", response_model=dict, dependencies=[Depends(get_current_user)]
@@ -22,3 +28,51 @@ async def get_task_status(task_id: str) -> dict[str, Any]:
             detail=f"Task with id '{task_id}' not found.",
         )
     return dict(result)
+
+
+def _progress_event(progress: Dict[str, Any]) -> str:
+    return f"event: progress\ndata: {json.dumps(progress, default=str)}\n\n"
+
+
+async def _progress_events(task_id: str, request: Request) -> AsyncIterator[str]:
+    pubsub = redis_client.pubsub()
+    # Subscribe before reading the stored progress, so that no update published
+    # in between is missed.
+    await pubsub.subscribe(progress_channel(task_id))
+    try:
+        if await broker.result_backend.is_result_ready(task_id):
+            result = await broker.result_backend.get_result(task_id)
+            if isinstance(result.return_value, dict):
+                yield _progress_event(result.return_value)
+                if result.return_value.get("phase") in TERMINAL_PHASES:
+                    return
+
+        while not await request.is_disconnected():
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=STREAM_KEEPALIVE_S
+            )
+            if message is None:
+                yield ": keep-alive\n\n"
+                continue
+            progress = json.loads(message["data"])
+            yield _progress_event(progress)
+            if progress.get("phase") in TERMINAL_PHASES:
+                return
+    finally:
+        await pubsub.unsubscribe()
+        await pubsub.aclose()
+
+
+@router.get("/stream/{task_id}", dependencies=[Depends(get_streaming_user)])
+async def stream_task_progress(task_id: str, request: Request) -> StreamingResponse:
+    """
+    Streams a background task's progress as Server-Sent Events: its current
+    progress first, then every update the task publishes, until it finishes or
+    fails. The client is authenticated once per stream, not per update.
+    EventSource cannot send the bearer token, so read it with fetch.
+    """
+    return StreamingResponse(
+        _progress_events(task_id, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
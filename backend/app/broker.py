@@ -1,3 +1,4 @@
+from redis.asyncio import Redis
 from taskiq_redis import ListQueueBroker, RedisAsyncResultBackend
 
 from app.core.settings import settings
@@ -9,3 +10,6 @@ broker = ListQueueBroker(
         redis_url=settings.redis_url,
     )
 )
+
+# Plain client for what the broker does not cover, e.g. progress pub/sub.
+redis_client = Redis.from_url(settings.redis_url)
@@ -62,14 +62,18 @@ class BeatportAPIClient:
         return data
 
     async def get_tracks(
-        self, genre_id: int, publish_date_start: str, publish_date_end: str
+        self,
+        genre_id: int,
+        publish_date_start: str,
+        publish_date_end: str,
+        start_page: int = 1,
     ) -> AsyncGenerator[list[dict[str, Any]], None]:
         """Asynchronously generates pages of tracks for a given genre and date range."""
         url = f"{BEATPORT_API_URL}/tracks/"
         params: dict[str, Any] = {
             "genre_id": genre_id,
             "publish_date": f"{publish_date_start}:{publish_date_end}",
-            "page": 1,
+            "page": start_page,
             "per_page": 100,
             "order_by": "-publish_date",
         }
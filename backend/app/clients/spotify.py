@@ -2,7 +2,7 @@ import asyncio
 import time
 from datetime import datetime, timedelta, timezone
 from http import HTTPStatus
-from typing import Any
+from typing import Any, Collection
 from urllib.parse import urlparse
 
 import httpx
@@ -515,7 +515,20 @@ class UserSpotifyClient:
             refresh_token_updated=bool(new_refresh_token),
         )
 
-    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        expected_statuses: Collection[int] = (),
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """
+        Sends an authorized request, refreshing the token and retrying server
+        and network errors. Error statuses raise as usual; those in
+        `expected_statuses` are left for the caller to report and are only
+        logged at debug level.
+        """
         # Check if token is expired or will expire soon (within 5 minutes)
         if self._is_token_expired_or_expiring_soon() and not self._token_revoked:
             async with self._refresh_lock:
@@ -675,28 +688,30 @@ class UserSpotifyClient:
         # Calculate total request duration
         total_duration = (time.time() - start_time) * 1000
 
+        def log_failure(error: Exception) -> None:
+            if response.status_code in expected_statuses:
+                log.debug(
+                    "Spotify API returned an expected error status",
+                    **log_context,
+                    status_code=response.status_code,
+                    duration_ms=round(total_duration, 2),
+                )
+            else:
+                self._log_request_error(log_context, error, total_duration, response)
+
         # Handle final response
         if response.status_code == HTTPStatus.UNAUTHORIZED:
-            self._log_request_error(
-                log_context,
-                Exception("Authorization failed even after token refresh"),
-                total_duration,
-                response,
-            )
+            log_failure(Exception("Authorization failed even after token refresh"))
             raise SpotifyUnauthorizedError(
                 "Authorization failed even after token refresh."
             )
 
         if response.status_code == HTTPStatus.FORBIDDEN:
-            self._log_request_error(
-                log_context, Exception("Access forbidden"), total_duration, response
-            )
+            log_failure(Exception("Access forbidden"))
             raise SpotifyForbiddenError()
 
         if response.status_code == HTTPStatus.NOT_FOUND:
-            self._log_request_error(
-                log_context, Exception("Resource not found"), total_duration, response
-            )
+            log_failure(Exception("Resource not found"))
             raise SpotifyNotFoundError()
 
         try:
@@ -705,7 +720,7 @@ class UserSpotifyClient:
             self._log_request_success(log_context, response, total_duration)
             return response
         except httpx.HTTPStatusError as e:
-            self._log_request_error(log_context, e, total_duration, response)
+            log_failure(e)
             raise
 
     async def create_playlist(
@@ -824,10 +839,63 @@ class UserSpotifyClient:
             # If not found, it's already "unfollowed", so we can pass.
             pass
 
+    async def _post_when_ready(
+        self, url: str, payload: dict[str, Any], *, timeout: float
+    ) -> None:
+        """
+        POSTs `payload` to a playlist endpoint, retrying while Spotify answers
+        404 as it does for a playlist that is not ready yet. The first delays
+        are short and then double, so a ready playlist costs no wait and a slow
+        one is retried until `timeout` seconds have passed. The 404s before then
+        are expected and not logged as request errors.
+        """
+        deadline = time.monotonic() + timeout
+        delay = settings.SPOTIFY_PLAYLIST_READY_INITIAL_DELAY_S
+        attempt = 1
+        while True:
+            try:
+                await self.request(
+                    "POST",
+                    url,
+                    json=payload,
+                    expected_statuses=(HTTPStatus.NOT_FOUND,),
+                )
+                if attempt > 1:
+                    log.info(
+                        "Playlist ready after retries",
+                        url=self._get_safe_url_for_logging(url),
+                        attempts=attempt,
+                    )
+                return
+            except SpotifyNotFoundError:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    log.warning(
+                        "Playlist not ready before timeout",
+                        url=self._get_safe_url_for_logging(url),
+                        attempts=attempt,
+                        timeout_seconds=timeout,
+                    )
+                    raise
+                log.debug(
+                    "Playlist not ready yet, retrying",
+                    url=self._get_safe_url_for_logging(url),
+                    attempt=attempt,
+                    delay_seconds=min(delay, remaining),
+                )
+                await asyncio.sleep(min(delay, remaining))
+                delay = min(delay * 2, settings.SPOTIFY_PLAYLIST_READY_MAX_DELAY_S)
+                attempt += 1
+
     async def add_items_to_playlist(
-        self, *, playlist_id: str, track_uris: list[str]
+        self, *, playlist_id: str, track_uris: list[str], ready_timeout: float = 0
     ) -> None:
-        """Adds items to a playlist, handling batching for more than 100 items."""
+        """
+        Adds items to a playlist, handling batching for more than 100 items.
+        With a `ready_timeout`, for a playlist that was just created, the first
+        batch is retried on 404 until the playlist is ready (see
+        _post_when_ready).
+        """
         if not track_uris:
             return
 
@@ -856,7 +924,10 @@ class UserSpotifyClient:
 
             payload = {"uris": batch_uris}
             try:
-                await self.request("POST", url, json=payload)
+                if i == 0 and ready_timeout > 0:
+                    await self._post_when_ready(url, payload, timeout=ready_timeout)
+                else:
+                    await self.request("POST", url, json=payload)
                 log.debug(
                     "Successfully added batch to playlist",
                     playlist_id=playlist_id,
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+from typing import Literal
+
+# --- Beatport Processing ---
+# "python" parses raw_data in the worker; "sql" normalizes it in Postgres.
+ProcessingEngine = Literal["python", "sql"]
+
 # --- Spotify ---
 VALID_SPOTIFY_ALBUM_TYPES = ("album", "single")
 
 # --- Enrichment Service ---
 ARTIST_FUZZY_MATCH_THRESHOLD = 85
-SPOTIFY_NOT_FOUND_PREFIX = "NOT_FOUND_"
@@ -131,3 +131,21 @@ class RawLayerBlockExistsError(BaseAPIException):
             code="RAW_LAYER_BLOCK_ALREADY_EXISTS",
             detail=f"Raw layer block '{block_name}' already exists for this style.",
         )
+
+
+class RawLayerBlockNotCreatingError(BaseAPIException):
+    def __init__(self, block_id: int):
+        super().__init__(
+            status_code=HTTPStatus.CONFLICT,
+            code="RAW_LAYER_BLOCK_NOT_CREATING",
+            detail=f"Raw layer block {block_id} is not being created.",
+        )
+
+
+class RawLayerBlockBuildRunningError(BaseAPIException):
+    def __init__(self, block_id: int):
+        super().__init__(
+            status_code=HTTPStatus.CONFLICT,
+            code="RAW_LAYER_BLOCK_BUILD_RUNNING",
+            detail=f"Raw layer block {block_id} is already being built.",
+        )
@@ -1,6 +1,8 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import List
 
+from app.core.constants import ProcessingEngine
+
 
 class Settings(BaseSettings):
     """Application settings."""
@@ -33,6 +35,12 @@ class Settings(BaseSettings):
         "user-read-email user-read-private "
         "playlist-modify-public playlist-modify-private"
     )
+    # A playlist created moments ago may answer 404 until Spotify is ready for
+    # it. The first items added to a new playlist are retried on 404 for up to
+    # this long, with delays doubling from the initial one up to the maximum.
+    SPOTIFY_PLAYLIST_READY_TIMEOUT_S: float = 5.0
+    SPOTIFY_PLAYLIST_READY_INITIAL_DELAY_S: float = 0.05
+    SPOTIFY_PLAYLIST_READY_MAX_DELAY_S: float = 1.0
 
     CORS_ALLOW_ORIGINS: List[str] = ["*"]
 
@@ -50,6 +58,59 @@ class Settings(BaseSettings):
     # Spotify Enrichment Task
     SPOTIFY_SEARCH_BATCH_SIZE: int = 50
     SPOTIFY_API_ERROR_SLEEP_S: int = 5
+    # Entities that failed to match are retried after this delay, doubled on
+    # every further failure up to the maximum.
+    ENRICHMENT_RETRY_BASE_DELAY_HOURS: int = 24
+    ENRICHMENT_RETRY_MAX_DELAY_DAYS: int = 90
+    # Dotted paths dropped from Spotify payloads before they are stored. Market
+    # lists and images are most of their size and nothing reads them.
+    SPOTIFY_TRACK_PAYLOAD_PRUNE_PATHS: List[str] = [
+        "available_markets",
+        "album.available_markets",
+        "album.images",
+    ]
+    SPOTIFY_ARTIST_PAYLOAD_PRUNE_PATHS: List[str] = ["images"]
+    # Threads used to score a batch of fuzzy artist name matches; -1 uses all
+    # cores.
+    FUZZY_MATCH_WORKERS: int = -1
+    # Enrichment overlaps the DB reads, Spotify calls, matching and DB writes of
+    # consecutive batches; each stage may run this many batches ahead.
+    ENRICHMENT_PIPELINE_DEPTH: int = 2
+    # Enrichment tasks split their backlog into this many id-range shards, run
+    # as separate tasks on any worker; 1 enriches everything in a single task.
+    ENRICHMENT_SHARDS: int = 1
+    # Spotify enrichment streams running at the same time across all runs and
+    # workers: every shard and every unsharded run is one. Each sends its own
+    # stream of Spotify requests, so this bounds the load on the app's rate
+    # limit.
+    ENRICHMENT_MAX_CONCURRENT_SHARDS: int = 2
+    # A shard whose progress has not changed for this long, e.g. because the
+    # worker running it died, is counted as failed. Shards waiting for a slot
+    # keep reporting, so only a shard that is lost or still queued stalls.
+    ENRICHMENT_SHARD_STALL_TIMEOUT_S: float = 900.0
+
+    # Long-running tasks commit after every batch and record a resumable
+    # checkpoint instead of holding a single transaction for the whole run.
+    TASK_BATCH_COMMIT: bool = True
+    # Clear the task session's identity map every N batches to bound worker
+    # memory; 0 disables it.
+    TASK_SESSION_RECYCLE_BATCHES: int = 10
+    # Minimum seconds between two progress writes of a task; updates in between
+    # are coalesced and phase changes are always written at once.
+    TASK_PROGRESS_MIN_INTERVAL_S: float = 1.0
+
+    # Beatport Processing Task
+    BEATPORT_PROCESSING_BATCH_SIZE: int = 500
+    # Number of batches processed concurrently, each on its own pooled session.
+    # Keep it below the SQLAlchemy pool size; 1 disables parallel processing.
+    BEATPORT_PROCESSING_CONCURRENCY: int = 4
+    # "python" parses raw_data in the worker; "sql" normalizes it in Postgres.
+    # Collection tasks can override this per run.
+    BEATPORT_PROCESSING_ENGINE: ProcessingEngine = "python"
+    # Bulk writes are always issued in natural-key order. A positive value also
+    # serializes concurrent python-engine batches on advisory locks hashed from
+    # each natural key into this many stripes per entity type; 0 disables them.
+    INGESTION_ADVISORY_LOCK_STRIPES: int = 0
 
     @property
     def database_url(self) -> str:
@@ -5,6 +5,8 @@ from .label import Label  # noqa: F401
 from .release import Release  # noqa: F401
 from .track import Track, track_artists  # noqa: F401
 from .external_data import ExternalData  # noqa: F401
+from .external_data_quarantine import ExternalDataQuarantine  # noqa: F401
+from .enrichment_attempt import EnrichmentAttempt  # noqa: F401
 from .style import Style  # noqa: F401
 from .category import Category  # noqa: F401
 from .raw_layer import (  # noqa: F401
@@ -15,6 +17,8 @@ from .raw_layer import (  # noqa: F401
 )
 
 from .release_playlist import ReleasePlaylist, ReleasePlaylistTrack  # noqa: F401
+from .task_checkpoint import TaskCheckpoint  # noqa: F401
+from .track_catalog import TrackCatalog  # noqa: F401
 
 __all__ = [
     "User",
@@ -25,6 +29,8 @@ __all__ = [
     "Track",
     "track_artists",
     "ExternalData",
+    "ExternalDataQuarantine",
+    "EnrichmentAttempt",
     "Style",
     "Category",
     "RawLayerBlock",
@@ -33,4 +39,6 @@ __all__ = [
     "raw_layer_playlists_tracks",
     "ReleasePlaylist",
     "ReleasePlaylistTrack",
+    "TaskCheckpoint",
+    "TrackCatalog",
 ]
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, List, Optional
 
 from sqlalchemy import Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -17,6 +17,10 @@ class Artist(Base, TimestampMixin):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String, index=True, nullable=False, unique=True)
+    # Denormalized id of the linked Spotify artist, maintained by enrichment.
+    spotify_id: Mapped[Optional[str]] = mapped_column(
+        String, index=True, nullable=True, unique=True
+    )
 
     tracks: Mapped[List["Track"]] = relationship(
         "Track", secondary="track_artists", back_populates="artists"
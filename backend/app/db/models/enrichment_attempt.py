@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import ColumnElement, DateTime, Integer, String, func, select
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+from app.db.models.external_data import (
+    ExternalDataEntityType,
+    ExternalDataProvider,
+    entity_type_enum,
+    provider_enum,
+)
+from app.db.models.mixins import TimestampMixin
+
+
+class EnrichmentAttempt(Base, TimestampMixin):
+    """
+    The last unsuccessful attempt to link an entity to a provider.
+
+    Enrichment skips the entity until `next_retry_at`, which backs off
+    exponentially with the number of failed attempts. The row is deleted once
+    the entity is linked. `entity_id` has no foreign key, since one table
+    serves every entity type.
+    """
+
+    __tablename__ = "enrichment_attempts"
+
+    provider: Mapped[ExternalDataProvider] = mapped_column(
+        provider_enum, primary_key=True
+    )
+    entity_type: Mapped[ExternalDataEntityType] = mapped_column(
+        entity_type_enum, primary_key=True
+    )
+    entity_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    status: Mapped[str] = mapped_column(String, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
+    next_retry_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+
+
+def enrichment_retry_pending(
+    provider: ExternalDataProvider,
+    entity_type: ExternalDataEntityType,
+    entity_id: Any,
+) -> ColumnElement[bool]:
+    """Whether the entity failed to match and its retry delay has not elapsed."""
+    return (
+        select(EnrichmentAttempt.entity_id)
+        .where(
+            EnrichmentAttempt.provider == provider,
+            EnrichmentAttempt.entity_type == entity_type,
+            EnrichmentAttempt.entity_id == entity_id,
+            EnrichmentAttempt.next_retry_at > func.now(),
+        )
+        .exists()
+    )
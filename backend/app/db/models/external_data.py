@@ -2,14 +2,20 @@ from __future__ import annotations
 
 import enum
 from datetime import datetime
+from typing import Any
 
 from sqlalchemy import (
+    ColumnElement,
+    Computed,
     DateTime,
     func,
     Index,
     Integer,
     String,
     UniqueConstraint,
+    and_,
+    literal,
+    text,
 )
 from sqlalchemy.dialects.postgresql import ENUM, JSONB
 from sqlalchemy.orm import Mapped, mapped_column
@@ -30,17 +36,33 @@ class ExternalDataEntityType(str, enum.Enum):
     TRACK = "TRACK"
 
 
+provider_enum = ENUM(ExternalDataProvider, name="provider_enum", create_type=True)
+entity_type_enum = ENUM(
+    ExternalDataEntityType, name="entity_type_enum", create_type=True
+)
+
+
 class ExternalData(Base):
+    """
+    Raw payloads from external providers.
+
+    The table is list-partitioned by provider and each provider partition by
+    entity type (see the partitioning migration for the partitions), so
+    queries that filter on both with `external_data_kind` only read one
+    partition. The primary key includes the partition keys, as Postgres
+    requires; `id` alone is still unique, being drawn from one sequence.
+    """
+
     __tablename__ = "external_data"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(
+        Integer, primary_key=True, autoincrement=True, index=True
+    )
     provider: Mapped[ExternalDataProvider] = mapped_column(
-        ENUM(ExternalDataProvider, name="provider_enum", create_type=True),
-        nullable=False,
+        provider_enum, primary_key=True
     )
     entity_type: Mapped[ExternalDataEntityType] = mapped_column(
-        ENUM(ExternalDataEntityType, name="entity_type_enum", create_type=True),
-        nullable=False,
+        entity_type_enum, primary_key=True
     )
     entity_id: Mapped[int] = mapped_column(Integer, nullable=True)
     external_id: Mapped[str] = mapped_column(String, nullable=False)
@@ -51,6 +73,26 @@ class ExternalData(Base):
         onupdate=func.now(),
         nullable=False,
     )
+    # Stored copies of the Beatport JSON fields used by the hot block-selection
+    # and style-count filters, so they can be indexed as plain columns.
+    publish_date: Mapped[str | None] = mapped_column(
+        String, Computed("raw_data ->> 'publish_date'", persisted=True)
+    )
+    # NULL unless genre.id is a number that fits an integer: a generated
+    # column is computed for every row, and a failing cast would reject the
+    # whole insert.
+    genre_id: Mapped[int | None] = mapped_column(
+        Integer,
+        Computed(
+            "CASE WHEN ((raw_data -> 'genre') ->> 'id') ~ '^[0-9]{1,9}$' "
+            "THEN ((raw_data -> 'genre') ->> 'id')::integer END",
+            persisted=True,
+        ),
+    )
+    # Hash of the normalized payload; upserts skip rows whose hash is unchanged.
+    content_hash: Mapped[str | None] = mapped_column(
+        String(32), Computed("md5(raw_data::text)", persisted=True)
+    )
 
     __table_args__ = (
         UniqueConstraint(
@@ -65,4 +107,49 @@ class ExternalData(Base):
             "entity_type",
             "entity_id",
         ),
+        Index(
+            "ix_external_data_beatport_track_unprocessed",
+            "id",
+            postgresql_where=text(
+                "provider = 'BEATPORT' AND entity_type = 'TRACK' "
+                "AND entity_id IS NULL"
+            ),
+        ),
+        Index(
+            "ix_external_data_beatport_track_genre_publish_date",
+            "genre_id",
+            "publish_date",
+            postgresql_include=["entity_id"],
+            postgresql_where=text("provider = 'BEATPORT' AND entity_type = 'TRACK'"),
+        ),
+        Index(
+            "ix_external_data_spotify_track_entity_id",
+            "entity_id",
+            postgresql_where=text("provider = 'SPOTIFY' AND entity_type = 'TRACK'"),
+        ),
+        Index(
+            "ix_external_data_spotify_artist_entity_id",
+            "entity_id",
+            postgresql_where=text("provider = 'SPOTIFY' AND entity_type = 'ARTIST'"),
+        ),
+        {"postgresql_partition_by": "LIST (provider)"},
+    )
+
+
+def external_data_kind(
+    entity: Any,
+    provider: ExternalDataProvider,
+    entity_type: ExternalDataEntityType,
+) -> ColumnElement[bool]:
+    """
+    Filters `entity` (ExternalData or an alias of it) by provider and entity type.
+
+    The values are rendered as inline literals rather than bound parameters so
+    that the planner can match the partial indexes above even for cached,
+    generic prepared-statement plans.
+    """
+    return and_(
+        entity.provider == literal(provider, provider_enum, literal_execute=True),
+        entity.entity_type
+        == literal(entity_type, entity_type_enum, literal_execute=True),
     )
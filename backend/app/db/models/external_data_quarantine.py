@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from sqlalchemy import Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+from app.db.models.mixins import TimestampMixin
+
+
+class ExternalDataQuarantine(Base, TimestampMixin):
+    """
+    A raw external data record that could not be processed.
+
+    Quarantined records are skipped by processing until their payload changes,
+    i.e. until `content_hash` no longer matches the record's current hash.
+    `external_data_id` has no foreign key so that external_data can be
+    partitioned.
+    """
+
+    __tablename__ = "external_data_quarantine"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    external_data_id: Mapped[int] = mapped_column(Integer, nullable=False, unique=True)
+    content_hash: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    error: Mapped[str] = mapped_column(Text, nullable=False)
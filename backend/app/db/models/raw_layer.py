@@ -35,6 +35,8 @@ class RawLayerPlaylistType(str, enum.Enum):
 
 
 class RawLayerBlockStatus(str, enum.Enum):
+    # Reserved, with its playlists and tracks still being set up on Spotify.
+    CREATING = "CREATING"
     NEW = "NEW"
     PROCESSED = "PROCESSED"
     DELETED = "DELETED"
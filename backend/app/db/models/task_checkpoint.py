@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from sqlalchemy import Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+from app.db.models.mixins import TimestampMixin
+
+
+class TaskCheckpoint(Base, TimestampMixin):
+    """Resumable progress of a long-running background task."""
+
+    __tablename__ = "task_checkpoints"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    key: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+    task_id: Mapped[str] = mapped_column(String, nullable=False)
+    cursor: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    state: Mapped[dict] = mapped_column(JSONB, nullable=True)
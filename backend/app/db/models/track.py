@@ -42,6 +42,10 @@ class Track(Base, TimestampMixin):
     key: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     isrc: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     release_id: Mapped[int] = mapped_column(ForeignKey("releases.id"), nullable=False)
+    # Denormalized id of the linked Spotify track, maintained by enrichment.
+    spotify_id: Mapped[Optional[str]] = mapped_column(
+        String, index=True, nullable=True, unique=True
+    )
 
     release: Mapped["Release"] = relationship("Release", back_populates="tracks")
     artists: Mapped[List["Artist"]] = relationship(
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import Date, Float, ForeignKey, Index, Integer, String, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+from app.db.models.mixins import TimestampMixin
+
+
+class TrackCatalog(Base, TimestampMixin):
+    """
+    Denormalized per-track facts read by raw-layer block selection, so it never
+    touches the external_data payloads. Maintained by
+    TrackCatalogRepository.refresh whenever a track's Beatport source is
+    processed or its Spotify track is linked.
+    """
+
+    __tablename__ = "track_catalog"
+    __table_args__ = (
+        Index(
+            "ix_track_catalog_style_publish_date",
+            "style_id",
+            "publish_date",
+            postgresql_where=text("spotify_uri IS NOT NULL"),
+        ),
+    )
+
+    track_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("tracks.id"), primary_key=True
+    )
+    # The style whose beatport_style_id is the genre of the Beatport source.
+    style_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey("styles.id"), nullable=True
+    )
+    publish_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    spotify_uri: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    album_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # Only set for full YYYY-MM-DD Spotify release dates.
+    album_release_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    bpm: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    key: Mapped[Optional[str]] = mapped_column(String, nullable=True)
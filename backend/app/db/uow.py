@@ -8,6 +8,8 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from app.repositories import (
     ArtistRepository,
     CategoryRepository,
+    EnrichmentAttemptRepository,
+    ExternalDataQuarantineRepository,
     ExternalDataRepository,
     LabelRepository,
     RawLayerRepository,
@@ -15,6 +17,7 @@ from app.repositories import (
     ReleaseRepository,
     SpotifyTokenRepository,
     StyleRepository,
+    TrackCatalogRepository,
     TrackRepository,
     UserRepository,
 )
@@ -23,13 +26,16 @@ from app.repositories import (
 class AbstractUnitOfWork(ABC):
     artists: ArtistRepository
     categories: CategoryRepository
+    enrichment_attempts: EnrichmentAttemptRepository
     external_data: ExternalDataRepository
+    external_data_quarantine: ExternalDataQuarantineRepository
     labels: LabelRepository
     raw_layer: RawLayerRepository
     releases: ReleaseRepository
     release_playlists: ReleasePlaylistRepository
     spotify_tokens: SpotifyTokenRepository
     styles: StyleRepository
+    track_catalog: TrackCatalogRepository
     tracks: TrackRepository
     users: UserRepository
     session: AsyncSession
@@ -59,13 +65,16 @@ class SqlAlchemyUnitOfWork(AbstractUnitOfWork):
         self.session = self._session_factory()
         self.artists = ArtistRepository(self.session)
         self.categories = CategoryRepository(self.session)
+        self.enrichment_attempts = EnrichmentAttemptRepository(self.session)
         self.external_data = ExternalDataRepository(self.session)
+        self.external_data_quarantine = ExternalDataQuarantineRepository(self.session)
         self.labels = LabelRepository(self.session)
         self.raw_layer = RawLayerRepository(self.session)
         self.releases = ReleaseRepository(self.session)
         self.release_playlists = ReleasePlaylistRepository(self.session)
         self.spotify_tokens = SpotifyTokenRepository(self.session)
         self.styles = StyleRepository(self.session)
+        self.track_catalog = TrackCatalogRepository(self.session)
         self.tracks = TrackRepository(self.session)
         self.users = UserRepository(self.session)
         return self
@@ -23,7 +23,7 @@ from app.api import (
     tracks,
     raw_layer,
 )
-from app.broker import broker
+from app.broker import broker, redis_client
 from app.core.exceptions import (
     API_RESPONSES,
     BaseAPIException,
@@ -73,6 +73,7 @@ async def lifespan(app: FastAPI):
     log.info("Shutting down Clouder-DJ API")
     if not broker.is_worker_process:
         await broker.shutdown()
+    await redis_client.aclose()
 
 
 app = FastAPI(
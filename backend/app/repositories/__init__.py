@@ -1,6 +1,9 @@
 from .artist import ArtistRepository
+from .beatport_normalization import BeatportNormalizationRepository
 from .category import CategoryRepository
+from .enrichment_attempt import EnrichmentAttemptRepository
 from .external_data import ExternalDataRepository
+from .external_data_quarantine import ExternalDataQuarantineRepository
 from .label import LabelRepository
 from .release_playlist import ReleasePlaylistRepository
 from .release import ReleaseRepository
@@ -9,11 +12,16 @@ from .style import StyleRepository
 from .track import TrackRepository
 from .user import UserRepository
 from .raw_layer import RawLayerRepository
+from .task_checkpoint import TaskCheckpointRepository
+from .track_catalog import TrackCatalogRepository
 
 __all__ = [
     "ArtistRepository",
+    "BeatportNormalizationRepository",
     "CategoryRepository",
+    "EnrichmentAttemptRepository",
     "ExternalDataRepository",
+    "ExternalDataQuarantineRepository",
     "LabelRepository",
     "ReleasePlaylistRepository",
     "ReleaseRepository",
@@ -22,4 +30,6 @@ __all__ = [
     "TrackRepository",
     "UserRepository",
     "RawLayerRepository",
+    "TaskCheckpointRepository",
+    "TrackCatalogRepository",
 ]
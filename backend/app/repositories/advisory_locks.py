@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import enum
+import zlib
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Iterable
+
+from sqlalchemy import ARRAY, Integer, bindparam, func, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+
+class LockNamespace(enum.IntEnum):
+    """
+    Advisory lock namespaces, one per kind of natural key. A transaction must
+    take them in ascending order, which is the order ingestion writes them.
+    Namespaces from RAW_LAYER_BLOCK on are for session locks, which are never
+    taken inside such a transaction.
+    """
+
+    LABEL = 1
+    ARTIST = 2
+    RELEASE = 3
+    TRACK = 4
+    EXTERNAL_DATA = 5
+    RAW_LAYER_BLOCK = 6
+
+
+def lock_stripe(key: str, stripes: int) -> int:
+    # crc32 is stable across processes, unlike the builtin hash().
+    return zlib.crc32(key.encode()) % stripes
+
+
+async def lock_natural_keys(
+    db: AsyncSession, namespace: LockNamespace, keys: Iterable[str], *, stripes: int
+) -> None:
+    """
+    Takes transaction-scoped advisory locks on the stripes that `keys` hash to.
+
+    Keys are hashed into at most `stripes` locks per namespace, so a batch holds
+    a bounded number of entries in the server's shared lock table. Locks are
+    taken in ascending stripe order in a single statement, so two transactions
+    that lock overlapping keys of one namespace wait on each other instead of
+    deadlocking. They are released when the transaction ends.
+    """
+    stripe_ids = sorted({lock_stripe(key, stripes) for key in keys})
+    if not stripe_ids:
+        return
+
+    # unnest() names its output column "unnest", so the alias lists ours.
+    stripe = (
+        func.unnest(bindparam("stripes", stripe_ids, type_=ARRAY(Integer)))
+        .table_valued("stripe")
+        .render_derived(name="lock_stripes")
+    )
+    # Volatile functions in the select list are evaluated after ORDER BY, so
+    # the locks are acquired in stripe order.
+    await db.execute(
+        select(func.pg_advisory_xact_lock(int(namespace), stripe.c.stripe))
+        .select_from(stripe)
+        .order_by(stripe.c.stripe)
+    )
+
+
+@asynccontextmanager
+async def hold_session_lock(
+    engine: AsyncEngine, namespace: LockNamespace, key: int
+) -> AsyncIterator[bool]:
+    """
+    Tries to take a session-level advisory lock on `key` and yields whether it
+    got it. The lock is held on a connection of its own until the context
+    exits, so unlike the locks above it survives the commits of the work it
+    guards, and the server drops it if the process dies.
+    """
+    async with engine.connect() as conn:
+        acquired = bool(
+            await conn.scalar(select(func.pg_try_advisory_lock(int(namespace), key)))
+        )
+        await conn.commit()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                await conn.execute(select(func.pg_advisory_unlock(int(namespace), key)))
+                await conn.commit()
+
+
+async def is_session_lock_held(
+    db: AsyncSession, namespace: LockNamespace, key: int
+) -> bool:
+    """Whether any session holds the advisory lock `hold_session_lock` takes."""
+    # Two-key advisory locks show up in pg_locks with objsubid 2.
+    result = await db.execute(
+        text(
+            "SELECT EXISTS (SELECT 1 FROM pg_locks WHERE locktype = 'advisory' "
+            "AND granted AND classid = :namespace AND objid = :key "
+            "AND objsubid = 2)"
+        ),
+        {"namespace": int(namespace), "key": key},
+    )
+    return bool(result.scalar_one())
@@ -2,13 +2,13 @@ from __future__ import annotations
 
 from typing import Dict, List, Tuple
 
-from sqlalchemy import func, select
+from sqlalchemy import Select, func, select, update
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models.artist import Artist
+from app.db.models.enrichment_attempt import enrichment_retry_pending
 from app.db.models.external_data import (
-    ExternalData,
     ExternalDataEntityType,
     ExternalDataProvider,
 )
@@ -41,33 +41,81 @@ class ArtistRepository(BaseRepository[Artist]):
 
         return {artist.name: artist for artist in artists}
 
-    async def get_artists_missing_spotify_link(
-        self, *, offset: int, limit: int
-    ) -> Tuple[List[Artist], int]:
+    async def set_spotify_ids(self, spotify_ids: Dict[int, str]) -> None:
+        """Stores the Spotify ids of newly linked artists, keyed by artist id."""
+        if not spotify_ids:
+            return
+        await self.db.execute(
+            update(Artist),
+            [
+                {"id": artist_id, "spotify_id": spotify_ids[artist_id]}
+                for artist_id in sorted(spotify_ids)
+            ],
+        )
+
+    def _missing_spotify_link_query(
+        self, *, after_id: int = 0, until_id: int | None = None
+    ) -> Select:
         """
-        Gets artists that do not have an associated Spotify external data link.
+        Artists that do not have an associated Spotify link and are not waiting
+        out the retry delay of a failed match, with ids in (after_id, until_id].
+        No `until_id` means no upper bound.
         """
-        exists_condition = (
-            select(ExternalData.id)
-            .where(
-                ExternalData.provider == ExternalDataProvider.SPOTIFY,
-                ExternalData.entity_type == ExternalDataEntityType.ARTIST,
-                ExternalData.entity_id == Artist.id,
-            )
-            .exists()
+        query = select(Artist).where(
+            Artist.spotify_id.is_(None),
+            ~enrichment_retry_pending(
+                ExternalDataProvider.SPOTIFY, ExternalDataEntityType.ARTIST, Artist.id
+            ),
+            Artist.id > after_id,
         )
+        if until_id is not None:
+            query = query.where(Artist.id <= until_id)
+        return query
 
-        base_query = select(Artist).where(~exists_condition)
-
+    async def count_artists_missing_spotify_link(
+        self, *, after_id: int = 0, until_id: int | None = None
+    ) -> int:
+        """
+        Counts artists without a Spotify link.
+        This scans the whole anti-join, so call it once per run, not per batch.
+        """
+        base_query = self._missing_spotify_link_query(
+            after_id=after_id, until_id=until_id
+        )
         count_query = select(func.count()).select_from(base_query.subquery())
-        total_result = await self.db.execute(count_query)
-        total = total_result.scalar_one()
-
-        if total == 0:
-            return [], 0
+        result = await self.db.execute(count_query)
+        return result.scalar_one()
 
-        items_query = base_query.order_by(Artist.id).offset(offset).limit(limit)
+    async def get_artists_missing_spotify_link(
+        self, *, after_id: int, limit: int, until_id: int | None = None
+    ) -> List[Artist]:
+        """
+        Gets the next batch (keyset on id) of artists without a Spotify link.
+        """
+        items_query = (
+            self._missing_spotify_link_query(after_id=after_id, until_id=until_id)
+            .order_by(Artist.id)
+            .limit(limit)
+        )
         items_result = await self.db.execute(items_query)
-        items = list(items_result.scalars().all())
+        return list(items_result.scalars().all())
 
-        return items, total
+    async def get_missing_spotify_link_shard_bounds(
+        self, *, shards: int
+    ) -> List[Tuple[int, int]]:
+        """
+        Splits the artists without a Spotify link into at most `shards` id ranges
+        holding about as many artists each. Returns the last id and the size of
+        every range, in id order; empty when no artist is missing a link.
+        """
+        ranked = (
+            self._missing_spotify_link_query()
+            .with_only_columns(
+                Artist.id, func.ntile(shards).over(order_by=Artist.id).label("shard")
+            )
+            .subquery()
+        )
+        last_id = func.max(ranked.c.id)
+        stmt = select(last_id, func.count()).group_by(ranked.c.shard).order_by(last_id)
+        result = await self.db.execute(stmt)
+        return [(row[0], row[1]) for row in result]
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+from typing import List
+
+from sqlalchemy import (
+    ARRAY,
+    Float,
+    Integer,
+    Select,
+    and_,
+    any_,
+    bindparam,
+    column,
+    func,
+    literal,
+    select,
+    true,
+    update,
+)
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.db.models.artist import Artist
+from app.db.models.external_data import (
+    ExternalData,
+    ExternalDataEntityType,
+    ExternalDataProvider,
+    entity_type_enum,
+    provider_enum,
+)
+from app.db.models.label import Label
+from app.db.models.release import Release
+from app.db.models.track import Track, track_artists
+from app.repositories.base import BaseRepository
+from app.repositories.external_data import ExternalDataRepository
+
+# Raw Beatport track rows being normalized, and the JSON paths read from them.
+source = aliased(ExternalData, name="source")
+label_info = source.raw_data["release"]["label"]
+label_name = label_info["name"].astext
+release_info = source.raw_data["release"]
+release_name = release_info["name"].astext
+track_name = source.raw_data["name"].astext
+track_isrc = source.raw_data["isrc"].astext
+artist_elements = (
+    func.jsonb_array_elements(source.raw_data["artists"])
+    .table_valued(column("value", JSONB))
+    .lateral("artist")
+)
+artist_info = artist_elements.c.value
+artist_name = artist_info["name"].astext
+# jsonb_array_elements raises on anything but an array, e.g. a JSON null.
+has_artists = func.jsonb_typeof(source.raw_data["artists"]) == "array"
+
+
+class BeatportNormalizationRepository(BaseRepository[ExternalData]):
+    """
+    Set-based (ELT) normalization of raw Beatport tracks.
+
+    Every method reads the raw rows with the given ids directly in Postgres and
+    writes the extracted entities with INSERT ... SELECT ... ON CONFLICT, so the
+    JSON payloads never leave the database. Statements must run in the order
+    labels, artists, releases, tracks, track artists, source links, since each
+    one joins on the entities created by the previous ones.
+    """
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(model=ExternalData, db=db)
+        self.external_data_repo = ExternalDataRepository(db)
+
+    @staticmethod
+    def _in_batch(ids: List[int]):
+        # A single array parameter keeps the statement text identical for
+        # every batch size, unlike an expanded IN list.
+        return source.id == any_(bindparam("ids", ids, type_=ARRAY(Integer)))
+
+    @staticmethod
+    def _beatport_external_data(
+        entity_type: ExternalDataEntityType,
+        entity_id,
+        info,
+    ) -> Select:
+        external_id = info["id"].astext
+        return (
+            select(
+                literal(ExternalDataProvider.BEATPORT, provider_enum),
+                literal(entity_type, entity_type_enum),
+                entity_id,
+                external_id,
+                info,
+            )
+            .select_from(source)
+            .where(external_id.is_not(None))
+            .distinct(external_id)
+            .order_by(external_id, source.id)
+        )
+
+    async def _upsert_external_data(self, stmt: Select) -> int:
+        return await self.external_data_repo.upsert_from_select(
+            ["provider", "entity_type", "entity_id", "external_id", "raw_data"], stmt
+        )
+
+    async def upsert_labels(self, ids: List[int]) -> int:
+        """Creates missing labels and their Beatport external data."""
+        names = (
+            select(label_name)
+            .where(self._in_batch(ids), label_name.is_not(None))
+            .distinct()
+            .order_by(label_name)
+        )
+        await self.db.execute(
+            insert(Label)
+            .from_select(["name"], names)
+            .on_conflict_do_nothing(index_elements=["name"])
+        )
+        return await self._upsert_external_data(
+            self._beatport_external_data(
+                ExternalDataEntityType.LABEL, Label.id, label_info
+            )
+            .join(Label, Label.name == label_name)
+            .where(self._in_batch(ids))
+        )
+
+    async def upsert_artists(self, ids: List[int]) -> int:
+        """Creates missing artists and their Beatport external data."""
+        names = (
+            select(artist_name)
+            .select_from(source)
+            .join(artist_elements, true())
+            .where(self._in_batch(ids), has_artists, artist_name.is_not(None))
+            .distinct()
+            .order_by(artist_name)
+        )
+        await self.db.execute(
+            insert(Artist)
+            .from_select(["name"], names)
+            .on_conflict_do_nothing(index_elements=["name"])
+        )
+        return await self._upsert_external_data(
+            self._beatport_external_data(
+                ExternalDataEntityType.ARTIST, Artist.id, artist_info
+            )
+            .join(artist_elements, true())
+            .join(Artist, Artist.name == artist_name)
+            .where(self._in_batch(ids), has_artists)
+        )
+
+    async def upsert_releases(self, ids: List[int]) -> int:
+        """Creates missing releases and their Beatport external data."""
+        keys = (
+            select(release_name, Label.id)
+            .select_from(source)
+            .join(Label, Label.name == label_name)
+            .where(self._in_batch(ids), release_name.is_not(None))
+            .distinct()
+            .order_by(release_name, Label.id)
+        )
+        await self.db.execute(
+            insert(Release)
+            .from_select(["name", "label_id"], keys)
+            .on_conflict_do_nothing(index_elements=["name", "label_id"])
+        )
+        return await self._upsert_external_data(
+            self._beatport_external_data(
+                ExternalDataEntityType.RELEASE, Release.id, release_info
+            )
+            .join(Label, Label.name == label_name)
+            .join(
+                Release,
+                and_(Release.name == release_name, Release.label_id == Label.id),
+            )
+            .where(self._in_batch(ids))
+        )
+
+    @classmethod
+    def _with_release(cls, stmt: Select, ids: List[int]) -> Select:
+        return (
+            stmt.select_from(source)
+            .join(Label, Label.name == label_name)
+            .join(
+                Release,
+                and_(Release.name == release_name, Release.label_id == Label.id),
+            )
+            .where(cls._in_batch(ids))
+        )
+
+    @classmethod
+    def _with_track(cls, stmt: Select, ids: List[int]) -> Select:
+        return cls._with_release(stmt, ids).join(
+            Track,
+            and_(
+                Track.name == track_name,
+                Track.release_id == Release.id,
+                Track.isrc.is_not_distinct_from(track_isrc),
+            ),
+        )
+
+    async def insert_tracks(self, ids: List[int]) -> None:
+        """Creates missing tracks for raw rows whose label and release exist."""
+        rows = self._with_release(
+            select(
+                track_name,
+                source.raw_data["length_ms"].astext.cast(Integer),
+                source.raw_data["bpm"].astext.cast(Float),
+                source.raw_data["key"]["name"].astext,
+                track_isrc,
+                Release.id,
+            )
+            .where(track_name.is_not(None))
+            .distinct(track_name, Release.id, track_isrc)
+            .order_by(track_name, Release.id, track_isrc),
+            ids,
+        )
+        await self.db.execute(
+            insert(Track)
+            .from_select(
+                ["name", "duration_ms", "bpm", "key", "isrc", "release_id"], rows
+            )
+            .on_conflict_do_nothing(index_elements=["name", "release_id", "isrc"])
+        )
+
+    async def link_track_artists(self, ids: List[int]) -> None:
+        """Creates the track/artist associations listed in the raw rows."""
+        pairs = (
+            self._with_track(select(Track.id, Artist.id), ids)
+            .join(artist_elements, true())
+            .join(Artist, Artist.name == artist_name)
+            .where(has_artists)
+            .distinct()
+            .order_by(Track.id, Artist.id)
+        )
+        await self.db.execute(
+            insert(track_artists)
+            .from_select(["track_id", "artist_id"], pairs)
+            .on_conflict_do_nothing()
+        )
+
+    async def link_sources_to_tracks(self, ids: List[int]) -> int:
+        """
+        Points the raw rows at their tracks, marking them processed.
+        Returns the number of rows linked.
+        """
+        links = (
+            self._with_track(
+                select(source.id.label("source_id"), Track.id.label("track_id")), ids
+            )
+            .distinct(source.id)
+            .order_by(source.id, Track.id)
+            .subquery()
+        )
+        result = await self.db.execute(
+            update(ExternalData)
+            .where(ExternalData.id == links.c.source_id)
+            .values(entity_id=links.c.track_id, updated_at=func.now())
+        )
+        return result.rowcount  # type: ignore[attr-defined]
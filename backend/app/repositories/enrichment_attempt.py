@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Dict, List
+
+from sqlalchemy import Interval, delete, func, literal
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.enrichment_attempt import EnrichmentAttempt
+from app.db.models.external_data import ExternalDataEntityType, ExternalDataProvider
+from app.repositories.base import BaseRepository
+
+
+class EnrichmentAttemptRepository(BaseRepository[EnrichmentAttempt]):
+    def __init__(self, db: AsyncSession):
+        super().__init__(model=EnrichmentAttempt, db=db)
+
+    async def record_failures(
+        self,
+        *,
+        provider: ExternalDataProvider,
+        entity_type: ExternalDataEntityType,
+        statuses: Dict[int, str],
+        base_delay: timedelta,
+        max_delay: timedelta,
+    ) -> None:
+        """
+        Records a failed attempt for every entity id in `statuses`, with the
+        reason it failed. The first failure is retried after `base_delay`; each
+        further one doubles the delay, up to `max_delay`.
+        """
+        if not statuses:
+            return
+
+        base = literal(base_delay, Interval)
+        stmt = insert(EnrichmentAttempt).values(
+            [
+                {
+                    "provider": provider,
+                    "entity_type": entity_type,
+                    "entity_id": entity_id,
+                    "status": statuses[entity_id],
+                    "next_retry_at": func.now() + base,
+                }
+                for entity_id in sorted(statuses)
+            ]
+        )
+        await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["provider", "entity_type", "entity_id"],
+                set_={
+                    "status": stmt.excluded.status,
+                    "attempts": EnrichmentAttempt.attempts + 1,
+                    "next_retry_at": func.now()
+                    + func.least(
+                        base * func.power(2, EnrichmentAttempt.attempts),
+                        literal(max_delay, Interval),
+                    ),
+                    "updated_at": func.now(),
+                },
+            )
+        )
+
+    async def clear(
+        self,
+        *,
+        provider: ExternalDataProvider,
+        entity_type: ExternalDataEntityType,
+        entity_ids: List[int],
+    ) -> None:
+        """Forgets the failed attempts of entities that are now linked."""
+        if not entity_ids:
+            return
+        await self.db.execute(
+            delete(EnrichmentAttempt).where(
+                EnrichmentAttempt.provider == provider,
+                EnrichmentAttempt.entity_type == entity_type,
+                EnrichmentAttempt.entity_id.in_(entity_ids),
+            )
+        )
@@ -1,43 +1,157 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import (
+    Any,
+    Dict,
+    List,
+    NamedTuple,
+    Protocol,
+    Sequence,
+    Tuple,
+    cast,
+)
 
-from sqlalchemy import bindparam, func, select, update
+from sqlalchemy import (
+    ColumnElement,
+    Select,
+    Text,
+    bindparam,
+    func,
+    literal_column,
+    select,
+    update,
+)
+from sqlalchemy.engine import Result
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import load_only
+from sqlalchemy.dialects.postgresql import Insert, insert
 
 from app.db.models.external_data import (
     ExternalData,
     ExternalDataEntityType,
     ExternalDataProvider,
+    external_data_kind,
 )
+from app.db.models.external_data_quarantine import ExternalDataQuarantine
 from app.repositories.base import BaseRepository
 
 
+class UpsertCounts(NamedTuple):
+    inserted: int
+    updated: int
+    unchanged: int
+
+
+def external_data_key(record: Dict[str, Any]) -> Tuple[str, str, str]:
+    """The natural key of an ExternalData record dict; also its write order."""
+    return record["provider"], record["entity_type"], record["external_id"]
+
+
+class ExternalDataRow(Protocol):
+    """
+    The columns of a raw record that processing reads. Satisfied both by
+    ExternalData instances and by the rows of `get_unprocessed_beatport_rows`.
+    """
+
+    @property
+    def id(self) -> int: ...
+
+    @property
+    def external_id(self) -> str: ...
+
+    @property
+    def raw_data(self) -> Dict[str, Any] | None: ...
+
+
 class ExternalDataRepository(BaseRepository[ExternalData]):
     def __init__(self, db: AsyncSession):
         super().__init__(model=ExternalData, db=db)
 
-    async def get_unprocessed_beatport_tracks(
-        self, *, limit: int
+    @staticmethod
+    def _unprocessed_beatport_tracks(after_id: int) -> List[ColumnElement[bool]]:
+        """
+        Filters unprocessed Beatport tracks with ids after `after_id`, skipping
+        records quarantined with their current payload.
+        """
+        not_quarantined = ~(
+            select(ExternalDataQuarantine.id)
+            .where(
+                ExternalDataQuarantine.external_data_id == ExternalData.id,
+                ExternalDataQuarantine.content_hash.is_not_distinct_from(
+                    ExternalData.content_hash
+                ),
+            )
+            .exists()
+        )
+        return [
+            external_data_kind(
+                ExternalData,
+                ExternalDataProvider.BEATPORT,
+                ExternalDataEntityType.TRACK,
+            ),
+            ExternalData.entity_id.is_(None),
+            ExternalData.id > after_id,
+            not_quarantined,
+        ]
+
+    @staticmethod
+    def _payload_options(with_payload: bool) -> List[Any]:
+        if with_payload:
+            return []
+        return [load_only(ExternalData.id, ExternalData.external_id)]
+
+    async def get_unprocessed_beatport_rows(
+        self, *, after_id: int, limit: int, with_payload: bool = True
+    ) -> Sequence[ExternalDataRow]:
+        """
+        Gets the next batch (keyset on id) of unprocessed Beatport tracks as
+        plain rows. Pass the id of the last row of the previous batch as
+        `after_id`. Records quarantined with their current payload are skipped.
+
+        Only the id, external_id and (with `with_payload`) raw_data columns are
+        fetched, and the rows never enter the session's identity map, so a
+        long run's memory stays bounded by one batch. Every call is a short
+        query of its own: no cursor or snapshot is held between batches, and
+        records processed or quarantined meanwhile are not returned again.
+        """
+        columns: List[Any] = [ExternalData.id, ExternalData.external_id]
+        if with_payload:
+            columns.append(ExternalData.raw_data)
+        stmt = (
+            select(*columns)
+            .where(*self._unprocessed_beatport_tracks(after_id))
+            .order_by(ExternalData.id)
+            .limit(limit)
+        )
+        result = await self.db.execute(stmt)
+        # Rows expose the selected columns as attributes.
+        return cast(Sequence[ExternalDataRow], result.all())
+
+    async def claim_unprocessed_beatport_tracks(
+        self, *, after_id: int, limit: int, with_payload: bool = True
     ) -> List[ExternalData]:
+        """
+        Claims a batch of unprocessed Beatport tracks for the current transaction.
+
+        Rows are taken in id order after `after_id` and locked with
+        FOR UPDATE SKIP LOCKED, so concurrent sessions never receive the same
+        records. The locks are released when the claiming transaction ends.
+        With `with_payload=False` only ids and external ids are loaded.
+        """
         stmt = (
             select(ExternalData)
-            .where(
-                ExternalData.provider == ExternalDataProvider.BEATPORT,
-                ExternalData.entity_type == ExternalDataEntityType.TRACK,
-                ExternalData.entity_id.is_(None),
-            )
+            .where(*self._unprocessed_beatport_tracks(after_id))
+            .order_by(ExternalData.id)
             .limit(limit)
+            .options(*self._payload_options(with_payload))
+            .with_for_update(skip_locked=True)
         )
         result = await self.db.execute(stmt)
         return list(result.scalars().all())
 
-    async def count_unprocessed_beatport_tracks(self) -> int:
+    async def count_unprocessed_beatport_tracks(self, *, after_id: int = 0) -> int:
         stmt = select(func.count(ExternalData.id)).where(
-            ExternalData.provider == ExternalDataProvider.BEATPORT,
-            ExternalData.entity_type == ExternalDataEntityType.TRACK,
-            ExternalData.entity_id.is_(None),
+            *self._unprocessed_beatport_tracks(after_id)
         )
         result = await self.db.execute(stmt)
         count = result.scalar_one_or_none()
@@ -65,7 +179,7 @@ class ExternalDataRepository(BaseRepository[ExternalData]):
         )
         await self.db.execute(stmt, update_mappings)
 
-    async def bulk_upsert(self, records_data: List[Dict[str, Any]]) -> None:
+    async def bulk_upsert(self, records_data: List[Dict[str, Any]]) -> UpsertCounts:
         """
         Efficiently bulk inserts or updates ExternalData records.
 
@@ -73,11 +187,40 @@ class ExternalDataRepository(BaseRepository[ExternalData]):
         it updates the raw_data and updated_at fields. It also updates the entity_id
         if a new non-null value is provided, without overwriting an existing one
         with NULL.
+
+        Conflicting rows whose payload hash and entity_id are unchanged are left
+        untouched, so re-collecting the same data writes no new row versions.
+        Returns how many records were inserted, updated and skipped as unchanged.
+
+        Records are written once per key, the last one winning, and in key
+        order, so concurrent upserts of overlapping keys lock rows in the same
+        sequence and cannot deadlock each other.
         """
         if not records_data:
-            return
+            return UpsertCounts(inserted=0, updated=0, unchanged=0)
+
+        records_by_key = {external_data_key(r): r for r in records_data}
+        stmt = insert(ExternalData).values(
+            [records_by_key[key] for key in sorted(records_by_key)]
+        )
+        written = await self._upsert_returning_inserted(stmt)
+        inserted = sum(1 for is_insert in written if is_insert)
+        return UpsertCounts(
+            inserted=inserted,
+            updated=len(written) - inserted,
+            unchanged=len(records_by_key) - len(written),
+        )
 
-        stmt = insert(ExternalData).values(records_data)
+    async def upsert_from_select(self, columns: List[str], source: Select) -> int:
+        """
+        Inserts or updates ExternalData records produced by `source` entirely on
+        the server, with the same conflict handling as `bulk_upsert`.
+        Returns the number of rows inserted or updated.
+        """
+        stmt = insert(ExternalData).from_select(columns, source)
+        return len(await self._upsert_returning_inserted(stmt))
+
+    async def _upsert_returning_inserted(self, stmt: Insert) -> List[bool]:
         upsert_stmt = stmt.on_conflict_do_update(
             constraint="uq_external_data_provider_entity_external_id",
             set_={
@@ -87,8 +230,23 @@ class ExternalDataRepository(BaseRepository[ExternalData]):
                 ),
                 "updated_at": func.now(),
             },
+            # The generated content_hash of the excluded row is not computed
+            # yet at this point, so hash its raw_data explicitly.
+            where=(
+                ExternalData.content_hash.is_distinct_from(
+                    func.md5(stmt.excluded.raw_data.cast(Text))
+                )
+                | (
+                    stmt.excluded.entity_id.is_not(None)
+                    & ExternalData.entity_id.is_distinct_from(stmt.excluded.entity_id)
+                )
+            ),
         )
-        await self.db.execute(upsert_stmt)
+        # xmax is 0 only for freshly inserted row versions.
+        result: Result[bool] = await self.db.execute(
+            upsert_stmt.returning(literal_column("xmax = 0").label("inserted"))
+        )
+        return list(result.scalars().all())
 
     async def get_existing_spotify_links(
         self,
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from sqlalchemy import func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.external_data import ExternalData
+from app.db.models.external_data_quarantine import ExternalDataQuarantine
+from app.repositories.base import BaseRepository
+
+
+class ExternalDataQuarantineRepository(BaseRepository[ExternalDataQuarantine]):
+    def __init__(self, db: AsyncSession):
+        super().__init__(model=ExternalDataQuarantine, db=db)
+
+    async def quarantine(self, *, external_data_id: int, error: str) -> None:
+        """
+        Quarantines an external data record with the error it failed with,
+        remembering its current payload hash.
+        """
+        source = select(
+            ExternalData.id, ExternalData.content_hash, literal(error)
+        ).where(ExternalData.id == external_data_id)
+        stmt = insert(ExternalDataQuarantine).from_select(
+            ["external_data_id", "content_hash", "error"], source
+        )
+        await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["external_data_id"],
+                set_={
+                    "content_hash": stmt.excluded.content_hash,
+                    "error": stmt.excluded.error,
+                    "updated_at": func.now(),
+                },
+            )
+        )
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from typing import Iterable, Tuple
+
+from sqlalchemy import ARRAY, Integer, Table, bindparam, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def bulk_insert_links(
+    db: AsyncSession, table: Table, pairs: Iterable[Tuple[int, int]]
+) -> int:
+    """
+    Inserts rows into a two-column association table, skipping existing ones.
+    Each pair holds the ids in the order of the table's primary key columns.
+
+    The pairs are sent as two integer arrays and expanded server-side with
+    `INSERT ... SELECT * FROM unnest(:left, :right) ON CONFLICT DO NOTHING`, so
+    the statement has two parameters whatever the number of links and asyncpg
+    reuses one prepared statement for every call. Pairs are deduplicated and
+    sorted, which makes concurrent writers take key locks in the same order.
+    Returns the number of rows inserted.
+    """
+    unique_pairs = sorted(set(pairs))
+    if not unique_pairs:
+        return 0
+
+    left_column, right_column = table.primary_key.columns
+    left_ids, right_ids = zip(*unique_pairs, strict=True)
+    # unnest() names its output columns "unnest", so the alias lists ours:
+    # AS link(left_id, right_id).
+    rows = (
+        func.unnest(
+            bindparam("left_ids", list(left_ids), type_=ARRAY(Integer)),
+            bindparam("right_ids", list(right_ids), type_=ARRAY(Integer)),
+        )
+        .table_valued("left_id", "right_id")
+        .render_derived(name="link")
+    )
+    result = await db.execute(
+        insert(table)
+        .from_select(
+            [left_column.name, right_column.name],
+            select(rows.c.left_id, rows.c.right_id),
+        )
+        .on_conflict_do_nothing()
+    )
+    return result.rowcount  # type: ignore[attr-defined]
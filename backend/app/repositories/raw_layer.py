@@ -3,24 +3,21 @@ from __future__ import annotations
 from datetime import date
 from typing import List, Tuple
 
-from sqlalchemy import Integer, and_, cast, func, select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import aliased, selectinload
+from sqlalchemy.orm import selectinload
 
 from app.api.pagination import PaginationParams
-from app.db.models.external_data import (
-    ExternalData,
-    ExternalDataEntityType,
-    ExternalDataProvider,
-)
 from app.db.models.raw_layer import (
     RawLayerBlock,
     RawLayerBlockStatus,
     RawLayerPlaylist,
+    raw_layer_block_tracks,
+    raw_layer_playlists_tracks,
 )
-from app.db.models.style import Style
-from app.db.models.track import Track
+from app.db.models.track_catalog import TrackCatalog
 from app.repositories.base import BaseRepository
+from app.repositories.links import bulk_insert_links
 
 
 class RawLayerRepository(BaseRepository[RawLayerBlock]):
@@ -38,68 +35,59 @@ class RawLayerRepository(BaseRepository[RawLayerBlock]):
         result = await self.db.execute(stmt)
         return result.scalars().first()
 
+    async def add_block_tracks(self, *, block_id: int, track_ids: List[int]) -> int:
+        """Links tracks to a block. Returns the number of new links."""
+        return await bulk_insert_links(
+            self.db,
+            raw_layer_block_tracks,
+            ((block_id, track_id) for track_id in track_ids),
+        )
+
+    async def add_playlist_tracks(
+        self, *, playlist_id: int, track_ids: List[int]
+    ) -> int:
+        """Links tracks to a block playlist. Returns the number of new links."""
+        return await bulk_insert_links(
+            self.db,
+            raw_layer_playlists_tracks,
+            ((playlist_id, track_id) for track_id in track_ids),
+        )
+
     async def select_tracks_for_block(
         self, *, start_date: date, end_date: date, style_id: int
-    ) -> List[Track]:
+    ) -> List[TrackCatalog]:
         """
-        Selects tracks that have a Beatport release within the date range
-        and also have a corresponding Spotify link, filtered by style.
+        Selects the catalog rows of tracks of the style published within the
+        date range that have a Spotify track.
         """
-        # Get the style to access beatport_style_id
-        style_stmt = select(Style).where(Style.id == style_id)
-        style_result = await self.db.execute(style_stmt)
-        style = style_result.scalars().first()
-        if not style or not style.beatport_style_id:
-            return []
-
-        # Create an alias for the ExternalData table to use in the subquery
-        # to prevent SQLAlchemy from auto-correlating and removing the FROM clause.
-        spotify_ext_data = aliased(ExternalData)
-
-        # Subquery to check for Spotify external data
-        spotify_exists_subquery = (
-            select(spotify_ext_data.id)
+        stmt = (
+            select(TrackCatalog)
             .where(
-                spotify_ext_data.entity_id == Track.id,
-                spotify_ext_data.entity_type == ExternalDataEntityType.TRACK,
-                spotify_ext_data.provider == ExternalDataProvider.SPOTIFY,
+                TrackCatalog.style_id == style_id,
+                TrackCatalog.publish_date.between(start_date, end_date),
+                TrackCatalog.spotify_uri.is_not(None),
             )
-            .exists()
+            .order_by(TrackCatalog.track_id)
         )
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
 
-        # Subquery to get the IDs of tracks that meet the criteria.
-        track_ids_subquery = (
-            select(Track.id)
+    async def get_block_catalog(self, *, block_id: int) -> List[TrackCatalog]:
+        """Returns the catalog rows of the tracks linked to a block."""
+        stmt = (
+            select(TrackCatalog)
             .join(
-                ExternalData,
-                and_(
-                    ExternalData.entity_id == Track.id,
-                    ExternalData.entity_type == ExternalDataEntityType.TRACK,
-                    ExternalData.provider == ExternalDataProvider.BEATPORT,
-                ),
+                raw_layer_block_tracks,
+                raw_layer_block_tracks.c.track_id == TrackCatalog.track_id,
             )
             .where(
-                ExternalData.raw_data["publish_date"]
-                .as_string()
-                .between(str(start_date), str(end_date)),
-                cast(ExternalData.raw_data["genre"]["id"].astext, Integer)
-                == style.beatport_style_id,
-                spotify_exists_subquery,
+                raw_layer_block_tracks.c.raw_layer_block_id == block_id,
+                TrackCatalog.spotify_uri.is_not(None),
             )
-            .distinct()
-            .subquery()
-        )
-
-        # Now, fetch the full Track objects with eager-loaded external_data
-        # to prevent N+1 queries in the service layer.
-        stmt = (
-            select(Track)
-            .options(selectinload(Track.external_data))
-            .where(Track.id.in_(select(track_ids_subquery)))
+            .order_by(TrackCatalog.track_id)
         )
-
         result = await self.db.execute(stmt)
-        return list(result.scalars().unique().all())
+        return list(result.scalars().all())
 
     async def get_paginated_by_user(
         self, *, user_id: int, params: PaginationParams
@@ -169,6 +157,22 @@ class RawLayerRepository(BaseRepository[RawLayerBlock]):
 
         return items, total
 
+    async def get_with_playlists_for_user(
+        self, *, block_id: int, user_id: int
+    ) -> RawLayerBlock | None:
+        """Like get_by_id_for_user, without loading the block's tracks."""
+        stmt = (
+            select(RawLayerBlock)
+            .options(
+                selectinload(RawLayerBlock.playlists).selectinload(
+                    RawLayerPlaylist.category
+                )
+            )
+            .where(RawLayerBlock.id == block_id, RawLayerBlock.user_id == user_id)
+        )
+        result = await self.db.execute(stmt)
+        return result.scalars().first()
+
     async def get_by_id_for_user(
         self, *, block_id: int, user_id: int
     ) -> RawLayerBlock | None:
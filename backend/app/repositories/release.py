@@ -26,8 +26,14 @@ class ReleaseRepository(BaseRepository[Release]):
         if not releases_data:
             return {}
 
+        # Insert in a canonical order so concurrent sessions lock rows in the
+        # same sequence and cannot deadlock each other.
+        ordered_data = sorted(
+            releases_data, key=lambda r: (r["name"], r["label_id"] or 0)
+        )
+
         # Use ON CONFLICT with the unique constraint on (name, label_id)
-        insert_stmt = insert(Release).values(releases_data)
+        insert_stmt = insert(Release).values(ordered_data)
         on_conflict_stmt = insert_stmt.on_conflict_do_nothing(
             index_elements=["name", "label_id"]
         )
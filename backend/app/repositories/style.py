@@ -1,6 +1,6 @@
 from typing import List, Tuple
 
-from sqlalchemy import Integer, and_, cast, func, select
+from sqlalchemy import and_, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.engine import Result
 
@@ -8,6 +8,7 @@ from app.db.models.external_data import (
     ExternalData,
     ExternalDataEntityType,
     ExternalDataProvider,
+    external_data_kind,
 )
 from app.db.models.style import Style
 from app.repositories.base import BaseRepository
@@ -27,10 +28,12 @@ class StyleRepository(BaseRepository[Style]):
             .outerjoin(
                 ExternalData,
                 and_(
-                    ExternalData.provider == ExternalDataProvider.BEATPORT,
-                    ExternalData.entity_type == ExternalDataEntityType.TRACK,
-                    cast(ExternalData.raw_data["genre"]["id"].astext, Integer)
-                    == Style.beatport_style_id,
+                    external_data_kind(
+                        ExternalData,
+                        ExternalDataProvider.BEATPORT,
+                        ExternalDataEntityType.TRACK,
+                    ),
+                    ExternalData.genre_id == Style.beatport_style_id,
                 ),
             )
             .group_by(Style.id)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.task_checkpoint import TaskCheckpoint
+from app.repositories.base import BaseRepository
+
+
+class TaskCheckpointRepository(BaseRepository[TaskCheckpoint]):
+    def __init__(self, db: AsyncSession):
+        super().__init__(model=TaskCheckpoint, db=db)
+
+    async def get_by_key(self, *, key: str) -> TaskCheckpoint | None:
+        result = await self.db.execute(
+            select(TaskCheckpoint).where(TaskCheckpoint.key == key)
+        )
+        return result.scalars().first()
+
+    async def save(
+        self, *, key: str, task_id: str, cursor: int, state: Dict[str, Any]
+    ) -> None:
+        """Creates or overwrites the checkpoint stored under `key`."""
+        stmt = insert(TaskCheckpoint).values(
+            key=key, task_id=task_id, cursor=cursor, state=state
+        )
+        await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["key"],
+                set_={
+                    "task_id": stmt.excluded.task_id,
+                    "cursor": stmt.excluded.cursor,
+                    "state": stmt.excluded.state,
+                    "updated_at": func.now(),
+                },
+            )
+        )
+
+    async def delete_by_key(self, *, key: str) -> None:
+        await self.db.execute(delete(TaskCheckpoint).where(TaskCheckpoint.key == key))
@@ -2,11 +2,12 @@ from __future__ import annotations
 
 from typing import Any, Dict, List, Tuple
 
-from sqlalchemy import func, select, tuple_
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import Select, column, func, select, true, tuple_, update
+from sqlalchemy.dialects.postgresql import JSONB, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
+from app.db.models.enrichment_attempt import enrichment_retry_pending
 from app.db.models.external_data import (
     ExternalData,
     ExternalDataEntityType,
@@ -14,7 +15,7 @@ from app.db.models.external_data import (
 )
 from app.db.models.track import Track, track_artists
 from app.repositories.base import BaseRepository
-from app.schemas.track import TrackWithSpotifyData
+from app.repositories.links import bulk_insert_links
 
 
 class TrackRepository(BaseRepository[Track]):
@@ -34,11 +35,16 @@ class TrackRepository(BaseRepository[Track]):
         if not tracks_data:
             return {}
 
-        # Separate track core data from artist relations for insertion
-        track_core_data = [
-            {k: v for k, v in t.items() if k not in ["artist_ids", "external_id"]}
-            for t in tracks_data
-        ]
+        # Separate track core data from artist relations for insertion.
+        # Rows are sorted by natural key so that concurrent sessions acquire
+        # row locks in the same order and cannot deadlock each other.
+        track_core_data = sorted(
+            (
+                {k: v for k, v in t.items() if k not in ["artist_ids", "external_id"]}
+                for t in tracks_data
+            ),
+            key=lambda t: (t["name"], t["release_id"], t["isrc"] or ""),
+        )
 
         # 1. Insert/Ignore: Use ON CONFLICT DO NOTHING to insert new tracks
         insert_stmt = insert(Track).values(track_core_data)
@@ -60,128 +66,152 @@ class TrackRepository(BaseRepository[Track]):
             (t.name, t.release_id, t.isrc): t for t in fetched_tracks
         }
 
-        # 3. Prepare and bulk insert M2M artist associations
-        artist_associations = []
+        # 3. Bulk insert M2M artist associations
         # Create a map of (name, release_id, isrc) -> artist_ids from original input
         artist_ids_map = {
             (t["name"], t["release_id"], t["isrc"]): t.get("artist_ids", [])
             for t in tracks_data
         }
-
-        for key, track in tracks_map.items():
-            for artist_id in artist_ids_map.get(key, []):
-                artist_associations.append(
-                    {"track_id": track.id, "artist_id": artist_id}
-                )
-
-        if artist_associations:
-            # Deduplicate associations before inserting
-            unique_associations = [
-                dict(t) for t in {tuple(d.items()) for d in artist_associations}
-            ]
-            await self.db.execute(
-                insert(track_artists)
-                .values(unique_associations)
-                .on_conflict_do_nothing()
-            )
+        await bulk_insert_links(
+            self.db,
+            track_artists,
+            (
+                (track.id, artist_id)
+                for key, track in tracks_map.items()
+                for artist_id in artist_ids_map.get(key, [])
+            ),
+        )
 
         return tracks_map
 
+    def _missing_spotify_link_query(
+        self, *, after_id: int = 0, until_id: int | None = None
+    ) -> Select:
+        """
+        Tracks that have an ISRC but no Spotify link and are not waiting out the
+        retry delay of a failed match, with ids in (after_id, until_id]. No
+        `until_id` means no upper bound.
+        """
+        query = select(Track).where(
+            Track.isrc.is_not(None),
+            Track.spotify_id.is_(None),
+            ~enrichment_retry_pending(
+                ExternalDataProvider.SPOTIFY, ExternalDataEntityType.TRACK, Track.id
+            ),
+            Track.id > after_id,
+        )
+        if until_id is not None:
+            query = query.where(Track.id <= until_id)
+        return query
+
+    async def count_tracks_missing_spotify_link(
+        self, *, after_id: int = 0, until_id: int | None = None
+    ) -> int:
+        """
+        Counts tracks that have an ISRC but no Spotify link.
+        This scans the whole anti-join, so call it once per run, not per batch.
+        """
+        base_query = self._missing_spotify_link_query(
+            after_id=after_id, until_id=until_id
+        )
+        count_query = select(func.count()).select_from(base_query.subquery())
+        result = await self.db.execute(count_query)
+        return result.scalar_one()
+
     async def get_tracks_missing_spotify_link(
-        self, *, offset: int, limit: int
-    ) -> Tuple[List[Track], int]:
+        self, *, after_id: int, limit: int, until_id: int | None = None
+    ) -> List[Track]:
         """
-        Gets tracks that have an ISRC but no associated Spotify external data link.
+        Gets the next batch of tracks that have an ISRC but no associated Spotify
+        external data link, with the 'artists' relationship preloaded.
 
-        This method uses a NOT EXISTS subquery to efficiently find tracks that are
-        missing a corresponding entry in the external_data table for the SPOTIFY
-        provider. It also preloads the 'artists' relationship for the returned tracks.
+        This is a keyset work queue: callers pass the id of the last track of the
+        previous batch as `after_id`, so every call costs O(limit) regardless of
+        how many rows were already visited.
 
         Args:
-            offset: The number of records to skip for pagination.
+            after_id: Only tracks with a greater id are returned.
             limit: The maximum number of records to return.
 
         Returns:
-            A tuple containing a list of Track objects and the total count of
-            all such tracks in the database.
+            A list of Track objects ordered by id.
         """
-        # Define the NOT EXISTS subquery condition
-        exists_condition = (
-            select(ExternalData.id)
-            .where(
-                ExternalData.provider == ExternalDataProvider.SPOTIFY,
-                ExternalData.entity_type == ExternalDataEntityType.TRACK,
-                ExternalData.entity_id == Track.id,
-            )
-            .exists()
-        )
-
-        # Base query to find tracks with ISRC and where the Spotify link does not exist
-        base_query = select(Track).where(
-            Track.isrc.is_not(None),
-            ~exists_condition,
-        )
-
-        # Query for total count
-        count_query = select(func.count()).select_from(base_query.subquery())
-        total_result = await self.db.execute(count_query)
-        total = total_result.scalar_one()
-
-        if total == 0:
-            return [], 0
-
-        # Query for the paginated items with artists preloaded
         items_query = (
-            base_query.options(joinedload(Track.artists))
+            self._missing_spotify_link_query(after_id=after_id, until_id=until_id)
+            .options(joinedload(Track.artists))
             .order_by(Track.id)
-            .offset(offset)
             .limit(limit)
         )
         items_result = await self.db.execute(items_query)
-        items = list(items_result.scalars().unique().all())
+        return list(items_result.scalars().unique().all())
 
-        return items, total
+    async def get_missing_spotify_link_shard_bounds(
+        self, *, shards: int
+    ) -> List[Tuple[int, int]]:
+        """
+        Splits the tracks without a Spotify link into at most `shards` id ranges
+        holding about as many tracks each. Returns the last id and the size of
+        every range, in id order; empty when no track is missing a link.
+        """
+        ranked = (
+            self._missing_spotify_link_query()
+            .with_only_columns(
+                Track.id, func.ntile(shards).over(order_by=Track.id).label("shard")
+            )
+            .subquery()
+        )
+        last_id = func.max(ranked.c.id)
+        stmt = select(last_id, func.count()).group_by(ranked.c.shard).order_by(last_id)
+        result = await self.db.execute(stmt)
+        return [(row[0], row[1]) for row in result]
 
-    async def get_tracks_by_artist_ids_with_spotify_data(
+    async def get_spotify_artist_candidates(
         self, *, artist_ids: List[int]
-    ) -> List[TrackWithSpotifyData]:
+    ) -> List[Tuple[int, str, str]]:
         """
-        Gets tracks for a given list of artist IDs that have a Spotify data link.
-        Returns a list of Pydantic models with track and Spotify data.
+        Lists the Spotify artists credited on the Spotify-linked tracks of the
+        given artists, as (artist_id, spotify_artist_id, spotify_artist_name)
+        rows read straight from the stored payloads. Rows are ordered by artist,
+        track and position in the payload's artist list.
         """
         if not artist_ids:
             return []
 
-        # This query fetches Tracks and their associated Spotify ExternalData.
-        # It filters by artist_ids and ensures a Spotify link exists.
+        payload_artists = ExternalData.raw_data["artists"]
+        spotify_artists = (
+            func.jsonb_array_elements(payload_artists)
+            .table_valued(column("value", JSONB), with_ordinality="position")
+            # Lists the columns in the alias; the ordinality column would be
+            # named "ordinality" otherwise.
+            .render_derived()
+            .lateral("spotify_artist")
+        )
+        spotify_artist_id = spotify_artists.c.value["id"].astext
+        spotify_artist_name = spotify_artists.c.value["name"].astext
         stmt = (
-            select(Track, ExternalData)
-            .join(track_artists, Track.id == track_artists.c.track_id)
+            select(track_artists.c.artist_id, spotify_artist_id, spotify_artist_name)
             .join(
                 ExternalData,
-                (ExternalData.entity_id == Track.id)
+                (ExternalData.entity_id == track_artists.c.track_id)
                 & (ExternalData.entity_type == ExternalDataEntityType.TRACK)
-                & (ExternalData.provider == ExternalDataProvider.SPOTIFY)
-                & (ExternalData.raw_data.is_not(None)),
+                & (ExternalData.provider == ExternalDataProvider.SPOTIFY),
+            )
+            .join(spotify_artists, true())
+            .where(
+                track_artists.c.artist_id.in_(artist_ids),
+                # jsonb_array_elements raises on anything but an array.
+                func.jsonb_typeof(payload_artists) == "array",
+                spotify_artist_id != "",
+                spotify_artist_name != "",
+            )
+            .order_by(
+                track_artists.c.artist_id,
+                ExternalData.entity_id,
+                spotify_artists.c.position,
             )
-            .where(track_artists.c.artist_id.in_(artist_ids))
-            .options(joinedload(Track.artists))
-            .distinct()
         )
-
         result = await self.db.execute(stmt)
-
-        track_map: Dict[int, dict] = {}
-        for track, ext_data in result.unique().all():
-            if track.id not in track_map:
-                track_map[track.id] = {
-                    "id": track.id,
-                    "artists": track.artists,
-                    "external_data": [],
-                }
-            track_map[track.id]["external_data"].append(ext_data)
-
-        return [TrackWithSpotifyData.model_validate(t) for t in track_map.values()]
+        return [(row[0], row[1], row[2]) for row in result]
 
     async def find_by_spotify_uris(self, *, uris: list[str]) -> list[Track]:
         """
@@ -198,16 +228,18 @@ class TrackRepository(BaseRepository[Track]):
         if not spotify_ids:
             return []
 
-        stmt = (
-            select(Track)
-            .join(
-                ExternalData,
-                (Track.id == ExternalData.entity_id)
-                & (ExternalData.entity_type == ExternalDataEntityType.TRACK)
-                & (ExternalData.provider == ExternalDataProvider.SPOTIFY),
-            )
-            .where(ExternalData.external_id.in_(spotify_ids))
-        )
-
+        stmt = select(Track).where(Track.spotify_id.in_(spotify_ids))
         result = await self.db.execute(stmt)
-        return list(result.scalars().unique().all())
+        return list(result.scalars().all())
+
+    async def set_spotify_ids(self, spotify_ids: Dict[int, str]) -> None:
+        """Stores the Spotify ids of newly linked tracks, keyed by track id."""
+        if not spotify_ids:
+            return
+        await self.db.execute(
+            update(Track),
+            [
+                {"id": track_id, "spotify_id": spotify_ids[track_id]}
+                for track_id in sorted(spotify_ids)
+            ],
+        )
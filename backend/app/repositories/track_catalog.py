@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+from typing import List
+
+from sqlalchemy import (
+    ARRAY,
+    Date,
+    Integer,
+    any_,
+    bindparam,
+    case,
+    cast,
+    func,
+    select,
+    true,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.external_data import (
+    ExternalData,
+    ExternalDataEntityType,
+    ExternalDataProvider,
+    external_data_kind,
+)
+from app.db.models.style import Style
+from app.db.models.track import Track
+from app.db.models.track_catalog import TrackCatalog
+from app.repositories.base import BaseRepository
+
+# Columns written by refresh, in the order of the refresh SELECT.
+CATALOG_COLUMNS = [
+    "track_id",
+    "style_id",
+    "publish_date",
+    "spotify_uri",
+    "album_type",
+    "album_release_date",
+    "bpm",
+    "key",
+]
+
+
+def _iso_date(value):
+    """
+    Casts a text date to a date if it starts with YYYY-MM-DD, else NULL. Spotify
+    release dates may only give the year or the month.
+    """
+    return case(
+        (
+            value.regexp_match(r"^\d{4}-\d{2}-\d{2}"),
+            cast(func.left(value, 10), Date),
+        ),
+    )
+
+
+def _latest_source(provider: ExternalDataProvider, *columns):
+    """The given columns of a track's most recent external data of `provider`."""
+    return (
+        select(*columns)
+        .where(
+            ExternalData.entity_id == Track.id,
+            external_data_kind(ExternalData, provider, ExternalDataEntityType.TRACK),
+        )
+        .order_by(ExternalData.id.desc())
+        .limit(1)
+        .lateral(provider.value.lower())
+    )
+
+
+class TrackCatalogRepository(BaseRepository[TrackCatalog]):
+    def __init__(self, db: AsyncSession):
+        super().__init__(model=TrackCatalog, db=db)
+
+    async def refresh(self, track_ids: List[int]) -> None:
+        """
+        Recomputes the catalog rows of the given tracks from the tracks, their
+        Beatport and Spotify external data and the styles, in one statement.
+        Tracks without a Beatport source are left out, and rows whose values
+        did not change are not rewritten.
+        """
+        if not track_ids:
+            return
+        await self._refresh(
+            Track.id == any_(bindparam("track_ids", track_ids, type_=ARRAY(Integer)))
+        )
+
+    async def refresh_for_sources(self, source_ids: List[int]) -> None:
+        """Refreshes the tracks linked to the given Beatport track rows."""
+        if not source_ids:
+            return
+        await self._refresh(
+            Track.id.in_(
+                select(ExternalData.entity_id).where(
+                    ExternalData.id
+                    == any_(bindparam("source_ids", source_ids, type_=ARRAY(Integer))),
+                    external_data_kind(
+                        ExternalData,
+                        ExternalDataProvider.BEATPORT,
+                        ExternalDataEntityType.TRACK,
+                    ),
+                )
+            )
+        )
+
+    async def _refresh(self, condition) -> None:
+        beatport = _latest_source(
+            ExternalDataProvider.BEATPORT,
+            ExternalData.genre_id,
+            ExternalData.publish_date,
+        )
+        album = ExternalData.raw_data["album"]
+        spotify = _latest_source(
+            ExternalDataProvider.SPOTIFY,
+            ExternalData.raw_data["uri"].astext.label("uri"),
+            album["album_type"].astext.label("album_type"),
+            album["release_date"].astext.label("release_date"),
+        )
+        rows = (
+            select(
+                Track.id,
+                Style.id,
+                _iso_date(beatport.c.publish_date),
+                spotify.c.uri,
+                spotify.c.album_type,
+                _iso_date(spotify.c.release_date),
+                Track.bpm,
+                Track.key,
+            )
+            .select_from(Track)
+            .join(beatport, true())
+            .outerjoin(spotify, true())
+            .outerjoin(Style, Style.beatport_style_id == beatport.c.genre_id)
+            .where(condition)
+            .order_by(Track.id)
+        )
+        stmt = insert(TrackCatalog).from_select(CATALOG_COLUMNS, rows)
+        current = [TrackCatalog.__table__.c[name] for name in CATALOG_COLUMNS[1:]]
+        new = [stmt.excluded[name] for name in CATALOG_COLUMNS[1:]]
+        await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["track_id"],
+                set_={
+                    **{name: stmt.excluded[name] for name in CATALOG_COLUMNS[1:]},
+                    "updated_at": func.now(),
+                },
+                where=tuple_(*current).is_distinct_from(tuple_(*new)),
+            )
+        )
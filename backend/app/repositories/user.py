@@ -19,6 +19,14 @@ class UserRepository(BaseRepository[User]):
         )
         return result.scalars().first()
 
+    async def get_with_spotify_token(self, *, user_id: int) -> User | None:
+        result = await self.db.execute(
+            select(User)
+            .options(selectinload(User.spotify_token))
+            .filter(User.id == user_id)
+        )
+        return result.scalars().first()
+
     async def create(self, *, obj_in: UserCreate) -> User:
         db_obj = User(
             spotify_id=obj_in.spotify_id,
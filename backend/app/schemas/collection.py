@@ -1,10 +1,13 @@
 from datetime import date
-
 from pydantic import BaseModel
 
+from app.core.constants import ProcessingEngine
+
 
 class BeatportCollectionRequest(BaseModel):
     bp_token: str
     style_id: int
     date_from: date
     date_to: date
+    # Processing engine for this run; defaults to BEATPORT_PROCESSING_ENGINE.
+    engine: ProcessingEngine | None = None
@@ -1,8 +1,5 @@
 from pydantic import BaseModel, ConfigDict
 
-from .artist import Artist
-from .external_data import ExternalData as ExternalDataSchema
-
 
 class Track(BaseModel):
     id: int
@@ -14,11 +11,3 @@ class Track(BaseModel):
     release_id: int
 
     model_config = ConfigDict(from_attributes=True)
-
-
-class TrackWithSpotifyData(BaseModel):
-    id: int
-    artists: list[Artist]
-    external_data: list[ExternalDataSchema]
-
-    model_config = ConfigDict(from_attributes=True)
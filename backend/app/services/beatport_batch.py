@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from app.repositories.external_data import ExternalDataRow
+
+# (release name, label name); label names map one-to-one to label rows.
+ReleaseKey = Tuple[str, str]
+
+
+class PayloadError(Exception):
+    """A raw payload lacks a field that processing reads, or has the wrong shape."""
+
+
+@contextmanager
+def reading_payload() -> Iterator[None]:
+    """
+    Turns the lookup and type errors of the payload reads in the block into
+    PayloadError, so that they can be told apart from bugs elsewhere in the
+    processing code. Keep the block to the reads themselves.
+    """
+    try:
+        yield
+    except (KeyError, IndexError, TypeError, ValueError, AttributeError) as e:
+        raise PayloadError(f"{type(e).__name__}: {e}") from e
+
+
+@dataclass(slots=True)
+class BeatportTrackBatch:
+    """
+    A batch of raw Beatport tracks parsed in a single pass.
+
+    `labels`, `artists` and `releases` keep the first payload seen for every
+    distinct label name, artist name and release. `tracks` holds the records
+    that have a release with a label, in record order, and `release_keys` the
+    key of each one's release; other records only contribute their artists.
+    Per-track fields are not copied into columns of their own: the track
+    stage reads them from each record's raw_data as it builds the track rows.
+    """
+
+    labels: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    artists: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    releases: Dict[ReleaseKey, Dict[str, Any]] = field(default_factory=dict)
+    tracks: List[ExternalDataRow] = field(default_factory=list)
+    release_keys: List[ReleaseKey] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.tracks)
+
+
+def parse_beatport_tracks(
+    records: Iterable[ExternalDataRow],
+) -> BeatportTrackBatch:
+    """
+    Walks every record's raw_data once and returns it as a batch. Raises
+    PayloadError for a payload that cannot be read.
+    """
+    batch = BeatportTrackBatch()
+    labels = batch.labels
+    artists = batch.artists
+    releases = batch.releases
+    release_keys: Dict[ReleaseKey, ReleaseKey] = {}
+
+    with reading_payload():
+        for record in records:
+            raw_data = record.raw_data
+            if not raw_data:
+                continue
+
+            for artist_info in raw_data.get("artists") or ():
+                artist_name = artist_info["name"]
+                if artist_name not in artists:
+                    artists[artist_name] = artist_info
+
+            release_info = raw_data.get("release")
+            if not release_info or not release_info.get("label"):
+                # Not a track to create; its artists are still created above.
+                continue
+
+            label_info = release_info["label"]
+            label_name = label_info["name"]
+            if label_name not in labels:
+                labels[label_name] = label_info
+            release_key = (release_info["name"], label_name)
+            # Every track of a release shares the key tuple stored first, so the
+            # per-track list holds no tuple of its own.
+            release_key = release_keys.setdefault(release_key, release_key)
+            if release_key not in releases:
+                releases[release_key] = release_info
+
+            batch.tracks.append(record)
+            batch.release_keys.append(release_key)
+
+    return batch
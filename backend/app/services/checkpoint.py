@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Tuple
+
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repositories import TaskCheckpointRepository
+
+log = structlog.get_logger(__name__)
+
+
+class BatchCheckpointer:
+    """
+    Commits a long-running task batch by batch and records where it stopped.
+
+    Every `commit_batch` call stores the cursor and counters under `key` and
+    commits the session, so a crashed worker loses at most one batch. A task
+    restarted with the same key resumes from the stored cursor.
+    """
+
+    def __init__(self, db: AsyncSession, *, key: str, task_id: str):
+        self.db = db
+        self.key = key
+        self.task_id = task_id
+        self.checkpoint_repo = TaskCheckpointRepository(db)
+
+    async def load(self) -> Tuple[int, Dict[str, Any]]:
+        """Returns the stored (cursor, state), or (0, {}) for a fresh run."""
+        checkpoint = await self.checkpoint_repo.get_by_key(key=self.key)
+        if not checkpoint:
+            return 0, {}
+        log.info(
+            "Resuming task from checkpoint",
+            key=self.key,
+            cursor=checkpoint.cursor,
+            previous_task_id=checkpoint.task_id,
+            task_id=self.task_id,
+        )
+        return checkpoint.cursor, dict(checkpoint.state or {})
+
+    async def commit_batch(self, *, cursor: int, state: Dict[str, Any]) -> None:
+        """Stores the checkpoint and commits everything written so far."""
+        await self.checkpoint_repo.save(
+            key=self.key, task_id=self.task_id, cursor=cursor, state=state
+        )
+        await self.db.commit()
+
+    async def complete(self) -> None:
+        """Drops the checkpoint once the run has finished successfully."""
+        await self.checkpoint_repo.delete_by_key(key=self.key)
+        await self.db.commit()
@@ -1,12 +1,25 @@
 from __future__ import annotations
 
-from typing import Any, Awaitable, Callable, Dict
+import asyncio
+from contextlib import aclosing
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Sequence,
+)
 
 import httpx
 import structlog
 
 from app.clients.beatport import BeatportAPIClient
+from app.core.settings import settings
 from app.db.models.external_data import (
+    ExternalData,
     ExternalDataEntityType,
     ExternalDataProvider,
 )
@@ -16,7 +29,10 @@ from app.repositories import (
     ReleaseRepository,
     StyleRepository,
 )
+from app.repositories.external_data import ExternalDataRow
+from app.services.checkpoint import BatchCheckpointer
 from app.services.data_processing import DataProcessingService
+from app.services.session_recycling import SessionRecycler
 
 log = structlog.get_logger(__name__)
 
@@ -31,93 +47,308 @@ class CollectionService:
         style_repo: StyleRepository | None = None,
         artist_repo: ArtistRepository | None = None,
         release_repo: ReleaseRepository | None = None,
+        data_processing_factory: (
+            Callable[[], AsyncContextManager[DataProcessingService]] | None
+        ) = None,
+        checkpointer: BatchCheckpointer | None = None,
+        session_recycler: SessionRecycler | None = None,
     ):
         self.external_data_repo = external_data_repo
         self.data_processing_service = data_processing_service
         self.style_repo = style_repo
         self.artist_repo = artist_repo
         self.release_repo = release_repo
+        self.data_processing_factory = data_processing_factory
+        self.checkpointer = checkpointer
+        self.session_recycler = session_recycler
 
     async def collect_beatport_tracks_raw(
         self, bp_token: str, style_id: int, date_from: str, date_to: str
-    ) -> None:
+    ) -> Dict[str, int]:
         """
         Collect raw track data from Beatport API and store in external_data table.
-        This is phase 1 of the collection process.
+        This is phase 1 of the collection process. Returns how many records were
+        inserted, updated and left unchanged.
+
+        With a checkpointer, every page is committed as it arrives and a restarted
+        run continues from the page after the last committed one.
         """
+        start_page = 1
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        if self.checkpointer:
+            last_page, state = await self.checkpointer.load()
+            start_page = last_page + 1
+            for name in counts:
+                counts[name] = state.get(name, 0)
+
         log.info(
             "Starting raw tracks data collection",
             style_id=style_id,
             date_from=date_from,
             date_to=date_to,
+            start_page=start_page,
         )
 
+        page = start_page - 1
         async with httpx.AsyncClient() as http_client:
             bp_client = BeatportAPIClient(client=http_client, bp_token=bp_token)
             async for tracks_page in bp_client.get_tracks(
                 genre_id=style_id,
                 publish_date_start=date_from,
                 publish_date_end=date_to,
+                start_page=start_page,
             ):
-                if not tracks_page:
-                    continue
-                bulk_data = [
-                    {
-                        "provider": ExternalDataProvider.BEATPORT,
-                        "entity_type": ExternalDataEntityType.TRACK,
-                        "external_id": str(track["id"]),
-                        "raw_data": track,
-                    }
-                    for track in tracks_page
-                ]
-                await self.external_data_repo.bulk_upsert(bulk_data)
+                page += 1
+                if tracks_page:
+                    bulk_data = [
+                        {
+                            "provider": ExternalDataProvider.BEATPORT,
+                            "entity_type": ExternalDataEntityType.TRACK,
+                            "external_id": str(track["id"]),
+                            "raw_data": track,
+                        }
+                        for track in tracks_page
+                    ]
+                    upserted = await self.external_data_repo.bulk_upsert(bulk_data)
+                    for name, value in upserted._asdict().items():
+                        counts[name] += value
+                if self.checkpointer:
+                    await self.checkpointer.commit_batch(
+                        cursor=page, state={"page": page, **counts}
+                    )
+
+        if self.checkpointer:
+            await self.checkpointer.complete()
+
+        log.info("Finished raw tracks data collection", style_id=style_id, **counts)
+        return counts
+
+    async def _unprocessed_batches(
+        self, *, after_id: int, batch_size: int, with_payload: bool
+    ) -> AsyncGenerator[Sequence[ExternalDataRow], None]:
+        """
+        Yields batches of unprocessed Beatport tracks after `after_id`, as
+        plain rows fetched with one keyset query per batch. With per-batch
+        commits every query runs in a fresh transaction, so no snapshot is held
+        open for the whole run.
+        """
+        while True:
+            page = await self.external_data_repo.get_unprocessed_beatport_rows(
+                after_id=after_id, limit=batch_size, with_payload=with_payload
+            )
+            if not page:
+                return
+            after_id = page[-1].id
+            yield page
 
     async def process_unprocessed_beatport_tracks(
         self,
         batch_progress_callback: Callable[[Dict[str, Any]], Awaitable[None]],
     ) -> Dict[str, Any]:
-        """Process all unprocessed Beatport tracks in batches."""
-        BATCH_SIZE = 500
-        processed_count = 0
+        """
+        Process all unprocessed Beatport tracks in batches.
+
+        Records that fail processing are isolated and quarantined while the rest
+        of their batch is processed (see `process_batch_with_quarantine`).
+        With a checkpointer, every batch is committed on its own and a restarted
+        run resumes after the last committed record with its counters restored.
+        """
+        BATCH_SIZE = settings.BEATPORT_PROCESSING_BATCH_SIZE
+        last_id, state = (
+            await self.checkpointer.load() if self.checkpointer else (0, {})
+        )
+        processed_count = state.get("processed", 0)
+        quarantined_count = state.get("quarantined", 0)
 
         total_to_process = (
-            await self.external_data_repo.count_unprocessed_beatport_tracks()
+            processed_count
+            + quarantined_count
+            + await self.external_data_repo.count_unprocessed_beatport_tracks(
+                after_id=last_id
+            )
         )
         log.info("Found unprocessed records", count=total_to_process)
 
         if total_to_process == 0:
             return {"processed": 0, "failed": 0, "total": total_to_process}
 
-        while processed_count < total_to_process:
-            records = await self.external_data_repo.get_unprocessed_beatport_tracks(
-                limit=BATCH_SIZE
-            )
-            if not records:
-                break
-
-            try:
-                await self.data_processing_service.process_batch(records)
-                processed_count += len(records)
-            except Exception:
-                log.exception(
-                    "Batch processing failed. Stopping task.",
-                    batch_size=len(records),
-                )
-                failed_count = total_to_process - processed_count
-                return {
+        processing = self.data_processing_service
+        batches = self._unprocessed_batches(
+            after_id=last_id,
+            batch_size=BATCH_SIZE,
+            with_payload=processing.loads_payload,
+        )
+        async with aclosing(batches):
+            async for records in batches:
+                last_id = records[-1].id
+
+                try:
+                    quarantined = await processing.process_batch_with_quarantine(
+                        records
+                    )
+                    processed_count += len(records) - quarantined
+                    quarantined_count += quarantined
+                except Exception:
+                    log.exception(
+                        "Batch processing failed. Stopping task.",
+                        batch_size=len(records),
+                    )
+                    failed_count = (
+                        total_to_process - processed_count - quarantined_count
+                    )
+                    return {
+                        "processed": processed_count,
+                        "failed": failed_count,
+                        "quarantined": quarantined_count,
+                        "total": total_to_process,
+                    }
+
+                progress = {
                     "processed": processed_count,
-                    "failed": failed_count,
+                    "failed": 0,
+                    "quarantined": quarantined_count,
                     "total": total_to_process,
                 }
+                if self.checkpointer:
+                    await self.checkpointer.commit_batch(cursor=last_id, state=progress)
+                if self.session_recycler:
+                    await self.session_recycler.batch_done()
+                await batch_progress_callback(progress)
+
+        if self.checkpointer:
+            await self.checkpointer.complete()
+        log.info(
+            "Finished processing all batches.",
+            processed_count=processed_count,
+            quarantined_count=quarantined_count,
+        )
+        return {
+            "processed": processed_count,
+            "failed": 0,
+            "quarantined": quarantined_count,
+            "total": total_to_process,
+        }
 
-            await batch_progress_callback(
-                {"processed": processed_count, "failed": 0, "total": total_to_process}
+    async def process_unprocessed_beatport_tracks_parallel(
+        self,
+        batch_progress_callback: Callable[[Dict[str, Any]], Awaitable[None]],
+        concurrency: int,
+    ) -> Dict[str, Any]:
+        """
+        Process all unprocessed Beatport tracks with several concurrent workers.
+
+        Each worker runs its batches on a separate session obtained from
+        `data_processing_factory` and commits them independently. Batches are
+        claimed in id order with FOR UPDATE SKIP LOCKED behind a shared cursor,
+        so workers (and other tasks) never process the same records twice.
+        Progress from all workers is aggregated into `batch_progress_callback`
+        and, with a checkpointer, recorded up to the lowest uncommitted batch.
+        Failing records are quarantined as in the sequential variant.
+        """
+        factory = self.data_processing_factory
+        if factory is None:
+            raise RuntimeError("Data processing factory not initialized")
+
+        batch_size = settings.BEATPORT_PROCESSING_BATCH_SIZE
+        resume_cursor, state = (
+            await self.checkpointer.load() if self.checkpointer else (0, {})
+        )
+        processed_count = state.get("processed", 0)
+        quarantined_count = state.get("quarantined", 0)
+        total_to_process = (
+            processed_count
+            + quarantined_count
+            + await self.external_data_repo.count_unprocessed_beatport_tracks(
+                after_id=resume_cursor
             )
+        )
+        log.info(
+            "Found unprocessed records",
+            count=total_to_process,
+            concurrency=concurrency,
+        )
 
-        log.info("Finished processing all batches.", processed_count=processed_count)
+        if total_to_process == 0:
+            return {"processed": 0, "failed": 0, "total": total_to_process}
+
+        claim_lock = asyncio.Lock()
+        checkpoint_lock = asyncio.Lock()
+        stop_event = asyncio.Event()
+        cursor = resume_cursor
+        # Cursor value each worker claimed its current batch from. The smallest
+        # one is the point up to which every claimed batch has been committed.
+        in_flight: Dict[int, int] = {}
+
+        async def worker(worker_id: int) -> None:
+            nonlocal cursor, processed_count, quarantined_count
+            while not stop_event.is_set():
+                records: List[ExternalData] = []
+                quarantined = 0
+                try:
+                    async with factory() as processing_service:
+                        repo = processing_service.external_data_repo
+                        async with claim_lock:
+                            records = await repo.claim_unprocessed_beatport_tracks(
+                                after_id=cursor,
+                                limit=batch_size,
+                                with_payload=processing_service.loads_payload,
+                            )
+                            if records:
+                                in_flight[worker_id] = cursor
+                                cursor = records[-1].id
+                        if not records:
+                            return
+                        quarantined = (
+                            await processing_service.process_batch_with_quarantine(
+                                records
+                            )
+                        )
+                except Exception:
+                    log.exception(
+                        "Batch processing failed. Stopping task.",
+                        worker_id=worker_id,
+                        batch_size=len(records),
+                    )
+                    stop_event.set()
+                    return
+
+                in_flight.pop(worker_id, None)
+                processed_count += len(records) - quarantined
+                quarantined_count += quarantined
+                progress = {
+                    "processed": processed_count,
+                    "failed": 0,
+                    "quarantined": quarantined_count,
+                    "total": total_to_process,
+                }
+                if self.checkpointer:
+                    async with checkpoint_lock:
+                        await self.checkpointer.commit_batch(
+                            cursor=min(in_flight.values(), default=cursor),
+                            state=progress,
+                        )
+                await batch_progress_callback(progress)
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+
+        if self.checkpointer and not stop_event.is_set():
+            await self.checkpointer.complete()
+
+        failed_count = (
+            total_to_process - processed_count - quarantined_count
+            if stop_event.is_set()
+            else 0
+        )
+        log.info(
+            "Finished processing all batches.",
+            processed_count=processed_count,
+            quarantined_count=quarantined_count,
+            failed_count=failed_count,
+        )
         return {
             "processed": processed_count,
-            "failed": 0,
+            "failed": failed_count,
+            "quarantined": quarantined_count,
             "total": total_to_process,
         }
 
@@ -1,26 +1,80 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Tuple, cast
+import time
+from typing import Any, Dict, Iterable, List, Sequence, Tuple, cast
 
 import structlog
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import Artist, ExternalData, Label, Release, Track
+from app.db.models import Artist, Label, Release, Track
 from app.db.models.external_data import ExternalDataEntityType, ExternalDataProvider
 from app.repositories import (
     ArtistRepository,
+    ExternalDataQuarantineRepository,
     ExternalDataRepository,
     LabelRepository,
     ReleaseRepository,
+    TrackCatalogRepository,
     TrackRepository,
 )
+from app.repositories.advisory_locks import LockNamespace, lock_natural_keys
+from app.repositories.external_data import ExternalDataRow, external_data_key
+from app.services.beatport_batch import (
+    BeatportTrackBatch,
+    PayloadError,
+    ReleaseKey,
+    parse_beatport_tracks,
+    reading_payload,
+)
 
 log = structlog.get_logger(__name__)
 
 
+# SQLSTATE classes (and single codes) of database errors that the processed
+# records can cause: cardinality violations such as an upsert touching a row
+# twice (21), invalid values (22), constraint violations (23) and values too
+# large to index (54000). Every other database error - connection loss (08),
+# deadlocks and serialization failures (40), exhausted resources (53), lock
+# timeouts (55P03), cancelled statements (57) and the like - is a condition of
+# the server or of concurrent work, and retrying the same records later can
+# succeed.
+DATA_ERROR_SQLSTATES = ("21", "22", "23", "54000")
+
+
+def _sqlstate(error: DBAPIError) -> str | None:
+    """The SQLSTATE of a driver error, from asyncpg or psycopg2."""
+    for orig in (error.orig, getattr(error.orig, "__cause__", None)):
+        code = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+        if code:
+            return str(code)
+    return None
+
+
+def _is_data_error(error: Exception) -> bool:
+    """
+    Whether `error` may be caused by the records being processed, so that
+    bisecting the batch can isolate and quarantine them. Database errors count
+    only with a SQLSTATE in DATA_ERROR_SQLSTATES. On the Python side only a
+    PayloadError from reading the payloads does: any other exception, such as
+    an AttributeError from a bug in the processing code, would fail every
+    record alike and quarantine the whole backlog.
+    """
+    if isinstance(error, DBAPIError):
+        if error.connection_invalidated:
+            return False
+        sqlstate = _sqlstate(error)
+        return sqlstate is not None and sqlstate.startswith(DATA_ERROR_SQLSTATES)
+    return isinstance(error, PayloadError)
+
+
 class DataProcessingService:
     """Service to process external data in batches and create DB entities."""
 
+    # Whether process_batch reads `raw_data` from the records it is given.
+    # Callers skip loading the payloads for engines that do not.
+    loads_payload = True
+
     def __init__(
         self,
         db: AsyncSession,
@@ -29,6 +83,9 @@ class DataProcessingService:
         release_repo: ReleaseRepository,
         track_repo: TrackRepository,
         external_data_repo: ExternalDataRepository,
+        quarantine_repo: ExternalDataQuarantineRepository,
+        track_catalog_repo: TrackCatalogRepository,
+        lock_stripes: int = 0,
     ):
         self.db = db
         self.artist_repo = artist_repo
@@ -36,116 +93,110 @@ class DataProcessingService:
         self.release_repo = release_repo
         self.track_repo = track_repo
         self.external_data_repo = external_data_repo
+        self.quarantine_repo = quarantine_repo
+        self.track_catalog_repo = track_catalog_repo
+        # Number of advisory lock stripes per natural-key namespace; 0 disables
+        # advisory locking and relies on canonical write ordering alone.
+        self.lock_stripes = lock_stripes
+
+    async def _lock(self, namespace: LockNamespace, keys: Iterable[str]) -> None:
+        if self.lock_stripes:
+            await lock_natural_keys(self.db, namespace, keys, stripes=self.lock_stripes)
 
     async def _process_labels(
-        self, records: List[ExternalData]
+        self, batch: BeatportTrackBatch
     ) -> Tuple[Dict[str, Label], List[Dict[str, Any]]]:
-        label_data_map = {}
-        for r in records:
-            if (
-                r.raw_data
-                and (release_data := r.raw_data.get("release"))
-                and (label_info := release_data.get("label"))
-            ):
-                label_name = label_info["name"]
-                if label_name not in label_data_map:
-                    label_data_map[label_name] = label_info
-
-        if not label_data_map:
+        if not batch.labels:
             return {}, []
 
+        await self._lock(LockNamespace.LABEL, batch.labels)
         labels_map = await self.label_repo.bulk_get_or_create_by_name(
-            list(label_data_map.keys())
+            list(batch.labels.keys())
         )
 
         external_data_for_labels = []
         for name, label in labels_map.items():
-            label_info = label_data_map[name]
+            label_info = batch.labels[name]
+            with reading_payload():
+                external_id = str(label_info["id"])
             external_data_for_labels.append(
                 {
                     "provider": ExternalDataProvider.BEATPORT,
                     "entity_type": ExternalDataEntityType.LABEL,
                     "entity_id": label.id,
-                    "external_id": str(label_info["id"]),
+                    "external_id": external_id,
                     "raw_data": label_info,
                 }
             )
         return labels_map, external_data_for_labels
 
     async def _process_artists(
-        self, records: List[ExternalData]
+        self, batch: BeatportTrackBatch
     ) -> Tuple[Dict[str, Artist], List[Dict[str, Any]]]:
-        artist_data_map = {}
-        for r in records:
-            if r.raw_data and (artists_info := r.raw_data.get("artists")):
-                for artist_info in artists_info:
-                    artist_name = artist_info["name"]
-                    if artist_name not in artist_data_map:
-                        artist_data_map[artist_name] = artist_info
-
-        if not artist_data_map:
+        if not batch.artists:
             return {}, []
 
+        await self._lock(LockNamespace.ARTIST, batch.artists)
         artists_map = await self.artist_repo.bulk_get_or_create_by_name(
-            list(artist_data_map.keys())
+            list(batch.artists.keys())
         )
 
         external_data_for_artists = []
         for name, artist in artists_map.items():
-            artist_info = artist_data_map[name]
+            artist_info = batch.artists[name]
+            with reading_payload():
+                external_id = str(artist_info["id"])
             external_data_for_artists.append(
                 {
                     "provider": ExternalDataProvider.BEATPORT,
                     "entity_type": ExternalDataEntityType.ARTIST,
                     "entity_id": artist.id,
-                    "external_id": str(artist_info["id"]),
+                    "external_id": external_id,
                     "raw_data": artist_info,
                 }
             )
         return artists_map, external_data_for_artists
 
     async def _process_releases(
-        self, records: List[ExternalData], labels_map: Dict[str, Label]
-    ) -> Tuple[Dict[Tuple[str, int], Release], List[Dict[str, Any]]]:
+        self, batch: BeatportTrackBatch, labels_map: Dict[str, Label]
+    ) -> Tuple[Dict[ReleaseKey, Release], List[Dict[str, Any]]]:
+        """Returns releases keyed by (release name, label name)."""
         releases_to_create = []
-        release_data_map = {}
-
-        for r in records:
-            if not (r.raw_data and (release_data := r.raw_data.get("release"))):
-                continue
-            if not (label_data := release_data.get("label")):
-                continue
-            label = labels_map.get(label_data["name"])
-            if not label:
-                continue
-
-            release_key = (release_data["name"], label.id)
-            if release_key not in release_data_map:
-                release_data_map[release_key] = release_data
-                releases_to_create.append(
-                    {
-                        "name": release_data["name"],
-                        "label_id": label.id,
-                    }
-                )
+        for release_name, label_name in batch.releases:
+            label = labels_map.get(label_name)
+            if label:
+                releases_to_create.append({"name": release_name, "label_id": label.id})
 
         if not releases_to_create:
             return {}, []
 
-        releases_map_from_repo = await self.release_repo.bulk_get_or_create(
+        await self._lock(
+            LockNamespace.RELEASE,
+            (f"{r['name']}|{r['label_id']}" for r in releases_to_create),
+        )
+        releases_by_label_id = await self.release_repo.bulk_get_or_create(
             releases_to_create
         )
-        releases_map = cast(Dict[Tuple[str, int], Release], releases_map_from_repo)
 
+        releases_map: Dict[ReleaseKey, Release] = {}
         external_data_for_releases = []
-        for key, release in releases_map.items():
-            release_info = release_data_map[key]
+        for release_key, release_info in batch.releases.items():
+            release_name, label_name = release_key
+            label = labels_map.get(label_name)
+            if not label:
+                continue
+            release = releases_by_label_id.get((release_name, label.id))
+            if not release:
+                continue
+            releases_map[release_key] = release
+            with reading_payload():
+                external_id = str(release_info["id"])
             external_data_for_releases.append(
                 {
                     "provider": ExternalDataProvider.BEATPORT,
                     "entity_type": ExternalDataEntityType.RELEASE,
                     "entity_id": release.id,
-                    "external_id": str(release_info["id"]),
+                    "external_id": external_id,
                     "raw_data": release_info,
                 }
             )
@@ -153,59 +204,52 @@ class DataProcessingService:
 
     async def _process_tracks(
         self,
-        records: List[ExternalData],
+        batch: BeatportTrackBatch,
         artists_map: Dict[str, Artist],
-        labels_map: Dict[str, Label],
-        releases_map: Dict[Tuple[str, int], Release],
+        releases_map: Dict[ReleaseKey, Release],
     ) -> List[Dict[str, Any]]:
-        tracks_to_create = []
-        external_id_to_raw_data = {r.external_id: r.raw_data for r in records}
-
-        for r in records:
-            if not r.raw_data:
-                continue
+        tracks_to_create: List[Dict[str, Any]] = []
+        # The record of every track to create, for the external data.
+        track_records: List[ExternalDataRow] = []
 
-            release_data = r.raw_data.get("release")
-            if not release_data or not release_data.get("label"):
-                continue
-
-            label = labels_map.get(release_data["label"]["name"])
-            if not label:
-                continue
-
-            release_key = (release_data["name"], label.id)
+        for record, release_key in zip(batch.tracks, batch.release_keys, strict=True):
             release = releases_map.get(release_key)
             if not release:
                 continue
 
-            artist_ids = [
-                artists_map[artist["name"]].id
-                for artist in r.raw_data.get("artists", [])
-                if artist["name"] in artists_map
-            ]
-
-            tracks_to_create.append(
-                {
-                    "name": r.raw_data["name"],
-                    "duration_ms": r.raw_data.get("length_ms"),
-                    "bpm": r.raw_data.get("bpm"),
-                    "key": r.raw_data.get("key", {}).get("name"),
-                    "isrc": r.raw_data.get("isrc"),
-                    "release_id": release.id,
-                    "artist_ids": artist_ids,
-                    "external_id": r.external_id,
-                }
-            )
+            # The batch only keeps records that have a payload.
+            raw_data = cast(Dict[str, Any], record.raw_data)
+            with reading_payload():
+                tracks_to_create.append(
+                    {
+                        "name": raw_data["name"],
+                        "duration_ms": raw_data.get("length_ms"),
+                        "bpm": raw_data.get("bpm"),
+                        "key": raw_data.get("key", {}).get("name"),
+                        "isrc": raw_data.get("isrc"),
+                        "release_id": release.id,
+                        "artist_ids": [
+                            artists_map[artist_info["name"]].id
+                            for artist_info in raw_data.get("artists") or ()
+                            if artist_info["name"] in artists_map
+                        ],
+                    }
+                )
+            track_records.append(record)
 
         if not tracks_to_create:
             return []
 
+        await self._lock(
+            LockNamespace.TRACK,
+            (f"{t['name']}|{t['release_id']}|{t['isrc']}" for t in tracks_to_create),
+        )
         tracks_map: Dict[Tuple[str, int, str | None], Track] = (
             await self.track_repo.bulk_get_or_create_with_relations(tracks_to_create)
         )
 
         external_data_for_tracks = []
-        for track_data in tracks_to_create:
+        for track_data, record in zip(tracks_to_create, track_records, strict=True):
             track_key = (
                 track_data["name"],
                 track_data["release_id"],
@@ -218,47 +262,96 @@ class DataProcessingService:
                 )
                 continue
 
-            external_id = track_data["external_id"]
             external_data_for_tracks.append(
                 {
                     "provider": ExternalDataProvider.BEATPORT,
                     "entity_type": ExternalDataEntityType.TRACK,
                     "entity_id": fetched_track.id,
-                    "external_id": external_id,
-                    "raw_data": external_id_to_raw_data[external_id],
+                    "external_id": record.external_id,
+                    "raw_data": record.raw_data,
                 }
             )
 
         return external_data_for_tracks
 
-    async def process_batch(self, records: List[ExternalData]) -> None:
+    async def process_batch(self, records: Sequence[ExternalDataRow]) -> None:
         if not records:
             return
 
-        try:
-            all_external_data_to_upsert = []
+        start_time = time.perf_counter()
+        all_external_data_to_upsert = []
+        batch = parse_beatport_tracks(records)
 
-            labels_map, ext_data_labels = await self._process_labels(records)
-            all_external_data_to_upsert.extend(ext_data_labels)
+        labels_map, ext_data_labels = await self._process_labels(batch)
+        all_external_data_to_upsert.extend(ext_data_labels)
 
-            artists_map, ext_data_artists = await self._process_artists(records)
-            all_external_data_to_upsert.extend(ext_data_artists)
+        artists_map, ext_data_artists = await self._process_artists(batch)
+        all_external_data_to_upsert.extend(ext_data_artists)
 
-            releases_map, ext_data_releases = await self._process_releases(
-                records, labels_map
-            )
-            all_external_data_to_upsert.extend(ext_data_releases)
+        releases_map, ext_data_releases = await self._process_releases(
+            batch, labels_map
+        )
+        all_external_data_to_upsert.extend(ext_data_releases)
+
+        ext_data_tracks = await self._process_tracks(batch, artists_map, releases_map)
+        all_external_data_to_upsert.extend(ext_data_tracks)
 
-            ext_data_tracks = await self._process_tracks(
-                records, artists_map, labels_map, releases_map
+        if all_external_data_to_upsert:
+            await self._lock(
+                LockNamespace.EXTERNAL_DATA,
+                ("|".join(external_data_key(r)) for r in all_external_data_to_upsert),
             )
-            all_external_data_to_upsert.extend(ext_data_tracks)
+            await self.external_data_repo.bulk_upsert(all_external_data_to_upsert)
+        await self.track_catalog_repo.refresh([r["entity_id"] for r in ext_data_tracks])
 
-            if all_external_data_to_upsert:
-                await self.external_data_repo.bulk_upsert(all_external_data_to_upsert)
+        log.info(
+            "Successfully processed batch of tracks",
+            count=len(records),
+            duration_ms=round((time.perf_counter() - start_time) * 1000),
+        )
 
-            log.info("Successfully processed batch of tracks", count=len(records))
+    async def process_batch_with_quarantine(
+        self, records: Sequence[ExternalDataRow]
+    ) -> int:
+        """
+        Processes `records`, quarantining the ones that make processing fail.
+
+        The batch runs in a savepoint. If it fails with an error the data can
+        cause (see `_is_data_error`), it is split in halves that are retried the
+        same way until the failing records are isolated, so all healthy records
+        are still processed. Any other error is re-raised at once, without
+        quarantining anything, so that a later run retries the records.
+        Returns the number of quarantined records.
+        """
+        failures: List[Tuple[ExternalDataRow, Exception]] = []
+        await self._process_bisecting(records, failures)
+        for record, error in failures:
+            log.error(
+                "Quarantining record that failed processing",
+                external_data_id=record.id,
+                external_id=record.external_id,
+                error=str(error),
+            )
+            await self.quarantine_repo.quarantine(
+                external_data_id=record.id, error=f"{type(error).__name__}: {error}"
+            )
+        return len(failures)
 
+    async def _process_bisecting(
+        self,
+        records: Sequence[ExternalDataRow],
+        failures: List[Tuple[ExternalDataRow, Exception]],
+    ) -> None:
+        try:
+            async with self.db.begin_nested():
+                await self.process_batch(records)
         except Exception as e:
-            log.error("Failed to process batch", error=str(e), count=len(records))
-            raise
+            if not _is_data_error(e):
+                raise
+            if len(records) == 1:
+                failures.append((records[0], e))
+                return
+            log.debug("Bisecting failed batch", count=len(records), error=str(e))
+            middle = len(records) // 2
+            await self._process_bisecting(records[:middle], failures)
+            await self._process_bisecting(records[middle:], failures)
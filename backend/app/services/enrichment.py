@@ -1,18 +1,25 @@
 from __future__ import annotations
 
-import uuid
-from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+from datetime import timedelta
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Sequence,
+    Tuple,
+)
 
 import httpx
 import structlog
-from rapidfuzz import fuzz, process
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.clients.spotify import SpotifyAPIClient
-from app.core.constants import (
-    ARTIST_FUZZY_MATCH_THRESHOLD,
-    SPOTIFY_NOT_FOUND_PREFIX,
-)
+from app.core.constants import ARTIST_FUZZY_MATCH_THRESHOLD
 from app.core.settings import settings
 from app.db.models.artist import Artist as ArtistModel
 from app.db.models.external_data import (
@@ -22,14 +29,34 @@ from app.db.models.external_data import (
 from app.db.models.track import Track
 from app.repositories import (
     ArtistRepository,
+    EnrichmentAttemptRepository,
     ExternalDataRepository,
+    TrackCatalogRepository,
     TrackRepository,
 )
-from app.schemas.track import TrackWithSpotifyData
+from app.services.checkpoint import BatchCheckpointer
+from app.services.fuzzy_matching import best_pair_in_groups
+from app.services.pipeline import run_pipeline
+from app.services.session_recycling import SessionRecycler
 
 log = structlog.get_logger(__name__)
 
 
+def prune_payload(payload: Dict[str, Any], paths: Iterable[str]) -> Dict[str, Any]:
+    """
+    Removes the values at the given dotted paths, e.g. "album.images", from
+    `payload` in place and returns it. Paths that are not present are ignored.
+    """
+    for path in paths:
+        *parents, leaf = path.split(".")
+        node: Any = payload
+        for key in parents:
+            node = node.get(key) if isinstance(node, dict) else None
+        if isinstance(node, dict):
+            node.pop(leaf, None)
+    return payload
+
+
 class EnrichmentService:
     """Service for enriching data from external sources like Spotify."""
 
@@ -39,112 +66,215 @@ class EnrichmentService:
         artist_repo: ArtistRepository,
         track_repo: TrackRepository,
         external_data_repo: ExternalDataRepository,
+        attempt_repo: EnrichmentAttemptRepository,
+        track_catalog_repo: TrackCatalogRepository,
+        checkpointer: BatchCheckpointer | None = None,
+        session_recycler: SessionRecycler | None = None,
     ):
         self.db = db
         self.artist_repo = artist_repo
         self.track_repo = track_repo
         self.external_data_repo = external_data_repo
+        self.attempt_repo = attempt_repo
+        self.track_catalog_repo = track_catalog_repo
+        self.checkpointer = checkpointer
+        self.session_recycler = session_recycler
 
-    def _validate_spotify_search_result(
+    async def _record_attempts(
+        self,
+        entity_type: ExternalDataEntityType,
+        *,
+        failures: Dict[int, str],
+        linked_ids: List[int],
+    ) -> None:
+        """
+        Schedules the retry of entities that failed to match, with their failure
+        status, and forgets earlier failures of the entities now linked.
+        """
+        await self.attempt_repo.record_failures(
+            provider=ExternalDataProvider.SPOTIFY,
+            entity_type=entity_type,
+            statuses=failures,
+            base_delay=timedelta(hours=settings.ENRICHMENT_RETRY_BASE_DELAY_HOURS),
+            max_delay=timedelta(days=settings.ENRICHMENT_RETRY_MAX_DELAY_DAYS),
+        )
+        await self.attempt_repo.clear(
+            provider=ExternalDataProvider.SPOTIFY,
+            entity_type=entity_type,
+            entity_ids=linked_ids,
+        )
+
+    async def plan_shards(
+        self, entity_type: ExternalDataEntityType, shards: int
+    ) -> List[Tuple[int, int | None, int]]:
+        """
+        Splits the tracks or artists still missing a Spotify link into at most
+        `shards` id ranges of about equal size, to enrich independently. Returns
+        (after_id, until_id, size) per range. The last range has no upper bound,
+        so it also covers entities created after planning.
+        """
+        repo = (
+            self.track_repo
+            if entity_type == ExternalDataEntityType.TRACK
+            else self.artist_repo
+        )
+        bounds = await repo.get_missing_spotify_link_shard_bounds(shards=shards)
+        after_id = 0
+        plan: List[Tuple[int, int | None, int]] = []
+        for index, (last_id, size) in enumerate(bounds):
+            until_id = last_id if index < len(bounds) - 1 else None
+            plan.append((after_id, until_id, size))
+            after_id = last_id
+        return plan
+
+    def _validate_spotify_search_results(
         self,
-        track: Track,
-        spotify_result: Dict[str, Any] | None,
+        search_results: Sequence[Tuple[Track, Dict[str, Any] | None]],
         similarity_threshold: int = 80,
-    ) -> bool:
+    ) -> List[bool]:
         """
-        Validate Spotify search result by matching at least one artist name
-        using fuzzy matching.
+        Validates Spotify search results by fuzzy matching at least one artist
+        name of each track. Every artist pair of the batch is scored at once.
         """
-        if not spotify_result:
-            log.warning("No Spotify result found", track_isrc=track.isrc)
-            return False
-
-        local_artists_names = [artist.name.lower() for artist in track.artists]
-        spotify_artists_names = [
-            artist["name"].lower() for artist in spotify_result.get("artists", [])
-        ]
-
-        if not spotify_artists_names:
-            log.warning(
-                "No artists found in Spotify result",
-                track_isrc=track.isrc,
-                spotify_result=spotify_result,
-            )
-            return False
-
-        for local_artist in local_artists_names:
-            best_match = process.extractOne(
-                local_artist,
-                spotify_artists_names,
-                scorer=fuzz.ratio,
-                score_cutoff=similarity_threshold,
-            )
-            if best_match:
-                return True
-
-        log.warning(
-            "No matching artist found for track",
-            track_isrc=track.isrc,
-            local_artists=local_artists_names,
-            spotify_artists=spotify_artists_names,
+        queries: List[str] = []
+        choices: List[str] = []
+        offsets = [0]
+        artist_names: List[Tuple[List[str], List[str]]] = []
+        for track, spotify_result in search_results:
+            local_artists_names = [artist.name.lower() for artist in track.artists]
+            spotify_artists_names = [
+                artist["name"].lower()
+                for artist in (spotify_result or {}).get("artists", [])
+            ]
+            if not spotify_result:
+                log.warning("No Spotify result found", track_isrc=track.isrc)
+            elif not spotify_artists_names:
+                log.warning(
+                    "No artists found in Spotify result",
+                    track_isrc=track.isrc,
+                    spotify_result=spotify_result,
+                )
+            else:
+                for local_artist in local_artists_names:
+                    queries.extend([local_artist] * len(spotify_artists_names))
+                    choices.extend(spotify_artists_names)
+            offsets.append(len(queries))
+            artist_names.append((local_artists_names, spotify_artists_names))
+
+        matches = best_pair_in_groups(
+            queries,
+            choices,
+            offsets,
+            score_cutoff=similarity_threshold,
+            workers=settings.FUZZY_MATCH_WORKERS,
         )
-        return False
+
+        validations = []
+        for (track, spotify_result), (local_names, spotify_names), match in zip(
+            search_results, artist_names, matches, strict=True
+        ):
+            if spotify_result and spotify_names and match is None:
+                log.warning(
+                    "No matching artist found for track",
+                    track_isrc=track.isrc,
+                    local_artists=local_names,
+                    spotify_artists=spotify_names,
+                )
+            validations.append(match is not None)
+        return validations
 
     async def enrich_tracks_with_spotify_data(
         self,
         progress_callback: Callable[[Dict[str, Any]], Awaitable[None]],
         similarity_threshold: int,
+        *,
+        after_id: int = 0,
+        until_id: int | None = None,
     ) -> Dict[str, Any]:
         """
         Finds tracks with ISRC but no Spotify link, searches for them on Spotify,
-        and persists the results (found or not found) as ExternalData records.
+        and persists matches as ExternalData records. Tracks that are not found
+        are recorded as enrichment attempts and retried after a backoff.
+        Only track ids in (after_id, until_id] are visited, see `plan_shards`.
+        With a checkpointer, every batch is committed and a restarted run resumes
+        after the last committed track.
         """
-        total_tracks = -1
-        processed_count = 0
-        found_count = 0
-        not_found_count = 0
+        last_id, state = (
+            await self.checkpointer.load() if self.checkpointer else (0, {})
+        )
+        last_id = max(last_id, after_id)
+        processed_count = state.get("processed", 0)
+        found_count = state.get("found", 0)
+        not_found_count = state.get("not_found", 0)
+
+        # The total is computed once; each batch is then an O(batch) keyset read.
+        total_tracks = (
+            processed_count
+            + await self.track_repo.count_tracks_missing_spotify_link(
+                after_id=last_id, until_id=until_id
+            )
+        )
+        log.info("Starting Spotify enrichment", total_tracks=total_tracks)
+        if total_tracks == 0:
+            await progress_callback(
+                {"processed": 0, "total": 0, "found": 0, "not_found": 0}
+            )
 
-        async with httpx.AsyncClient() as http_client:
-            spotify_client = SpotifyAPIClient(client=http_client)
+        # The stages share the session, which must not be used concurrently.
+        db_lock = asyncio.Lock()
 
+        async def read_batches() -> AsyncIterator[List[Track]]:
+            after_id = last_id
             while True:
-                tracks, total = await self.track_repo.get_tracks_missing_spotify_link(
-                    offset=0, limit=settings.SPOTIFY_SEARCH_BATCH_SIZE
-                )
-
-                if total_tracks == -1:
-                    total_tracks = total
-                    log.info("Starting Spotify enrichment", total_tracks=total_tracks)
-                    if total_tracks == 0:
-                        await progress_callback(
-                            {"processed": 0, "total": 0, "found": 0, "not_found": 0}
-                        )
-                        break
-
-                if not tracks:
-                    break
-
-                track_search_results: List[
-                    Tuple[Track, Dict[str, Any] | None, bool]
-                ] = []
-                for track in tracks:
-                    if not track.isrc:
-                        track_search_results.append((track, None, False))
-                        continue
-
-                    spotify_result = await spotify_client.search_track_by_isrc(
-                        track.isrc
-                    )
-                    is_valid_match = self._validate_spotify_search_result(
-                        track, spotify_result, similarity_threshold
+                async with db_lock:
+                    tracks = await self.track_repo.get_tracks_missing_spotify_link(
+                        after_id=after_id,
+                        limit=settings.SPOTIFY_SEARCH_BATCH_SIZE,
+                        until_id=until_id,
                     )
-                    track_search_results.append((track, spotify_result, is_valid_match))
-
-                matched_ids = [
-                    result["id"]
-                    for _, result, is_valid in track_search_results
-                    if result and is_valid and result.get("id")
-                ]
+                if not tracks:
+                    return
+                after_id = tracks[-1].id
+                yield tracks
+
+        async def search(
+            tracks: List[Track],
+        ) -> List[Tuple[Track, Dict[str, Any] | None]]:
+            search_results: List[Tuple[Track, Dict[str, Any] | None]] = []
+            for track in tracks:
+                spotify_result = (
+                    await spotify_client.search_track_by_isrc(track.isrc)
+                    if track.isrc
+                    else None
+                )
+                search_results.append((track, spotify_result))
+            return search_results
+
+        async def match(
+            search_results: List[Tuple[Track, Dict[str, Any] | None]],
+        ) -> List[Tuple[Track, Dict[str, Any] | None, bool]]:
+            validations = self._validate_spotify_search_results(
+                search_results, similarity_threshold
+            )
+            return [
+                (track, spotify_result, is_valid)
+                for (track, spotify_result), is_valid in zip(
+                    search_results, validations, strict=True
+                )
+            ]
+
+        async def write(
+            track_search_results: List[Tuple[Track, Dict[str, Any] | None, bool]],
+        ) -> None:
+            nonlocal processed_count, found_count, not_found_count
+            matched_ids = [
+                result["id"]
+                for _, result, is_valid in track_search_results
+                if result and is_valid and result.get("id")
+            ]
+            async with db_lock:
+                # Looked up here rather than in an earlier stage, so that the
+                # links written by the previous batch are visible.
                 existing_links = (
                     await self.external_data_repo.get_existing_spotify_links(
                         entity_type=ExternalDataEntityType.TRACK,
@@ -154,6 +284,7 @@ class EnrichmentService:
 
                 batch_assigned_ids: set[str] = set()
                 records_to_upsert: List[Dict[str, Any]] = []
+                failures: Dict[int, str] = {}
                 for track, spotify_result, is_valid in track_search_results:
                     if (
                         not spotify_result
@@ -161,33 +292,16 @@ class EnrichmentService:
                         or not spotify_result.get("id")
                     ):
                         not_found_count += 1
-                        reason = (
-                            {"status": "missing_isrc"}
-                            if not track.isrc
-                            else {"status": "not_found_by_isrc"}
-                        )
-                        records_to_upsert.append(
-                            {
-                                "provider": ExternalDataProvider.SPOTIFY,
-                                "entity_type": ExternalDataEntityType.TRACK,
-                                "entity_id": track.id,
-                                "external_id": (
-                                    f"{SPOTIFY_NOT_FOUND_PREFIX}{track.id}_{uuid.uuid4()}"
-                                ),
-                                "raw_data": reason,
-                            }
+                        failures[track.id] = (
+                            "missing_isrc" if not track.isrc else "not_found_by_isrc"
                         )
                         continue
 
                     spotify_id = spotify_result["id"]
-                    duplicate_reason: Dict[str, Any] | None = None
+                    duplicate_reason: str | None = None
                     existing_entity_id = existing_links.get(spotify_id)
                     if existing_entity_id and existing_entity_id != track.id:
-                        duplicate_reason = {
-                            "status": "duplicate_spotify_track_existing_link",
-                            "spotify_id": spotify_id,
-                            "linked_track_id": existing_entity_id,
-                        }
+                        duplicate_reason = "duplicate_spotify_track_existing_link"
                         log.warning(
                             "Skipping Spotify track already linked",
                             track_id=track.id,
@@ -195,10 +309,7 @@ class EnrichmentService:
                             linked_track_id=existing_entity_id,
                         )
                     elif spotify_id in batch_assigned_ids:
-                        duplicate_reason = {
-                            "status": "duplicate_spotify_track_in_batch",
-                            "spotify_id": spotify_id,
-                        }
+                        duplicate_reason = "duplicate_spotify_track_in_batch"
                         log.warning(
                             "Skipping duplicate Spotify track in batch",
                             track_id=track.id,
@@ -207,17 +318,7 @@ class EnrichmentService:
 
                     if duplicate_reason:
                         not_found_count += 1
-                        records_to_upsert.append(
-                            {
-                                "provider": ExternalDataProvider.SPOTIFY,
-                                "entity_type": ExternalDataEntityType.TRACK,
-                                "entity_id": track.id,
-                                "external_id": (
-                                    f"{SPOTIFY_NOT_FOUND_PREFIX}{track.id}_{uuid.uuid4()}"
-                                ),
-                                "raw_data": duplicate_reason,
-                            }
-                        )
+                        failures[track.id] = duplicate_reason
                         continue
 
                     batch_assigned_ids.add(spotify_id)
@@ -228,23 +329,54 @@ class EnrichmentService:
                             "entity_type": ExternalDataEntityType.TRACK,
                             "entity_id": track.id,
                             "external_id": spotify_id,
-                            "raw_data": spotify_result,
+                            "raw_data": prune_payload(
+                                spotify_result,
+                                settings.SPOTIFY_TRACK_PAYLOAD_PRUNE_PATHS,
+                            ),
                         }
                     )
 
                 if records_to_upsert:
                     await self.external_data_repo.bulk_upsert(records_to_upsert)
+                    await self.track_repo.set_spotify_ids(
+                        {r["entity_id"]: r["external_id"] for r in records_to_upsert}
+                    )
+                    await self.track_catalog_repo.refresh(
+                        [r["entity_id"] for r in records_to_upsert]
+                    )
+                await self._record_attempts(
+                    ExternalDataEntityType.TRACK,
+                    failures=failures,
+                    linked_ids=[r["entity_id"] for r in records_to_upsert],
+                )
 
-                processed_count += len(tracks)
-                await progress_callback(
-                    {
-                        "processed": processed_count,
-                        "total": total_tracks,
-                        "found": found_count,
-                        "not_found": not_found_count,
-                    }
+                processed_count += len(track_search_results)
+                progress = {
+                    "processed": processed_count,
+                    "total": total_tracks,
+                    "found": found_count,
+                    "not_found": not_found_count,
+                }
+                if self.checkpointer:
+                    await self.checkpointer.commit_batch(
+                        cursor=track_search_results[-1][0].id, state=progress
+                    )
+                if self.session_recycler:
+                    await self.session_recycler.batch_done()
+            await progress_callback(progress)
+
+        async with httpx.AsyncClient() as http_client:
+            spotify_client = SpotifyAPIClient(client=http_client)
+            if total_tracks > 0:
+                await run_pipeline(
+                    read_batches(),
+                    [search, match, write],
+                    maxsize=settings.ENRICHMENT_PIPELINE_DEPTH,
                 )
 
+        if self.checkpointer:
+            await self.checkpointer.complete()
+
         log.info(
             "Finished Spotify enrichment",
             processed=processed_count,
@@ -258,41 +390,43 @@ class EnrichmentService:
             "not_found": not_found_count,
         }
 
-    def _get_spotify_artist_candidates(
+    def _match_spotify_artists(
         self,
-        artist: ArtistModel,
-        artist_id_to_tracks: Dict[int, List[TrackWithSpotifyData]],
-    ) -> Dict[str, str]:
-        """Collects potential Spotify artist candidates from an artist's tracks."""
-        candidates: Dict[str, str] = {}
-        for track in artist_id_to_tracks.get(artist.id, []):
-            for ext_data in track.external_data:
-                if ext_data.raw_data:
-                    for sp_artist in ext_data.raw_data.get("artists", []):
-                        if sp_artist.get("id") and sp_artist.get("name"):
-                            candidates[sp_artist["id"]] = sp_artist["name"]
-        return candidates
-
-    def _find_best_match_artist(
-        self, artist_name: str, candidates: Dict[str, str]
-    ) -> Optional[str]:
-        """Finds the best matching Spotify artist ID using fuzzy matching."""
-        if not candidates:
-            return None
-
-        best_match = process.extractOne(
-            artist_name,
-            list(candidates.values()),
-            scorer=fuzz.ratio,
+        artists: Sequence[ArtistModel],
+        candidate_rows: Iterable[Tuple[int, str, str]],
+    ) -> Dict[int, str | None]:
+        """
+        Finds the best matching Spotify artist ID of every artist by fuzzy
+        matching its name against the Spotify artists of its tracks, scoring the
+        whole batch at once. Maps artist IDs to the matched Spotify ID, or None.
+        """
+        candidates: Dict[int, Dict[str, str]] = {artist.id: {} for artist in artists}
+        for artist_id, spotify_id, spotify_name in candidate_rows:
+            if artist_id in candidates:
+                candidates[artist_id][spotify_id] = spotify_name
+
+        names: List[str] = []
+        candidate_names: List[str] = []
+        candidate_ids: List[str] = []
+        offsets = [0]
+        for artist in artists:
+            artist_candidates = candidates[artist.id]
+            names.extend([artist.name] * len(artist_candidates))
+            candidate_names.extend(artist_candidates.values())
+            candidate_ids.extend(artist_candidates.keys())
+            offsets.append(len(names))
+
+        matches = best_pair_in_groups(
+            names,
+            candidate_names,
+            offsets,
             score_cutoff=ARTIST_FUZZY_MATCH_THRESHOLD,
+            workers=settings.FUZZY_MATCH_WORKERS,
         )
-
-        if best_match:
-            matched_name = best_match[0]
-            for sid, sname in candidates.items():
-                if sname == matched_name:
-                    return sid
-        return None
+        return {
+            artist.id: None if match is None else candidate_ids[offset + match]
+            for artist, offset, match in zip(artists, offsets, matches, strict=False)
+        }
 
     async def _fetch_spotify_artist_details(
         self, spotify_client: SpotifyAPIClient, artist_ids: List[str]
@@ -308,86 +442,104 @@ class EnrichmentService:
     async def enrich_artists_with_spotify_data(
         self,
         progress_callback: Callable[[Dict[str, Any]], Awaitable[None]],
+        *,
+        after_id: int = 0,
+        until_id: int | None = None,
     ) -> Dict[str, Any]:
         """
         Finds artists without a Spotify link, matches them using associated track data,
-        and persists the results.
+        and persists the matches; unmatched artists are retried after a backoff.
+        Only artist ids in (after_id, until_id] are visited, see `plan_shards`.
+        With a checkpointer, every batch is committed and a restarted run
+        resumes after the last committed artist.
         """
-        total_artists = -1
-        processed_count = 0
-        found_count = 0
-        not_found_count = 0
+        last_id, state = (
+            await self.checkpointer.load() if self.checkpointer else (0, {})
+        )
+        last_id = max(last_id, after_id)
+        processed_count = state.get("processed", 0)
+        found_count = state.get("found", 0)
+        not_found_count = state.get("not_found", 0)
+
+        # The total is computed once; each batch is then an O(batch) keyset read.
+        total_artists = (
+            processed_count
+            + await self.artist_repo.count_artists_missing_spotify_link(
+                after_id=last_id, until_id=until_id
+            )
+        )
+        log.info("Starting Spotify artist enrichment", total_artists=total_artists)
+        if total_artists == 0:
+            await progress_callback(
+                {"processed": 0, "total": 0, "found": 0, "not_found": 0}
+            )
 
-        async with httpx.AsyncClient() as http_client:
-            spotify_client = SpotifyAPIClient(client=http_client)
+        # The stages share the session, which must not be used concurrently.
+        db_lock = asyncio.Lock()
 
+        async def read_batches() -> (
+            AsyncIterator[Tuple[List[ArtistModel], List[Tuple[int, str, str]]]]
+        ):
+            after_id = last_id
             while True:
-                artists: List[ArtistModel]
-                (
-                    artists,
-                    total,
-                ) = await self.artist_repo.get_artists_missing_spotify_link(
-                    offset=0, limit=settings.SPOTIFY_SEARCH_BATCH_SIZE
-                )
-
-                if total_artists == -1:
-                    total_artists = total
-                    log.info(
-                        "Starting Spotify artist enrichment",
-                        total_artists=total_artists,
+                async with db_lock:
+                    artists = await self.artist_repo.get_artists_missing_spotify_link(
+                        after_id=after_id,
+                        limit=settings.SPOTIFY_SEARCH_BATCH_SIZE,
+                        until_id=until_id,
                     )
-                    if total_artists == 0:
-                        await progress_callback(
-                            {"processed": 0, "total": 0, "found": 0, "not_found": 0}
+                    if not artists:
+                        return
+                    candidate_rows = (
+                        await self.track_repo.get_spotify_artist_candidates(
+                            artist_ids=[artist.id for artist in artists]
                         )
-                        break
-
-                if not artists:
-                    break
-
-                artist_ids = [artist.id for artist in artists]
-                tracks = (
-                    await self.track_repo.get_tracks_by_artist_ids_with_spotify_data(
-                        artist_ids=artist_ids
                     )
-                )
-
-                artist_id_to_tracks: Dict[int, List[TrackWithSpotifyData]] = {
-                    aid: [] for aid in artist_ids
-                }
-                for track in tracks:
-                    for artist in track.artists:
-                        if artist.id in artist_id_to_tracks:
-                            artist_id_to_tracks[artist.id].append(track)
-
-                artist_match_results: Dict[int, str | None] = {}
-                for db_artist in artists:
-                    candidates = self._get_spotify_artist_candidates(
-                        db_artist, artist_id_to_tracks
-                    )
-                    best_match_id = self._find_best_match_artist(
-                        db_artist.name, candidates
-                    )
-                    artist_match_results[db_artist.id] = best_match_id
-
-                matched_ids = [
-                    sid for sid in artist_match_results.values() if sid is not None
-                ]
+                after_id = artists[-1].id
+                yield artists, candidate_rows
+
+        async def match(
+            batch: Tuple[List[ArtistModel], List[Tuple[int, str, str]]],
+        ) -> Tuple[List[ArtistModel], Dict[int, str | None]]:
+            artists, candidate_rows = batch
+            return artists, self._match_spotify_artists(artists, candidate_rows)
+
+        async def fetch_details(
+            batch: Tuple[List[ArtistModel], Dict[int, str | None]],
+        ) -> Tuple[List[ArtistModel], Dict[int, str | None], Dict[str, Dict]]:
+            artists, artist_match_results = batch
+            matched_ids = [
+                sid for sid in artist_match_results.values() if sid is not None
+            ]
+            spotify_details = await self._fetch_spotify_artist_details(
+                spotify_client, matched_ids
+            )
+            return artists, artist_match_results, spotify_details
+
+        async def write(
+            batch: Tuple[List[ArtistModel], Dict[int, str | None], Dict[str, Dict]],
+        ) -> None:
+            nonlocal processed_count, found_count, not_found_count
+            artists, artist_match_results, spotify_details = batch
+            matched_ids = [
+                sid for sid in artist_match_results.values() if sid is not None
+            ]
+            async with db_lock:
+                # Looked up here rather than in an earlier stage, so that the
+                # links written by the previous batch are visible.
                 existing_links = (
                     await self.external_data_repo.get_existing_spotify_links(
                         entity_type=ExternalDataEntityType.ARTIST,
                         external_ids=matched_ids,
                     )
                 )
-                spotify_details = await self._fetch_spotify_artist_details(
-                    spotify_client, matched_ids
-                )
 
                 records_to_upsert: List[Dict[str, Any]] = []
+                failures: Dict[int, str] = {}
                 assigned_spotify_ids: set[str] = set()
                 for db_artist in artists:
                     spotify_id = artist_match_results.get(db_artist.id)
-                    duplicate_reason: Dict[str, Any] | None = None
+                    duplicate_reason: str | None = None
                     spotify_payload = (
                         spotify_details.get(spotify_id) if spotify_id else None
                     )
@@ -395,11 +547,7 @@ class EnrichmentService:
                     if spotify_id:
                         existing_entity_id = existing_links.get(spotify_id)
                         if existing_entity_id and existing_entity_id != db_artist.id:
-                            duplicate_reason = {
-                                "status": "duplicate_spotify_artist_existing_link",
-                                "spotify_id": spotify_id,
-                                "linked_artist_id": existing_entity_id,
-                            }
+                            duplicate_reason = "duplicate_spotify_artist_existing_link"
                             log.warning(
                                 "Skipping Spotify artist already linked",
                                 artist_id=db_artist.id,
@@ -407,20 +555,14 @@ class EnrichmentService:
                                 linked_artist_id=existing_entity_id,
                             )
                         elif spotify_id in assigned_spotify_ids:
-                            duplicate_reason = {
-                                "status": "duplicate_spotify_artist_in_batch",
-                                "spotify_id": spotify_id,
-                            }
+                            duplicate_reason = "duplicate_spotify_artist_in_batch"
                             log.warning(
                                 "Skipping duplicate Spotify artist in batch",
                                 artist_id=db_artist.id,
                                 spotify_id=spotify_id,
                             )
                         elif not spotify_payload:
-                            duplicate_reason = {
-                                "status": "spotify_artist_details_missing",
-                                "spotify_id": spotify_id,
-                            }
+                            duplicate_reason = "spotify_artist_details_missing"
 
                     if spotify_id and not duplicate_reason and spotify_payload:
                         assigned_spotify_ids.add(spotify_id)
@@ -431,40 +573,57 @@ class EnrichmentService:
                                 "entity_type": ExternalDataEntityType.ARTIST,
                                 "entity_id": db_artist.id,
                                 "external_id": spotify_id,
-                                "raw_data": spotify_payload,
+                                "raw_data": prune_payload(
+                                    spotify_payload,
+                                    settings.SPOTIFY_ARTIST_PAYLOAD_PRUNE_PATHS,
+                                ),
                             }
                         )
                         continue
 
                     not_found_count += 1
-                    raw_status = duplicate_reason or {
-                        "status": "not_found_by_fuzzy_match"
-                    }
-                    records_to_upsert.append(
-                        {
-                            "provider": ExternalDataProvider.SPOTIFY,
-                            "entity_type": ExternalDataEntityType.ARTIST,
-                            "entity_id": db_artist.id,
-                            "external_id": (
-                                f"{SPOTIFY_NOT_FOUND_PREFIX}{db_artist.id}_{uuid.uuid4()}"
-                            ),
-                            "raw_data": raw_status,
-                        }
+                    failures[db_artist.id] = (
+                        duplicate_reason or "not_found_by_fuzzy_match"
                     )
 
                 if records_to_upsert:
                     await self.external_data_repo.bulk_upsert(records_to_upsert)
+                    await self.artist_repo.set_spotify_ids(
+                        {r["entity_id"]: r["external_id"] for r in records_to_upsert}
+                    )
+                await self._record_attempts(
+                    ExternalDataEntityType.ARTIST,
+                    failures=failures,
+                    linked_ids=[r["entity_id"] for r in records_to_upsert],
+                )
 
                 processed_count += len(artists)
-                await progress_callback(
-                    {
-                        "processed": processed_count,
-                        "total": total_artists,
-                        "found": found_count,
-                        "not_found": not_found_count,
-                    }
+                progress = {
+                    "processed": processed_count,
+                    "total": total_artists,
+                    "found": found_count,
+                    "not_found": not_found_count,
+                }
+                if self.checkpointer:
+                    await self.checkpointer.commit_batch(
+                        cursor=artists[-1].id, state=progress
+                    )
+                if self.session_recycler:
+                    await self.session_recycler.batch_done()
+            await progress_callback(progress)
+
+        async with httpx.AsyncClient() as http_client:
+            spotify_client = SpotifyAPIClient(client=http_client)
+            if total_artists > 0:
+                await run_pipeline(
+                    read_batches(),
+                    [match, fetch_details, write],
+                    maxsize=settings.ENRICHMENT_PIPELINE_DEPTH,
                 )
 
+        if self.checkpointer:
+            await self.checkpointer.complete()
+
         log.info(
             "Finished Spotify artist enrichment",
             processed=processed_count,
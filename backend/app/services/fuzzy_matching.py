@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from typing import List, Sequence
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+
+def best_pair_in_groups(
+    queries: Sequence[str],
+    choices: Sequence[str],
+    offsets: Sequence[int],
+    *,
+    score_cutoff: float,
+    workers: int = -1,
+) -> List[int | None]:
+    """
+    Scores `queries[k]` against `choices[k]` with fuzz.ratio for every k in a
+    single multi-threaded call, then picks the best pair of every group.
+
+    Group `i` is the pairs `offsets[i]:offsets[i + 1]`. Returns, per group, the
+    position within the group of its highest-scoring pair if that score reaches
+    `score_cutoff`, else None. Ties go to the earliest pair, as with
+    `process.extractOne` over the group's choices.
+    """
+    if not queries:
+        return [None] * (len(offsets) - 1)
+
+    # Scores below the cutoff come back as 0. float64 keeps the scores exactly
+    # comparable with the cutoff, as extractOne compares them.
+    scores = process.cpdist(
+        queries,
+        choices,
+        scorer=fuzz.ratio,
+        score_cutoff=score_cutoff,
+        dtype=np.float64,
+        workers=workers,
+    )
+    bounds = np.asarray(offsets)
+    sizes = np.diff(bounds)
+    group_of_pair = np.repeat(np.arange(len(sizes)), sizes)
+    non_empty = np.flatnonzero(sizes)
+    best_scores = np.zeros(len(sizes))
+    best_scores[non_empty] = np.maximum.reduceat(scores, bounds[non_empty])
+
+    # Pairs holding their group's best score, in order, so the first pair of
+    # each group wins ties.
+    best_pairs = np.flatnonzero(scores == best_scores[group_of_pair])
+    groups, first = np.unique(group_of_pair[best_pairs], return_index=True)
+    matched = best_scores[groups] >= score_cutoff
+    positions = best_pairs[first] - bounds[groups]
+
+    matches: List[int | None] = [None] * len(sizes)
+    for group, position in zip(
+        groups[matched].tolist(), positions[matched].tolist(), strict=True
+    ):
+        matches[group] = position
+    return matches
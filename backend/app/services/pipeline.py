@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Sequence
+
+Stage = Callable[[Any], Awaitable[Any]]
+
+_DONE = object()
+
+
+async def run_pipeline(
+    source: AsyncIterator[Any], stages: Sequence[Stage], *, maxsize: int
+) -> None:
+    """
+    Runs `source` and every stage as concurrent tasks linked by bounded queues.
+
+    Every item of `source` goes through the stages in order, the return value
+    of a stage being the input of the next one; the last stage's is dropped.
+    Each stage handles one item at a time, in source order, while the earlier
+    stages already work on the following items. Each queue holds at most
+    `maxsize` items, which bounds how far a stage runs ahead of the next one.
+    If the source or a stage fails, the other tasks are cancelled and the error
+    is raised.
+    """
+    queues: List[asyncio.Queue[Any]] = [
+        asyncio.Queue(maxsize=max(maxsize, 1)) for _ in stages
+    ]
+
+    async def produce() -> None:
+        async for item in source:
+            await queues[0].put(item)
+        await queues[0].put(_DONE)
+
+    async def consume(index: int) -> None:
+        stage = stages[index]
+        outbox = queues[index + 1] if index + 1 < len(queues) else None
+        while (item := await queues[index].get()) is not _DONE:
+            result = await stage(item)
+            if outbox is not None:
+                await outbox.put(result)
+        if outbox is not None:
+            await outbox.put(_DONE)
+
+    tasks = [asyncio.create_task(produce())]
+    tasks.extend(asyncio.create_task(consume(i)) for i in range(len(stages)))
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import asyncio
-from datetime import date, datetime
-from typing import Any, Dict, List
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, List, Set
 
 import structlog
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -10,9 +11,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.pagination import PaginatedResponse, PaginationParams
 from app.clients.spotify import UserSpotifyClient
 from app.core.constants import VALID_SPOTIFY_ALBUM_TYPES
-from app.core.exceptions import RawLayerBlockExistsError, StyleNotFoundError
-from app.db.models import Category, RawLayerBlock, Style, Track, User
-from app.db.models.external_data import ExternalDataProvider
+from app.core.exceptions import (
+    RawLayerBlockExistsError,
+    RawLayerBlockNotCreatingError,
+    StyleNotFoundError,
+)
+from app.core.settings import settings
+from app.db.models import Category, RawLayerBlock, Style, TrackCatalog, User
 from app.db.models.raw_layer import (
     RawLayerBlockStatus,
     RawLayerPlaylist,
@@ -22,6 +27,7 @@ from app.repositories.category import CategoryRepository
 from app.repositories.raw_layer import RawLayerRepository
 from app.repositories.style import StyleRepository
 from app.repositories.track import TrackRepository
+from app.services.checkpoint import BatchCheckpointer
 from app.schemas.raw_layer import (
     RawLayerBlockCreate,
     RawLayerBlockResponse,
@@ -31,15 +37,35 @@ from app.schemas.raw_layer import (
 
 log = structlog.get_logger()
 
+# Spotify accepts at most this many items per add-to-playlist request.
+PLAYLIST_ADD_BATCH_SIZE = 100
+
+# Receives the build phase and its progress.
+BuildProgressCallback = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+@dataclass
+class BuildState:
+    """What a block build has done so far, as stored in its checkpoint."""
+
+    # Spotify URIs per playlist type value, fixed when the tracks are selected.
+    # A resumed build adds these rather than re-reading the catalog, whose
+    # rows enrichment may have changed in between.
+    categorized: Dict[str, List[str]] | None = None
+    # Number of URIs already added per playlist type value.
+    added: Dict[str, int] = field(default_factory=dict)
+
 
 class RawLayerService:
     def __init__(
         self,
         db: AsyncSession,
         user_spotify_client: UserSpotifyClient,
+        checkpointer: BatchCheckpointer | None = None,
     ):
         self.db = db
         self.spotify_client = user_spotify_client
+        self.checkpointer = checkpointer
         self.raw_layer_repo = RawLayerRepository(db)
         self.style_repo = StyleRepository(db)
         self.category_repo = CategoryRepository(db)
@@ -56,7 +82,7 @@ class RawLayerService:
             playlist_responses.append(playlist_data)
         return playlist_responses
 
-    async def _create_spotify_playlists(
+    def _playlist_definitions(
         self,
         block_name: str,
         style: Style,
@@ -88,9 +114,34 @@ class RawLayerService:
                     "category_id": category.id,  # type: ignore
                 }
             )
+        return playlist_definitions
+
+    async def _create_spotify_playlists(
+        self,
+        block: RawLayerBlock,
+        style: Style,
+        target_categories: List[Category],
+        build: BuildState,
+    ) -> Set[str]:
+        """
+        Creates the playlists the block does not have yet, on Spotify and in the
+        DB. Every playlist created on Spotify is recorded even if creating
+        another one fails, so that a resumed build reuses it instead of leaving
+        it orphaned. Returns the Spotify IDs of the playlists created.
+        """
+        existing = {(p.playlist_type, p.category_id) for p in block.playlists}
+        missing = [
+            p_def
+            for p_def in self._playlist_definitions(
+                block.name, style, target_categories
+            )
+            if (p_def["type"], p_def.get("category_id")) not in existing
+        ]
+        if not missing:
+            return set()
 
         playlist_creation_tasks = []
-        for p_def in playlist_definitions:
+        for p_def in missing:
             playlist_type = p_def["type"]
             task = self.spotify_client.create_playlist(
                 name=p_def["name"],
@@ -99,73 +150,142 @@ class RawLayerService:
             )
             playlist_creation_tasks.append(task)
 
-        created_spotify_playlists = await asyncio.gather(*playlist_creation_tasks)
+        created_spotify_playlists = await asyncio.gather(
+            *playlist_creation_tasks, return_exceptions=True
+        )
 
-        db_playlists_data = []
-        for i, p_def in enumerate(playlist_definitions):
-            spotify_playlist = created_spotify_playlists[i]
-            db_playlists_data.append(
-                {
-                    "playlist_type": p_def["type"],
-                    "category_id": p_def.get("category_id"),
-                    "spotify_playlist_id": spotify_playlist["id"],
-                    "spotify_playlist_url": spotify_playlist["external_urls"][
-                        "spotify"
-                    ],
-                }
+        errors = []
+        created_ids = set()
+        for p_def, spotify_playlist in zip(
+            missing, created_spotify_playlists, strict=True
+        ):
+            if isinstance(spotify_playlist, BaseException):
+                errors.append(spotify_playlist)
+                continue
+            created_ids.add(spotify_playlist["id"])
+            block.playlists.append(
+                RawLayerPlaylist(
+                    playlist_type=p_def["type"],
+                    category_id=p_def.get("category_id"),
+                    spotify_playlist_id=spotify_playlist["id"],
+                    spotify_playlist_url=spotify_playlist["external_urls"]["spotify"],
+                )
+            )
+        await self.db.flush()
+        await self._save_progress(build)
+        if errors:
+            raise errors[0]
+        return created_ids
+
+    async def _add_tracks_to_playlists(
+        self,
+        block: RawLayerBlock,
+        build: BuildState,
+        new_playlist_ids: Set[str],
+        progress_callback: BuildProgressCallback | None,
+    ) -> None:
+        """
+        Adds the categorized tracks to the block's playlists, one Spotify request
+        per batch and the playlists concurrently. `build.added` holds the number
+        of tracks already added to each playlist type, which are skipped, and is
+        updated and checkpointed after every batch. The first batch of a
+        playlist in `new_playlist_ids` waits for the playlist to be ready.
+        """
+        added = build.added
+        playlist_map = {p.playlist_type: p.spotify_playlist_id for p in block.playlists}
+        pending = {
+            p_type: uris
+            for p_type, uris in (
+                (RawLayerPlaylistType(value), uris)
+                for value, uris in (build.categorized or {}).items()
+            )
+            if uris and p_type in playlist_map
+        }
+        total = sum(len(uris) for uris in pending.values())
+        db_lock = asyncio.Lock()
+
+        async def add(p_type: RawLayerPlaylistType, uris: List[str]) -> None:
+            playlist_id = playlist_map[p_type]
+            is_ready = playlist_id not in new_playlist_ids
+            for start in range(
+                added.get(p_type.value, 0), len(uris), PLAYLIST_ADD_BATCH_SIZE
+            ):
+                batch = uris[start : start + PLAYLIST_ADD_BATCH_SIZE]
+                await self.spotify_client.add_items_to_playlist(
+                    playlist_id=playlist_id,
+                    track_uris=batch,
+                    ready_timeout=(
+                        0 if is_ready else settings.SPOTIFY_PLAYLIST_READY_TIMEOUT_S
+                    ),
+                )
+                is_ready = True
+                added[p_type.value] = start + len(batch)
+                async with db_lock:
+                    await self._save_progress(build)
+                if progress_callback:
+                    await progress_callback(
+                        "adding", {"processed": sum(added.values()), "total": total}
+                    )
+
+        # Every playlist runs to completion before a failure is raised, so the
+        # batches added to the others are all checkpointed.
+        results = await asyncio.gather(
+            *(add(p_type, uris) for p_type, uris in pending.items()),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    async def _save_progress(self, build: BuildState) -> None:
+        """Commits the build so far, when it is checkpointed."""
+        if self.checkpointer:
+            await self.checkpointer.commit_batch(
+                cursor=sum(build.added.values()),
+                state={"categorized": build.categorized, "added": dict(build.added)},
             )
-        return db_playlists_data
 
     def _categorize_tracks(
-        self, tracks: List[Track], start_date: date
+        self, tracks: List[TrackCatalog], start_date: date
     ) -> dict[RawLayerPlaylistType, list[str]]:
         categorized_uris: dict[RawLayerPlaylistType, list[str]] = {
             RawLayerPlaylistType.INBOX_NEW: [],
             RawLayerPlaylistType.INBOX_OLD: [],
             RawLayerPlaylistType.INBOX_NOT: [],
         }
+        skipped = 0
         for track in tracks:
-            spotify_data = next(
-                (
-                    d.raw_data
-                    for d in track.external_data
-                    if d.provider == ExternalDataProvider.SPOTIFY and d.raw_data
-                ),
-                None,
-            )
-            if not spotify_data:
-                continue
-
-            album = spotify_data.get("album", {})
-            release_date_str = album.get("release_date")
-            album_type = album.get("album_type")
-            spotify_uri = spotify_data.get("uri")
-
-            if not release_date_str or not album_type or not spotify_uri:
-                continue
-
-            try:
-                # Spotify release_date can be YYYY, YYYY-MM, or YYYY-MM-DD
-                release_date = datetime.fromisoformat(
-                    release_date_str.split("T")[0]
-                ).date()
-            except ValueError:
-                log.warning("Could not parse release date", date=release_date_str)
+            # The catalog only keeps full YYYY-MM-DD Spotify release dates.
+            if not (
+                track.spotify_uri and track.album_type and track.album_release_date
+            ):
+                skipped += 1
                 continue
 
-            if album_type not in VALID_SPOTIFY_ALBUM_TYPES:
-                categorized_uris[RawLayerPlaylistType.INBOX_NOT].append(spotify_uri)
-            elif release_date >= start_date:
-                categorized_uris[RawLayerPlaylistType.INBOX_NEW].append(spotify_uri)
+            if track.album_type not in VALID_SPOTIFY_ALBUM_TYPES:
+                categorized_uris[RawLayerPlaylistType.INBOX_NOT].append(
+                    track.spotify_uri
+                )
+            elif track.album_release_date >= start_date:
+                categorized_uris[RawLayerPlaylistType.INBOX_NEW].append(
+                    track.spotify_uri
+                )
             else:
-                categorized_uris[RawLayerPlaylistType.INBOX_OLD].append(spotify_uri)
+                categorized_uris[RawLayerPlaylistType.INBOX_OLD].append(
+                    track.spotify_uri
+                )
 
+        if skipped:
+            log.warning("Skipped tracks without a full album release", count=skipped)
         return categorized_uris
 
-    async def create_raw_layer_block(
+    async def reserve_raw_layer_block(
         self, *, style_id: int, block_in: RawLayerBlockCreate, user: User
-    ) -> RawLayerBlockResponse:
-        # 1. Validate input
+    ) -> RawLayerBlock:
+        """
+        Validates a new block and stores it with status CREATING, without any
+        tracks or playlists yet. build_raw_layer_block sets it up.
+        """
         style = await self.style_repo.get(id=style_id)
         if not style:
             raise StyleNotFoundError(style_id=style_id)
@@ -176,79 +296,135 @@ class RawLayerService:
         if existing_block:
             raise RawLayerBlockExistsError(block_name=block_in.block_name)
 
-        target_categories = await self.category_repo.get_by_user_and_style(
-            user_id=user.id, style_id=style.id
-        )
-
-        # 2. Select tracks from DB
-        log.info("Selecting tracks for raw layer block", name=block_in.block_name)
-        selected_tracks = await self.raw_layer_repo.select_tracks_for_block(
-            start_date=block_in.start_date,
-            end_date=block_in.end_date,
-            style_id=style.id,
-        )
-        log.info("Selected tracks", count=len(selected_tracks))
-
-        # 3. Create playlists on Spotify API
-        log.info("Creating Spotify playlists", name=block_in.block_name)
-        db_playlists_data = await self._create_spotify_playlists(
-            block_name=block_in.block_name,
-            style=style,
-            target_categories=target_categories,
-        )
-
-        # 4. Create DB records for block & playlists
-        log.info("Creating DB records", name=block_in.block_name)
         db_block = RawLayerBlock(
             name=block_in.block_name,
             user_id=user.id,
             style_id=style.id,
             start_date=block_in.start_date,
             end_date=block_in.end_date,
-            tracks=selected_tracks,
+            status=RawLayerBlockStatus.CREATING,
+            playlists=[],
         )
-        for p_data in db_playlists_data:
-            db_block.playlists.append(RawLayerPlaylist(**p_data))
-
         self.db.add(db_block)
         await self.db.flush()
-        await self.db.refresh(db_block, ["playlists"])
+        return db_block
 
-        # 5. Categorize & add tracks to Spotify playlists
-        log.info(
-            "Categorizing and adding tracks to playlists", name=block_in.block_name
+    async def build_raw_layer_block(
+        self,
+        *,
+        block_id: int,
+        user_id: int,
+        progress_callback: BuildProgressCallback | None = None,
+    ) -> RawLayerBlockResponse | None:
+        """
+        Sets up a block reserved by reserve_raw_layer_block. Returns None if the
+        user has no such block.
+
+        With a checkpointer, every step is committed as soon as it is done, so a
+        build that failed can be run again to continue where it stopped: the
+        tracks already linked to the block are kept, the playlists already
+        created are reused and the tracks already added are skipped. The
+        tracks are categorized once, right after they are selected, and the
+        checkpoint keeps those lists for every later run of the build.
+        Two builds of one block would duplicate its playlists, so callers hold
+        the block's claim (see app.tasks.deps.claim_raw_layer_block) across it.
+        """
+        block = await self.raw_layer_repo.get_with_playlists_for_user(
+            block_id=block_id, user_id=user_id
         )
+        if not block:
+            return None
+        if block.status != RawLayerBlockStatus.CREATING:
+            raise RawLayerBlockNotCreatingError(block_id=block_id)
+        return await self._build_block(block, progress_callback)
 
-        # Add small delay to let Spotify prepare the playlists for modification
-        await asyncio.sleep(0.5)
-        log.debug("Waited for Spotify playlists to be ready for modification")
+    async def _build_block(
+        self,
+        block: RawLayerBlock,
+        progress_callback: BuildProgressCallback | None = None,
+    ) -> RawLayerBlockResponse:
+        build = BuildState()
+        if self.checkpointer:
+            _, state = await self.checkpointer.load()
+            build = BuildState(
+                categorized=state.get("categorized"),
+                added=dict(state.get("added", {})),
+            )
 
-        categorized_uris = self._categorize_tracks(selected_tracks, block_in.start_date)
+        style = await self.style_repo.get(id=block.style_id)
+        if not style:
+            raise StyleNotFoundError(style_id=block.style_id)
+        target_categories = await self.category_repo.get_by_user_and_style(
+            user_id=block.user_id, style_id=style.id
+        )
 
-        playlist_map = {
-            p.playlist_type: p.spotify_playlist_id for p in db_block.playlists
-        }
-        add_track_tasks = []
-        for p_type, uris in categorized_uris.items():
-            if uris and p_type in playlist_map:
-                task = self.spotify_client.add_items_to_playlist(
-                    playlist_id=playlist_map[p_type], track_uris=uris
-                )
-                add_track_tasks.append(task)
+        # 1. Select tracks from the catalog, unless a previous run did.
+        if progress_callback:
+            await progress_callback("selecting", {"block_id": block.id})
+        selected_tracks = await self.raw_layer_repo.get_block_catalog(block_id=block.id)
+        if not selected_tracks:
+            log.info("Selecting tracks for raw layer block", name=block.name)
+            selected_tracks = await self.raw_layer_repo.select_tracks_for_block(
+                start_date=block.start_date,
+                end_date=block.end_date,
+                style_id=style.id,
+            )
+            await self.raw_layer_repo.add_block_tracks(
+                block_id=block.id, track_ids=[t.track_id for t in selected_tracks]
+            )
+            build.categorized = None
+        log.info("Selected tracks", count=len(selected_tracks))
+        if build.categorized is None:
+            categorized_uris = self._categorize_tracks(
+                selected_tracks, block.start_date
+            )
+            build.categorized = {
+                p_type.value: uris for p_type, uris in categorized_uris.items()
+            }
+            await self._save_progress(build)
+
+        # 2. Create the missing playlists on Spotify
+        if progress_callback:
+            await progress_callback(
+                "playlists",
+                {"block_id": block.id, "track_count": len(selected_tracks)},
+            )
+        log.info("Creating Spotify playlists", name=block.name)
+        new_playlist_ids = await self._create_spotify_playlists(
+            block, style, target_categories, build
+        )
 
-        if add_track_tasks:
-            await asyncio.gather(*add_track_tasks)
+        # 3. Add the categorized tracks to Spotify playlists
+        log.info("Adding tracks to playlists", name=block.name)
+        await self._add_tracks_to_playlists(
+            block, build, new_playlist_ids, progress_callback
+        )
+
+        block.status = RawLayerBlockStatus.NEW
+        self.db.add(block)
+        await self.db.flush()
+        if self.checkpointer:
+            await self.checkpointer.complete()
 
         return RawLayerBlockResponse(
-            id=db_block.id,
-            name=db_block.name,
-            status=db_block.status,
-            start_date=db_block.start_date,
-            end_date=db_block.end_date,
-            playlists=self._build_playlist_responses(db_block.playlists),
+            id=block.id,
+            name=block.name,
+            status=block.status,
+            start_date=block.start_date,
+            end_date=block.end_date,
+            playlists=self._build_playlist_responses(block.playlists),
             track_count=len(selected_tracks),
         )
 
+    async def create_raw_layer_block(
+        self, *, style_id: int, block_in: RawLayerBlockCreate, user: User
+    ) -> RawLayerBlockResponse:
+        """Reserves and builds a block within the request's transaction."""
+        db_block = await self.reserve_raw_layer_block(
+            style_id=style_id, block_in=block_in, user=user
+        )
+        return await self._build_block(db_block)
+
     async def get_user_blocks_paginated(
         self, *, user_id: int, params: PaginationParams
     ) -> PaginatedResponse[RawLayerBlockSummary]:
@@ -376,9 +552,9 @@ class RawLayerService:
                     playlist_db_id=playlist.id,
                     found_track_count=len(found_tracks),
                 )
-                # lazy loading tracks
-                await self.db.refresh(playlist, ["tracks"])
-                playlist.tracks.extend(found_tracks)
+                await self.raw_layer_repo.add_playlist_tracks(
+                    playlist_id=playlist.id, track_ids=[t.id for t in found_tracks]
+                )
             else:
                 log.info(
                     "None of the tracks from Spotify playlist found in local DB",
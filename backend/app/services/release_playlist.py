@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 import re
 from typing import Sequence
 
@@ -9,7 +8,6 @@ from fastapi import HTTPException, status
 
 from app.clients.spotify import UserSpotifyClient
 from app.db.models import ReleasePlaylist, User
-from app.db.models.external_data import ExternalDataProvider
 from app.db.uow import AbstractUnitOfWork
 from app.schemas.release_playlist import (
     ReleasePlaylistCreate,
@@ -89,21 +87,11 @@ class ReleasePlaylistService:
         uri_to_position = {uri: i for i, uri in enumerate(spotify_uris)}
 
         local_tracks = await self.uow.tracks.find_by_spotify_uris(uris=spotify_uris)
-        await asyncio.gather(
-            *[self.uow.session.refresh(t, ["external_data"]) for t in local_tracks]
-        )
 
         tracks_with_pos = []
         for track in local_tracks:
-            spotify_uri = next(
-                (
-                    f"spotify:track:{ed.external_id}"
-                    for ed in track.external_data
-                    if ed.provider == ExternalDataProvider.SPOTIFY
-                ),
-                None,
-            )
-            if spotify_uri and spotify_uri in uri_to_position:
+            spotify_uri = f"spotify:track:{track.spotify_id}"
+            if spotify_uri in uri_to_position:
                 position = uri_to_position[spotify_uri]
                 tracks_with_pos.append((track, position))
 
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+
+log = structlog.get_logger(__name__)
+
+
+class SessionRecycler:
+    """
+    Bounds the memory a long-running task's session holds on to.
+
+    Call `batch_done` after every batch. Every `every` batches the session is
+    flushed and its identity map is cleared, so the ORM objects and JSON
+    payloads loaded by earlier batches can be garbage collected. Objects the
+    caller still holds become detached; do not lazy-load through them after.
+    """
+
+    def __init__(self, db: AsyncSession, *, every: int):
+        self.db = db
+        self.every = every
+        self.batches = 0
+
+    async def batch_done(self) -> None:
+        self.batches += 1
+        if self.every <= 0 or self.batches % self.every:
+            return
+        await self.db.flush()
+        self.db.expunge_all()
+        log.debug("Cleared session identity map", batches=self.batches)
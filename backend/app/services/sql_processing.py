@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import time
+from typing import Sequence
+
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repositories import (
+    ArtistRepository,
+    BeatportNormalizationRepository,
+    ExternalDataQuarantineRepository,
+    ExternalDataRepository,
+    LabelRepository,
+    ReleaseRepository,
+    TrackCatalogRepository,
+    TrackRepository,
+)
+from app.repositories.external_data import ExternalDataRow
+from app.services.data_processing import DataProcessingService
+
+log = structlog.get_logger(__name__)
+
+
+class SqlDataProcessingService(DataProcessingService):
+    """
+    Processing engine that normalizes raw Beatport tracks inside Postgres.
+
+    Produces the same labels, artists, releases, tracks, track artists,
+    external data links and track catalog rows as DataProcessingService, but
+    only the record ids are exchanged with the database; the JSON extraction
+    runs as set-based SQL.
+    """
+
+    loads_payload = False
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        artist_repo: ArtistRepository,
+        label_repo: LabelRepository,
+        release_repo: ReleaseRepository,
+        track_repo: TrackRepository,
+        external_data_repo: ExternalDataRepository,
+        quarantine_repo: ExternalDataQuarantineRepository,
+        track_catalog_repo: TrackCatalogRepository,
+        normalization_repo: BeatportNormalizationRepository,
+    ):
+        super().__init__(
+            db=db,
+            artist_repo=artist_repo,
+            label_repo=label_repo,
+            release_repo=release_repo,
+            track_repo=track_repo,
+            external_data_repo=external_data_repo,
+            quarantine_repo=quarantine_repo,
+            track_catalog_repo=track_catalog_repo,
+        )
+        self.normalization_repo = normalization_repo
+
+    async def process_batch(self, records: Sequence[ExternalDataRow]) -> None:
+        if not records:
+            return
+
+        ids = [r.id for r in records]
+        repo = self.normalization_repo
+        steps = [
+            ("labels", repo.upsert_labels),
+            ("artists", repo.upsert_artists),
+            ("releases", repo.upsert_releases),
+            ("tracks", repo.insert_tracks),
+            ("track_artists", repo.link_track_artists),
+        ]
+        timings_ms = {}
+        start_time = time.perf_counter()
+        for name, step in steps:
+            step_start = time.perf_counter()
+            await step(ids)
+            timings_ms[name] = round((time.perf_counter() - step_start) * 1000)
+
+        step_start = time.perf_counter()
+        linked = await repo.link_sources_to_tracks(ids)
+        timings_ms["links"] = round((time.perf_counter() - step_start) * 1000)
+
+        step_start = time.perf_counter()
+        await self.track_catalog_repo.refresh_for_sources(ids)
+        timings_ms["catalog"] = round((time.perf_counter() - step_start) * 1000)
+
+        log.info(
+            "Successfully processed batch of tracks in SQL",
+            count=len(records),
+            linked=linked,
+            duration_ms=round((time.perf_counter() - start_time) * 1000),
+            timings_ms=timings_ms,
+        )
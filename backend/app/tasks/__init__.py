@@ -3,9 +3,11 @@ from .data_tasks import (
     enrich_spotify_artist_data_task,
     enrich_spotify_data_task,
 )
+from .raw_layer_tasks import create_raw_layer_block_task
 
 __all__ = [
     "collect_bp_tracks_task",
     "enrich_spotify_data_task",
     "enrich_spotify_artist_data_task",
+    "create_raw_layer_block_task",
 ]
@@ -1,15 +1,61 @@
+import asyncio
 import time
-from typing import Any
+from typing import Any, Awaitable, Callable
 
 import structlog
-from taskiq import Context, TaskiqDepends
+from taskiq import AsyncTaskiqTask, Context, TaskiqDepends
 
 from app.broker import broker
-from app.tasks.deps import get_collection_service, get_enrichment_service
-from app.tasks.progress import update_task_progress
+from app.core.constants import ProcessingEngine
+from app.core.settings import settings
+from app.db.models.external_data import ExternalDataEntityType
+from app.tasks.deps import (
+    get_collection_service,
+    get_enrichment_service,
+    resolve_processing_engine,
+)
+from app.tasks.progress import ProgressReporter
+from app.tasks.semaphore import enrichment_slots
 
 log = structlog.get_logger(__name__)
 
+# How often a sharded enrichment run polls the progress of its shard tasks.
+SHARD_POLL_INTERVAL_S = 2.0
+
+
+def _checkpoint_key(context: Context, *parts: Any) -> str | None:
+    """
+    Builds the key a task stores its resumable checkpoint under, or None when
+    batch commits are disabled. Restarting a task with the same arguments
+    yields the same key and therefore resumes from its checkpoint.
+    """
+    if not settings.TASK_BATCH_COMMIT:
+        return None
+    return ":".join([context.message.task_name, *map(str, parts)])
+
+
+def _enrichment_checkpoint_key(
+    context: Context,
+    entity_type: ExternalDataEntityType | str,
+    after_id: int = 0,
+    until_id: int | None = None,
+) -> str | None:
+    """
+    Builds the checkpoint key of an enrichment over the ids in
+    (after_id, until_id]. It includes the task id, so concurrent runs never
+    share a checkpoint and a new run never picks up a crashed run's cursor and
+    counters; only a retry of the same task resumes. A new run needs no
+    checkpoint to skip finished work, since the backlog query leaves out
+    linked entities and those still backing off.
+    """
+    return _checkpoint_key(
+        context,
+        ExternalDataEntityType(entity_type).value,
+        after_id,
+        until_id,
+        context.message.task_id,
+    )
+
 
 @broker.task(task_name="collection.collect_bp_tracks")
 async def collect_bp_tracks_task(
@@ -17,15 +63,19 @@ async def collect_bp_tracks_task(
     style_id: int,
     date_from: str,
     date_to: str,
+    engine: ProcessingEngine | None = None,
     context: Context = TaskiqDepends(),
 ) -> dict[str, Any]:
     """
     Collects and processes Beatport tracks using the CollectionService.
+    `engine` overrides BEATPORT_PROCESSING_ENGINE ("python" or "sql"); any
+    other value fails the task before anything is collected.
 
     This task is a thin wrapper that:
     1. Obtains a CollectionService instance with a managed DB session.
     2. Calls the service to collect raw track data from the Beatport API.
-    3. Calls the service to process the collected raw data.
+    3. Calls the service to process the collected raw data, in parallel
+       batches when BEATPORT_PROCESSING_CONCURRENCY is greater than 1.
     4. Reports progress and final results back to the broker.
     """
     task_id = context.message.task_id
@@ -34,35 +84,53 @@ async def collect_bp_tracks_task(
         style_id=style_id,
         date_from=date_from,
         date_to=date_to,
+        engine=engine,
         task_id=task_id,
     )
-    start_time = time.perf_counter()
+    reporter = ProgressReporter(context)
 
     try:
-        await update_task_progress(
-            context, start_time, "collecting", {"processed": 0, "failed": 0, "total": 0}
-        )
+        engine = resolve_processing_engine(engine)
+        await reporter.update("collecting", {"processed": 0, "failed": 0, "total": 0})
 
-        async with get_collection_service() as collection_service:
-            # Phase 1: Collect all raw data
-            await collection_service.collect_beatport_tracks_raw(
+        # Phase 1: Collect all raw data. It is committed before processing so
+        # that parallel workers on other sessions can see it.
+        async with get_collection_service(
+            checkpoint_key=_checkpoint_key(
+                context, style_id, date_from, date_to, "collect"
+            ),
+            task_id=task_id,
+        ) as collection_service:
+            collection_counts = await collection_service.collect_beatport_tracks_raw(
                 bp_token=bp_token,
                 style_id=style_id,
                 date_from=date_from,
                 date_to=date_to,
             )
 
-            # Phase 2: Process collected data
-            async def batch_progress_callback(progress_data: dict[str, Any]) -> None:
-                await update_task_progress(
-                    context, start_time, "processing", progress_data
-                )
+        # Phase 2: Process collected data
+        async def batch_progress_callback(progress_data: dict[str, Any]) -> None:
+            await reporter.update("processing", progress_data)
 
-            processing_results = (
-                await collection_service.process_unprocessed_beatport_tracks(
+        concurrency = settings.BEATPORT_PROCESSING_CONCURRENCY
+        async with get_collection_service(
+            checkpoint_key=_checkpoint_key(
+                context, style_id, date_from, date_to, "process"
+            ),
+            task_id=task_id,
+            engine=engine,
+        ) as service:
+            if concurrency > 1:
+                processing_results = (
+                    await service.process_unprocessed_beatport_tracks_parallel(
+                        batch_progress_callback=batch_progress_callback,
+                        concurrency=concurrency,
+                    )
+                )
+            else:
+                processing_results = await service.process_unprocessed_beatport_tracks(
                     batch_progress_callback=batch_progress_callback
                 )
-            )
 
     except Exception as e:
         log.exception("Task failed unexpectedly", task_id=task_id, error=str(e))
@@ -73,54 +141,250 @@ async def collect_bp_tracks_task(
             "failed": 1,
             "total": 0,
         }
-        await update_task_progress(context, start_time, "failed", final_results)
+        await reporter.update("failed", final_results)
         return final_results
 
     if processing_results.get("failed", 0) > 0:
         final_phase = "failed"
     else:
         final_phase = "finished"
+    processing_results = {"collected": collection_counts, **processing_results}
     final_results = {"phase": final_phase, **processing_results}
 
     log.info("Task finished", **final_results)
-    await update_task_progress(context, start_time, final_phase, processing_results)
+    await reporter.update(final_phase, processing_results)
     return final_results
 
 
-@broker.task(task_name="collection.enrich_spotify_data")
-async def enrich_spotify_data_task(
+async def _wait_for_shard(
+    task: AsyncTaskiqTask[Any],
+    on_progress: Callable[[dict[str, Any]], Awaitable[None]],
+    *,
+    stall_timeout: float,
+) -> bool:
+    """
+    Polls a shard task until it is final, passing every new progress state to
+    `on_progress`, and returns whether it finished without failing.
+
+    Shards store their progress as their result, so a ready result is only
+    final once its phase says so. The broker does not redeliver a task whose
+    worker died, so a shard whose progress has not changed for `stall_timeout`
+    seconds is given up on as failed.
+    """
+    last_write: float | None = None
+    last_change = time.monotonic()
+    while True:
+        if await task.is_ready():
+            result = await task.get_result()
+            state = result.return_value or {}
+            if result.is_err or state.get("phase") == "failed":
+                return False
+            if result.execution_time != last_write:
+                last_write = result.execution_time
+                last_change = time.monotonic()
+                await on_progress(state)
+            if state.get("phase") == "finished":
+                return True
+        stalled_s = time.monotonic() - last_change
+        if stalled_s > stall_timeout:
+            log.warning(
+                "Spotify enrichment shard stalled",
+                task_id=task.task_id,
+                stalled_s=round(stalled_s),
+            )
+            return False
+        await asyncio.sleep(SHARD_POLL_INTERVAL_S)
+
+
+async def _run_enrichment_shards(
+    reporter: ProgressReporter,
+    *,
+    entity_type: ExternalDataEntityType,
+    shards: int,
+    similarity_threshold: int = 80,
+) -> dict[str, Any]:
+    """
+    Splits the enrichment backlog into id-range shards and runs each one as an
+    `enrich_spotify_shard_task` on whichever worker picks it up. Every shard
+    task holds one of the enrichment slots shared by all runs while it works,
+    so a shard given up on here still cannot exceed the cap. The summed
+    counters of all shards are reported as this task's progress and returned.
+    `similarity_threshold` only applies to track enrichment.
+    """
+    async with get_enrichment_service() as enrichment_service:
+        plan = await enrichment_service.plan_shards(entity_type, shards)
+    log.info(
+        "Dispatching Spotify enrichment shards",
+        entity_type=entity_type.value,
+        shards=len(plan),
+    )
+
+    states: list[dict[str, Any]] = [{"total": size} for _, _, size in plan]
+    finished = 0
+
+    def totals() -> dict[str, Any]:
+        counters = {
+            key: sum(state.get(key, 0) for state in states)
+            for key in ("processed", "total", "found", "not_found", "errors")
+        }
+        return {**counters, "shards": len(plan), "shards_finished": finished}
+
+    async def run_shard(index: int, after_id: int, until_id: int | None) -> None:
+        nonlocal finished
+
+        async def on_progress(state: dict[str, Any]) -> None:
+            # A shard waiting for a slot has no counters yet; keep its size.
+            states[index] = {**states[index], **state}
+            await reporter.update("enriching", totals())
+
+        task = await enrich_spotify_shard_task.kiq(
+            entity_type=entity_type.value,
+            after_id=after_id,
+            until_id=until_id,
+            similarity_threshold=similarity_threshold,
+        )
+        succeeded = await _wait_for_shard(
+            task,
+            on_progress,
+            stall_timeout=settings.ENRICHMENT_SHARD_STALL_TIMEOUT_S,
+        )
+        if not succeeded:
+            # Keep the counters of the batches the shard committed.
+            states[index] = {**states[index], "errors": 1}
+        finished += 1
+        await reporter.update("enriching", totals())
+
+    await asyncio.gather(
+        *(
+            run_shard(index, after_id, until_id)
+            for index, (after_id, until_id, _) in enumerate(plan)
+        )
+    )
+    return totals()
+
+
+@broker.task(task_name="collection.enrich_spotify_shard")
+async def enrich_spotify_shard_task(
+    entity_type: str,
+    after_id: int,
+    until_id: int | None,
     similarity_threshold: int = 80,
     context: Context = TaskiqDepends(),
 ) -> dict[str, Any]:
     """
-    Finds tracks with ISRC but no Spotify link, searches for them on Spotify,
-    and persists the results.
+    Enriches the tracks or artists with ids in (after_id, until_id], one shard
+    of a sharded enrichment run. Reports progress like the unsharded tasks,
+    and phase "waiting" while it waits for an enrichment slot, so that the
+    coordinator does not take the wait for a stall.
     """
     task_id = context.message.task_id
-    log.info("Starting Spotify enrichment task", task_id=task_id)
-    start_time = time.perf_counter()
+    log.info(
+        "Starting Spotify enrichment shard",
+        entity_type=entity_type,
+        after_id=after_id,
+        until_id=until_id,
+        task_id=task_id,
+    )
+    reporter = ProgressReporter(context)
+
+    async def waiting() -> None:
+        await reporter.update("waiting", {"errors": 0})
 
     try:
-        async with get_enrichment_service() as enrichment_service:
+        async with enrichment_slots().slot(on_wait=waiting), get_enrichment_service(
+            checkpoint_key=_enrichment_checkpoint_key(
+                context, entity_type, after_id, until_id
+            ),
+            task_id=task_id,
+        ) as enrichment_service:
 
             async def progress_callback(state: dict[str, Any]) -> None:
-                # AC: reported state includes total, processed, found, not_found,
-                # and errors.
-                await update_task_progress(
-                    context,
-                    start_time,
-                    "enriching",
-                    {
-                        **state,
-                        "errors": 0,
-                        "similarity_threshold": similarity_threshold,
-                    },
+                await reporter.update("enriching", {**state, "errors": 0})
+
+            if entity_type == ExternalDataEntityType.TRACK:
+                results = await enrichment_service.enrich_tracks_with_spotify_data(
+                    progress_callback=progress_callback,
+                    similarity_threshold=similarity_threshold,
+                    after_id=after_id,
+                    until_id=until_id,
                 )
+            else:
+                results = await enrichment_service.enrich_artists_with_spotify_data(
+                    progress_callback=progress_callback,
+                    after_id=after_id,
+                    until_id=until_id,
+                )
+
+    except Exception as e:
+        log.exception("Spotify enrichment shard failed", task_id=task_id, error=str(e))
+        final_results = {
+            "error": str(e),
+            "processed": 0,
+            "total": -1,
+            "found": 0,
+            "not_found": 0,
+            "errors": 1,
+        }
+        await reporter.update("failed", final_results)
+        return {"phase": "failed", **final_results}
+
+    final_phase = "finished"
+    final_results = {**results, "errors": 0}
+
+    log.info("Spotify enrichment shard finished", **final_results)
+    await reporter.update(final_phase, final_results)
+    return {"phase": final_phase, **final_results}
+
+
+@broker.task(task_name="collection.enrich_spotify_data")
+async def enrich_spotify_data_task(
+    similarity_threshold: int = 80,
+    shards: int | None = None,
+    context: Context = TaskiqDepends(),
+) -> dict[str, Any]:
+    """
+    Finds tracks with ISRC but no Spotify link, searches for them on Spotify,
+    and persists the results. With more than one shard (ENRICHMENT_SHARDS by
+    default) the work is fanned out to shard tasks and this task aggregates
+    their progress.
+    """
+    task_id = context.message.task_id
+    shards = shards or settings.ENRICHMENT_SHARDS
+    log.info("Starting Spotify enrichment task", task_id=task_id, shards=shards)
+    reporter = ProgressReporter(context)
 
-            results = await enrichment_service.enrich_tracks_with_spotify_data(
-                progress_callback=progress_callback,
+    try:
+        if shards > 1:
+            results = await _run_enrichment_shards(
+                reporter,
+                entity_type=ExternalDataEntityType.TRACK,
+                shards=shards,
                 similarity_threshold=similarity_threshold,
             )
+        else:
+            async with enrichment_slots().slot(), get_enrichment_service(
+                checkpoint_key=_enrichment_checkpoint_key(
+                    context, ExternalDataEntityType.TRACK
+                ),
+                task_id=task_id,
+            ) as enrichment_service:
+
+                async def progress_callback(state: dict[str, Any]) -> None:
+                    # AC: reported state includes total, processed, found, not_found,
+                    # and errors.
+                    await reporter.update(
+                        "enriching",
+                        {
+                            **state,
+                            "errors": 0,
+                            "similarity_threshold": similarity_threshold,
+                        },
+                    )
+
+                results = await enrichment_service.enrich_tracks_with_spotify_data(
+                    progress_callback=progress_callback,
+                    similarity_threshold=similarity_threshold,
+                )
 
     except Exception as e:
         log.exception("Spotify enrichment task failed", task_id=task_id, error=str(e))
@@ -132,40 +396,52 @@ async def enrich_spotify_data_task(
             "not_found": 0,
             "errors": 1,
         }
-        await update_task_progress(context, start_time, "failed", final_results)
+        await reporter.update("failed", final_results)
         return {"phase": "failed", **final_results}
 
-    final_phase = "finished"
-    final_results = {**results, "errors": 0}
+    final_results = {"errors": 0, **results}
+    final_phase = "failed" if final_results["errors"] else "finished"
 
     log.info("Spotify enrichment task finished", **final_results)
-    await update_task_progress(context, start_time, final_phase, final_results)
+    await reporter.update(final_phase, final_results)
     return {"phase": final_phase, **final_results}
 
 
 @broker.task(task_name="collection.enrich_spotify_artist_data")
 async def enrich_spotify_artist_data_task(
+    shards: int | None = None,
     context: Context = TaskiqDepends(),
 ) -> dict[str, Any]:
     """
     Finds artists without a Spotify link, matches them using associated track data,
-    and persists the results.
+    and persists the results. Sharded like `enrich_spotify_data_task`.
     """
     task_id = context.message.task_id
-    log.info("Starting Spotify artist enrichment task", task_id=task_id)
-    start_time = time.perf_counter()
+    shards = shards or settings.ENRICHMENT_SHARDS
+    log.info("Starting Spotify artist enrichment task", task_id=task_id, shards=shards)
+    reporter = ProgressReporter(context)
 
     try:
-        async with get_enrichment_service() as enrichment_service:
+        if shards > 1:
+            results = await _run_enrichment_shards(
+                reporter,
+                entity_type=ExternalDataEntityType.ARTIST,
+                shards=shards,
+            )
+        else:
+            async with enrichment_slots().slot(), get_enrichment_service(
+                checkpoint_key=_enrichment_checkpoint_key(
+                    context, ExternalDataEntityType.ARTIST
+                ),
+                task_id=task_id,
+            ) as enrichment_service:
 
-            async def progress_callback(state: dict[str, Any]) -> None:
-                await update_task_progress(
-                    context, start_time, "enriching", {**state, "errors": 0}
-                )
+                async def progress_callback(state: dict[str, Any]) -> None:
+                    await reporter.update("enriching", {**state, "errors": 0})
 
-            results = await enrichment_service.enrich_artists_with_spotify_data(
-                progress_callback=progress_callback
-            )
+                results = await enrichment_service.enrich_artists_with_spotify_data(
+                    progress_callback=progress_callback
+                )
 
     except Exception as e:
         log.exception(
@@ -179,12 +455,12 @@ async def enrich_spotify_artist_data_task(
             "not_found": 0,
             "errors": 1,
         }
-        await update_task_progress(context, start_time, "failed", final_results)
+        await reporter.update("failed", final_results)
         return {"phase": "failed", **final_results}
 
-    final_phase = "finished"
-    final_results = {**results, "errors": 0}
+    final_results = {"errors": 0, **results}
+    final_phase = "failed" if final_results["errors"] else "finished"
 
     log.info("Spotify artist enrichment task finished", **final_results)
-    await update_task_progress(context, start_time, final_phase, final_results)
+    await reporter.update(final_phase, final_results)
     return {"phase": final_phase, **final_results}
@@ -1,48 +1,142 @@
 from __future__ import annotations
 
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from functools import partial
+from typing import AsyncGenerator, get_args
 
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import AsyncSessionLocal
+from app.clients.spotify import SpotifyUnauthorizedError, UserSpotifyClient
+from app.core.constants import ProcessingEngine
+from app.core.exceptions import RawLayerBlockBuildRunningError
+from app.core.settings import settings
+from app.db.session import AsyncSessionLocal, engine
 from app.repositories import (
     ArtistRepository,
+    BeatportNormalizationRepository,
+    EnrichmentAttemptRepository,
+    ExternalDataQuarantineRepository,
     ExternalDataRepository,
     LabelRepository,
     ReleaseRepository,
+    SpotifyTokenRepository,
+    TrackCatalogRepository,
     TrackRepository,
+    UserRepository,
 )
+from app.repositories.advisory_locks import LockNamespace, hold_session_lock
+from app.services.checkpoint import BatchCheckpointer
+from app.services.session_recycling import SessionRecycler
 from app.services.collection import CollectionService
 from app.services.enrichment import EnrichmentService
+from app.services.raw_layer import RawLayerService
 from app.services.data_processing import DataProcessingService
+from app.services.sql_processing import SqlDataProcessingService
+
+
+def _build_checkpointer(
+    session: AsyncSession, checkpoint_key: str | None, task_id: str | None
+) -> BatchCheckpointer | None:
+    if checkpoint_key is None or task_id is None:
+        return None
+    return BatchCheckpointer(session, key=checkpoint_key, task_id=task_id)
+
+
+def _build_session_recycler(session: AsyncSession) -> SessionRecycler:
+    return SessionRecycler(session, every=settings.TASK_SESSION_RECYCLE_BATCHES)
+
+
+def resolve_processing_engine(engine: str | None) -> ProcessingEngine:
+    """
+    Returns the processing engine to run, BEATPORT_PROCESSING_ENGINE when
+    `engine` is None. Raises ValueError for anything but "python" or "sql".
+    """
+    resolved = settings.BEATPORT_PROCESSING_ENGINE if engine is None else engine
+    if resolved not in get_args(ProcessingEngine):
+        raise ValueError(f"Unknown processing engine: {resolved!r}")
+    return resolved  # type: ignore[return-value]
+
+
+def _build_data_processing_service(
+    session: AsyncSession, engine: ProcessingEngine | None = None
+) -> DataProcessingService:
+    artist_repo = ArtistRepository(session)
+    label_repo = LabelRepository(session)
+    release_repo = ReleaseRepository(session)
+    track_repo = TrackRepository(session)
+    external_data_repo = ExternalDataRepository(session)
+    quarantine_repo = ExternalDataQuarantineRepository(session)
+    track_catalog_repo = TrackCatalogRepository(session)
+    if resolve_processing_engine(engine) == "sql":
+        return SqlDataProcessingService(
+            db=session,
+            artist_repo=artist_repo,
+            label_repo=label_repo,
+            release_repo=release_repo,
+            track_repo=track_repo,
+            external_data_repo=external_data_repo,
+            quarantine_repo=quarantine_repo,
+            track_catalog_repo=track_catalog_repo,
+            normalization_repo=BeatportNormalizationRepository(session),
+        )
+    return DataProcessingService(
+        db=session,
+        artist_repo=artist_repo,
+        label_repo=label_repo,
+        release_repo=release_repo,
+        track_repo=track_repo,
+        external_data_repo=external_data_repo,
+        quarantine_repo=quarantine_repo,
+        track_catalog_repo=track_catalog_repo,
+        lock_stripes=settings.INGESTION_ADVISORY_LOCK_STRIPES,
+    )
 
 
 @asynccontextmanager
-async def get_collection_service() -> AsyncGenerator[CollectionService, None]:
+async def get_data_processing_service(
+    engine: ProcessingEngine | None = None,
+) -> AsyncGenerator[DataProcessingService, None]:
     """
-    Provides a CollectionService instance with a managed DB session.
-    This acts as a Unit of Work for the collection task.
+    Provides a DataProcessingService bound to its own managed DB session.
+    Used by parallel processing, where every batch commits independently.
+    `engine` selects the processing engine ("python" or "sql"), defaulting to
+    BEATPORT_PROCESSING_ENGINE.
     """
     async with AsyncSessionLocal() as session:
         try:
-            artist_repo = ArtistRepository(session)
-            label_repo = LabelRepository(session)
-            release_repo = ReleaseRepository(session)
-            track_repo = TrackRepository(session)
-            external_data_repo = ExternalDataRepository(session)
+            yield _build_data_processing_service(session, engine)
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
 
-            data_processing_service = DataProcessingService(
-                db=session,
-                artist_repo=artist_repo,
-                label_repo=label_repo,
-                release_repo=release_repo,
-                track_repo=track_repo,
-                external_data_repo=external_data_repo,
-            )
+
+@asynccontextmanager
+async def get_collection_service(
+    *,
+    checkpoint_key: str | None = None,
+    task_id: str | None = None,
+    engine: ProcessingEngine | None = None,
+) -> AsyncGenerator[CollectionService, None]:
+    """
+    Provides a CollectionService instance with a managed DB session.
+    This acts as a Unit of Work for the collection task. When a checkpoint key
+    and task ID are given, the service commits after every batch and resumes
+    from the checkpoint stored under that key.
+    """
+    async with AsyncSessionLocal() as session:
+        try:
+            data_processing_service = _build_data_processing_service(session, engine)
 
             collection_service = CollectionService(
-                external_data_repo=external_data_repo,
+                external_data_repo=data_processing_service.external_data_repo,
                 data_processing_service=data_processing_service,
+                data_processing_factory=partial(
+                    get_data_processing_service, engine=engine
+                ),
+                checkpointer=_build_checkpointer(session, checkpoint_key, task_id),
+                session_recycler=_build_session_recycler(session),
             )
             yield collection_service
             await session.commit()
@@ -52,10 +146,13 @@ async def get_collection_service() -> AsyncGenerator[CollectionService, None]:
 
 
 @asynccontextmanager
-async def get_enrichment_service() -> AsyncGenerator[EnrichmentService, None]:
+async def get_enrichment_service(
+    *, checkpoint_key: str | None = None, task_id: str | None = None
+) -> AsyncGenerator[EnrichmentService, None]:
     """
     Provides an EnrichmentService instance with a managed DB session.
-    This acts as a Unit of Work for enrichment tasks.
+    This acts as a Unit of Work for enrichment tasks, optionally committing
+    per batch with a resumable checkpoint (see get_collection_service).
     """
     async with AsyncSessionLocal() as session:
         try:
@@ -68,9 +165,62 @@ async def get_enrichment_service() -> AsyncGenerator[EnrichmentService, None]:
                 artist_repo=artist_repo,
                 track_repo=track_repo,
                 external_data_repo=external_data_repo,
+                attempt_repo=EnrichmentAttemptRepository(session),
+                track_catalog_repo=TrackCatalogRepository(session),
+                checkpointer=_build_checkpointer(session, checkpoint_key, task_id),
+                session_recycler=_build_session_recycler(session),
             )
             yield enrichment_service
             await session.commit()
         except Exception:
             await session.rollback()
             raise
+
+
+@asynccontextmanager
+async def claim_raw_layer_block(block_id: int) -> AsyncGenerator[None, None]:
+    """
+    Makes the caller the only builder of a block until the context exits, or
+    raises RawLayerBlockBuildRunningError if another build holds it.
+    """
+    async with hold_session_lock(
+        engine, LockNamespace.RAW_LAYER_BLOCK, block_id
+    ) as claimed:
+        if not claimed:
+            raise RawLayerBlockBuildRunningError(block_id=block_id)
+        yield
+
+
+@asynccontextmanager
+async def get_raw_layer_service(
+    *, user_id: int, checkpoint_key: str, task_id: str
+) -> AsyncGenerator[RawLayerService, None]:
+    """
+    Provides a RawLayerService acting on Spotify for `user_id`, with a managed
+    DB session that commits every step of a block build under a resumable
+    checkpoint.
+    """
+    async with AsyncSessionLocal() as session:
+        try:
+            user = await UserRepository(session).get_with_spotify_token(user_id=user_id)
+            if not user or not user.spotify_token:
+                raise SpotifyUnauthorizedError(
+                    "User does not have a Spotify token linked."
+                )
+            async with httpx.AsyncClient() as client:
+                yield RawLayerService(
+                    db=session,
+                    user_spotify_client=UserSpotifyClient(
+                        client=client,
+                        token_repo=SpotifyTokenRepository(session),
+                        token_obj=user.spotify_token,
+                        spotify_user_id=user.spotify_id,
+                    ),
+                    checkpointer=BatchCheckpointer(
+                        session, key=checkpoint_key, task_id=task_id
+                    ),
+                )
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
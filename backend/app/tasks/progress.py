@@ -1,9 +1,30 @@
+import asyncio
+import json
+import resource
+import sys
 import time
 from typing import Any, Dict
 
 from taskiq import Context, TaskiqResult
 
-from app.broker import broker
+from app.broker import broker, redis_client
+from app.core.settings import settings
+
+# Progress writes that end a task's progress stream.
+TERMINAL_PHASES = frozenset({"finished", "failed"})
+
+
+def progress_channel(task_id: str) -> str:
+    """The Redis pub/sub channel a task's progress updates are published on."""
+    return f"task_progress:{task_id}"
+
+
+def max_rss_mb() -> float:
+    """Peak resident set size of the worker process so far, in MiB."""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(max_rss / divisor, 1)
 
 
 async def update_task_progress(
@@ -13,11 +34,104 @@ async def update_task_progress(
     progress_data: Dict[str, Any],
 ) -> None:
     """
-    Updates the task's result in the backend with current progress.
+    Updates the task's result in the backend with current progress,
+    including the worker's memory high-water mark, and publishes it on the
+    task's progress channel for streaming clients.
     """
-    progress = {"phase": phase, **progress_data}
+    task_id = context.message.task_id
+    progress = {"phase": phase, **progress_data, "max_rss_mb": max_rss_mb()}
     elapsed_time = time.perf_counter() - start_time
     await broker.result_backend.set_result(
-        context.message.task_id,
+        task_id,
         TaskiqResult(is_err=False, execution_time=elapsed_time, return_value=progress),
     )
+    await redis_client.publish(
+        progress_channel(task_id), json.dumps(progress, default=str)
+    )
+
+
+class ProgressReporter:
+    """
+    Coalesces a task's progress updates into throttled result writes.
+
+    `update` merges the given fields into the pending progress, so callers may
+    pass only what changed. A phase change is written at once; other updates
+    are written at most once every `min_interval` seconds, and an update that
+    arrives sooner is written by a trailing flush when the interval is over.
+    `flush` writes whatever is still pending. Every write holds the latest
+    counters plus the phase's throughput of `processed` in items per second
+    and the ETA it implies for the rest of `total`.
+    """
+
+    def __init__(self, context: Context, *, min_interval: float | None = None):
+        self.context = context
+        self.start_time = time.perf_counter()
+        self.min_interval = (
+            settings.TASK_PROGRESS_MIN_INTERVAL_S
+            if min_interval is None
+            else min_interval
+        )
+        self.phase: str | None = None
+        self.state: Dict[str, Any] = {}
+        self._dirty = False
+        self._last_write = float("-inf")
+        # When the current phase started and how much it had processed then.
+        self._phase_start: tuple[float, Any] = (self.start_time, None)
+        self._write_lock = asyncio.Lock()
+        self._trailing_flush: asyncio.Task[None] | None = None
+
+    async def update(self, phase: str, progress_data: Dict[str, Any]) -> None:
+        phase_changed = phase != self.phase
+        self.phase = phase
+        self.state.update(progress_data)
+        self._dirty = True
+        if phase_changed:
+            self._phase_start = (time.perf_counter(), self.state.get("processed"))
+
+        wait = self._last_write + self.min_interval - time.perf_counter()
+        if phase_changed or wait <= 0:
+            await self.flush()
+        elif self._trailing_flush is None:
+            self._trailing_flush = asyncio.create_task(self._flush_after(wait))
+
+    async def flush(self) -> None:
+        """Writes the pending progress, if any, and cancels a trailing flush."""
+        trailing_flush = self._trailing_flush
+        if trailing_flush is not None and trailing_flush is not asyncio.current_task():
+            trailing_flush.cancel()
+        self._trailing_flush = None
+
+        async with self._write_lock:
+            if not self._dirty or self.phase is None:
+                return
+            self._dirty = False
+            self._last_write = time.perf_counter()
+            self._update_throughput()
+            await update_task_progress(
+                self.context, self.start_time, self.phase, dict(self.state)
+            )
+
+    async def _flush_after(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self.flush()
+
+    def _update_throughput(self) -> None:
+        """
+        Sets items_per_s from the progress made since the phase started, and
+        eta_s from it. The last rate is kept while the phase has made none yet.
+        """
+        processed = self.state.get("processed")
+        total = self.state.get("total")
+        started_at, processed_before = self._phase_start
+        if not isinstance(processed, int):
+            return
+        if isinstance(processed_before, int) and processed > processed_before:
+            elapsed = time.perf_counter() - started_at
+            self.state["items_per_s"] = round(
+                (processed - processed_before) / elapsed, 1
+            )
+        items_per_s = self.state.get("items_per_s")
+        if items_per_s and isinstance(total, int) and total >= processed:
+            self.state["eta_s"] = round((total - processed) / items_per_s, 1)
+        else:
+            self.state["eta_s"] = None
@@ -0,0 +1,73 @@
+from typing import Any
+
+import structlog
+from taskiq import Context, TaskiqDepends
+
+from app.broker import broker
+from app.tasks.deps import claim_raw_layer_block, get_raw_layer_service
+from app.tasks.progress import ProgressReporter
+
+log = structlog.get_logger(__name__)
+
+
+@broker.task(task_name="raw_layer.create_block")
+async def create_raw_layer_block_task(
+    block_id: int,
+    user_id: int,
+    context: Context = TaskiqDepends(),
+) -> dict[str, Any]:
+    """
+    Builds a raw layer block reserved with status CREATING: selects its tracks,
+    creates its Spotify playlists and adds the tracks to them.
+
+    The build is always checkpointed under the block ID, whatever
+    TASK_BATCH_COMMIT says, since its Spotify side effects cannot be rolled
+    back with the transaction. Running the task again for a block whose build
+    failed continues it instead of creating the playlists anew. The task fails
+    at once while another task is still building the block.
+    """
+    task_id = context.message.task_id
+    log.info(
+        "Starting raw layer block task",
+        block_id=block_id,
+        user_id=user_id,
+        task_id=task_id,
+    )
+    reporter = ProgressReporter(context)
+
+    try:
+        async with claim_raw_layer_block(block_id), get_raw_layer_service(
+            user_id=user_id,
+            checkpoint_key=f"{context.message.task_name}:{block_id}",
+            task_id=task_id,
+        ) as service:
+            block = await service.build_raw_layer_block(
+                block_id=block_id,
+                user_id=user_id,
+                progress_callback=reporter.update,
+            )
+    except Exception as e:
+        log.exception("Task failed unexpectedly", task_id=task_id, error=str(e))
+        final_results = {"phase": "failed", "block_id": block_id, "error": str(e)}
+        await reporter.update("failed", final_results)
+        return final_results
+
+    if block is None:
+        log.warning("Raw layer block not found", block_id=block_id, task_id=task_id)
+        final_results = {
+            "phase": "failed",
+            "block_id": block_id,
+            "error": "Block not found",
+        }
+        await reporter.update("failed", final_results)
+        return final_results
+
+    results = {
+        "block_id": block.id,
+        "status": block.status,
+        "track_count": block.track_count,
+        "playlist_count": len(block.playlists),
+    }
+    log.info("Task finished", **results)
+    await reporter.update("finished", results)
+    return {"phase": "finished", **results}
@@ -0,0 +1,96 @@
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable
+
+import structlog
+from redis.asyncio import Redis
+
+from app.broker import redis_client
+from app.core.settings import settings
+
+log = structlog.get_logger(__name__)
+
+# Holders are members of a sorted set scored by when their lease expires, in
+# Redis server time so that worker clocks do not matter. Expired leases are
+# dropped before counting, so a crashed holder frees its slot after one lease.
+_ACQUIRE = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[1]) then
+    redis.call('ZADD', KEYS[1], now + tonumber(ARGV[2]), ARGV[3])
+    return 1
+end
+return 0
+"""
+
+_RENEW = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+return redis.call('ZADD', KEYS[1], 'XX', 'CH', now + tonumber(ARGV[1]), ARGV[2])
+"""
+
+
+class RedisSemaphore:
+    """
+    A counting semaphore shared by every worker through Redis.
+
+    A slot is a lease that the holder renews in the background while it runs
+    and removes on release. Waiters poll every `poll_interval` seconds and call
+    `on_wait`, if given, before each wait.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        *,
+        lease_s: float = 60.0,
+        poll_interval: float = 1.0,
+        client: Redis = redis_client,
+    ):
+        self.key = f"semaphore:{name}"
+        self.limit = limit
+        self.lease_s = lease_s
+        self.poll_interval = poll_interval
+        self._acquire = client.register_script(_ACQUIRE)
+        self._renew = client.register_script(_RENEW)
+        self._client = client
+
+    @asynccontextmanager
+    async def slot(
+        self, on_wait: Callable[[], Awaitable[None]] | None = None
+    ) -> AsyncIterator[None]:
+        token = uuid.uuid4().hex
+        while not await self._acquire(
+            keys=[self.key], args=[self.limit, self.lease_s, token]
+        ):
+            if on_wait:
+                await on_wait()
+            await asyncio.sleep(self.poll_interval)
+        heartbeat = asyncio.create_task(self._keep_alive(token))
+        try:
+            yield
+        finally:
+            heartbeat.cancel()
+            await self._client.zrem(self.key, token)
+
+    async def _keep_alive(self, token: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_s / 3)
+            if not await self._renew(keys=[self.key], args=[self.lease_s, token]):
+                # ZADD XX found no member: the lease expired and the slot may
+                # already have gone to someone else.
+                log.warning("Semaphore lease lost", key=self.key)
+                return
+
+
+def enrichment_slots() -> RedisSemaphore:
+    """
+    The slots of Spotify enrichment streams, shared by every enrichment run:
+    each shard task, and each unsharded run, holds one while it sends requests.
+    """
+    return RedisSemaphore(
+        "spotify_enrichment", settings.ENRICHMENT_MAX_CONCURRENT_SHARDS
+    )
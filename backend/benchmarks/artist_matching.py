@@ -0,0 +1,171 @@
+"""
+Micro-benchmark of fuzzy artist matching over an enrichment batch.
+
+Compares the former per-artist `process.extractOne` calls, each followed by a
+reverse scan of the candidates to recover the matched ID, with two batch
+approaches: one dense `process.cdist` of every artist name against every
+candidate name, and the `process.cpdist` over each artist's own candidate pairs
+used by EnrichmentService. No database or Spotify access is needed:
+
+    python -m benchmarks.artist_matching --artists 10000 --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from app.core.constants import ARTIST_FUZZY_MATCH_THRESHOLD
+from app.services.fuzzy_matching import best_pair_in_groups
+
+Batch = List[tuple[str, Dict[str, str]]]
+
+WORDS = [
+    "deep", "dark", "acid", "night", "sound", "system", "echo", "pulse",
+    "daniel", "maria", "kraft", "noir", "vega", "tonic", "lux", "orbit",
+]  # fmt: skip
+
+
+def make_batch(count: int, seed: int = 0) -> Batch:
+    """
+    Synthetic artists with the Spotify artists of their tracks as candidates,
+    mixing exact names, near misses and unrelated collaborators.
+    """
+    rng = random.Random(seed)
+    batch = []
+    for i in range(count):
+        name = " ".join(rng.sample(WORDS, 2)) + f" {i}"
+        candidates = {}
+        for j in range(rng.randint(1, 8)):
+            roll = rng.random()
+            if roll < 0.3:
+                candidate = name
+            elif roll < 0.6:
+                candidate = name.replace(" ", "", 1) + rng.choice("sx ")
+            else:
+                candidate = " ".join(rng.sample(WORDS, 3))
+            candidates[f"sp{i}x{j}"] = candidate
+        batch.append((name, candidates))
+    return batch
+
+
+def legacy_match(batch: Batch) -> List[str | None]:
+    """extractOne per artist, then a reverse scan from name back to ID."""
+    matches: List[str | None] = []
+    for name, candidates in batch:
+        best_match = process.extractOne(
+            name,
+            list(candidates.values()),
+            scorer=fuzz.ratio,
+            score_cutoff=ARTIST_FUZZY_MATCH_THRESHOLD,
+        )
+        match = None
+        if best_match:
+            for sid, sname in candidates.items():
+                if sname == best_match[0]:
+                    match = sid
+                    break
+        matches.append(match)
+    return matches
+
+
+def dense_match(batch: Batch, workers: int) -> List[str | None]:
+    """
+    One cdist of every distinct artist name against every distinct candidate
+    name, masked down to each artist's own candidates afterwards.
+    """
+    names = list(dict.fromkeys(name for name, _ in batch))
+    choices = list(
+        dict.fromkeys(c for _, candidates in batch for c in candidates.values())
+    )
+    name_index = {name: i for i, name in enumerate(names)}
+    choice_index = {choice: i for i, choice in enumerate(choices)}
+    scores = process.cdist(
+        names,
+        choices,
+        scorer=fuzz.ratio,
+        score_cutoff=ARTIST_FUZZY_MATCH_THRESHOLD,
+        dtype=np.float64,
+        workers=workers,
+    )
+    matches: List[str | None] = []
+    for name, candidates in batch:
+        if not candidates:
+            matches.append(None)
+            continue
+        row = scores[name_index[name]]
+        own = row[[choice_index[c] for c in candidates.values()]]
+        best = int(own.argmax())
+        matches.append(
+            list(candidates)[best]
+            if own[best] >= ARTIST_FUZZY_MATCH_THRESHOLD
+            else None
+        )
+    return matches
+
+
+def paired_match(batch: Batch, workers: int) -> List[str | None]:
+    """cpdist over the flattened (artist, candidate) pairs, as in enrichment."""
+    names: List[str] = []
+    candidate_names: List[str] = []
+    candidate_ids: List[str] = []
+    offsets = [0]
+    for name, candidates in batch:
+        names.extend([name] * len(candidates))
+        candidate_names.extend(candidates.values())
+        candidate_ids.extend(candidates.keys())
+        offsets.append(len(names))
+    matches = best_pair_in_groups(
+        names,
+        candidate_names,
+        offsets,
+        score_cutoff=ARTIST_FUZZY_MATCH_THRESHOLD,
+        workers=workers,
+    )
+    return [
+        None if match is None else candidate_ids[offset + match]
+        for offset, match in zip(offsets, matches, strict=False)
+    ]
+
+
+def measure(name: str, match: Callable[[], object], repeat: int) -> None:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        match()
+        timings.append(time.perf_counter() - start)
+    print(f"{name:>7}: best {min(timings) * 1000:9.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--artists", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=-1)
+    parser.add_argument(
+        "--skip-dense",
+        action="store_true",
+        help="skip the dense cdist, whose matrix grows with the batch squared",
+    )
+    args = parser.parse_args()
+
+    batch = make_batch(args.artists)
+    pairs = sum(len(candidates) for _, candidates in batch)
+    print(f"{args.artists} artists, {pairs} candidate pairs")
+
+    expected = legacy_match(batch)
+    assert paired_match(batch, args.workers) == expected
+    measure("legacy", lambda: legacy_match(batch), args.repeat)
+    if not args.skip_dense:
+        assert dense_match(batch, args.workers) == expected
+        measure("dense", lambda: dense_match(batch, args.workers), args.repeat)
+    measure("paired", lambda: paired_match(batch, args.workers), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
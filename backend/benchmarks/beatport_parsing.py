@@ -0,0 +1,167 @@
+"""
+Micro-benchmark of the CPU side of Beatport batch processing.
+
+Compares the single-pass parser used by DataProcessingService with the
+previous per-stage walks, which re-iterated every record and re-read the same
+nested raw_data dicts for labels, artists, releases and tracks. No database is
+needed:
+
+    python -m benchmarks.beatport_parsing --records 10000 --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from app.db.models import ExternalData
+from app.services.beatport_batch import parse_beatport_tracks
+
+
+def make_records(count: int) -> List[ExternalData]:
+    """Synthetic tracks sharing labels, releases and artists like real pages."""
+    records = []
+    for i in range(count):
+        label = {"id": i % 200, "name": f"Label {i % 200}", "slug": "label"}
+        release = {"id": i % 2000, "name": f"Release {i % 2000}", "label": label}
+        artists = [
+            {"id": (i + j) % 3000, "name": f"Artist {(i + j) % 3000}"}
+            for j in range(1 + i % 3)
+        ]
+        raw_data = {
+            "id": i,
+            "name": f"Track {i}",
+            "length_ms": 300_000 + i,
+            "bpm": 120 + i % 20,
+            "key": {"id": i % 24, "name": f"{i % 12} Major"},
+            "isrc": f"ISRC{i:08d}",
+            "release": release,
+            "artists": artists,
+        }
+        records.append(ExternalData(id=i, external_id=str(i), raw_data=raw_data))
+    return records
+
+
+def legacy_walk(records: List[ExternalData]) -> List[Dict[str, Any]]:
+    """The former stage-by-stage extraction, without the database calls."""
+    label_data_map: Dict[str, Any] = {}
+    for r in records:
+        if (
+            r.raw_data
+            and (release_data := r.raw_data.get("release"))
+            and (label_info := release_data.get("label"))
+        ):
+            if label_info["name"] not in label_data_map:
+                label_data_map[label_info["name"]] = label_info
+
+    artist_data_map: Dict[str, Any] = {}
+    for r in records:
+        if r.raw_data and (artists_info := r.raw_data.get("artists")):
+            for artist_info in artists_info:
+                if artist_info["name"] not in artist_data_map:
+                    artist_data_map[artist_info["name"]] = artist_info
+
+    label_ids = {name: i for i, name in enumerate(label_data_map)}
+    release_data_map: Dict[Any, Any] = {}
+    for r in records:
+        if not (r.raw_data and (release_data := r.raw_data.get("release"))):
+            continue
+        if not (label_data := release_data.get("label")):
+            continue
+        release_key = (release_data["name"], label_ids[label_data["name"]])
+        if release_key not in release_data_map:
+            release_data_map[release_key] = release_data
+
+    release_ids = {key: i for i, key in enumerate(release_data_map)}
+    artist_ids = {name: i for i, name in enumerate(artist_data_map)}
+    external_id_to_raw_data = {r.external_id: r.raw_data for r in records}
+    tracks = []
+    for r in records:
+        if not r.raw_data:
+            continue
+        release_data = r.raw_data.get("release")
+        if not release_data or not release_data.get("label"):
+            continue
+        label_id = label_ids[release_data["label"]["name"]]
+        tracks.append(
+            {
+                "name": r.raw_data["name"],
+                "duration_ms": r.raw_data.get("length_ms"),
+                "bpm": r.raw_data.get("bpm"),
+                "key": r.raw_data.get("key", {}).get("name"),
+                "isrc": r.raw_data.get("isrc"),
+                "release_id": release_ids[(release_data["name"], label_id)],
+                "artist_ids": [
+                    artist_ids[a["name"]]
+                    for a in r.raw_data.get("artists", [])
+                    if a["name"] in artist_ids
+                ],
+                "raw_data": external_id_to_raw_data[r.external_id],
+            }
+        )
+    return tracks
+
+
+def single_pass_walk(records: List[ExternalData]) -> List[Dict[str, Any]]:
+    """The same extraction driven by a single parse of the batch."""
+    batch = parse_beatport_tracks(records)
+    release_ids = {key: i for i, key in enumerate(batch.releases)}
+    artist_ids = {name: i for i, name in enumerate(batch.artists)}
+    tracks = []
+    for record, release_key in zip(batch.tracks, batch.release_keys, strict=True):
+        raw_data = record.raw_data
+        tracks.append(
+            {
+                "name": raw_data["name"],
+                "duration_ms": raw_data.get("length_ms"),
+                "bpm": raw_data.get("bpm"),
+                "key": raw_data.get("key", {}).get("name"),
+                "isrc": raw_data.get("isrc"),
+                "release_id": release_ids[release_key],
+                "artist_ids": [
+                    artist_ids[a["name"]]
+                    for a in raw_data.get("artists") or ()
+                    if a["name"] in artist_ids
+                ],
+                "raw_data": raw_data,
+            }
+        )
+    return tracks
+
+
+def measure(
+    name: str, walk: Callable[[List[ExternalData]], Any], records, repeat: int
+) -> None:
+    cpu_times = []
+    for _ in range(repeat):
+        start = time.process_time()
+        walk(records)
+        cpu_times.append(time.process_time() - start)
+
+    tracemalloc.start()
+    walk(records)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{name:>9}: best CPU {min(cpu_times) * 1000:.1f} ms, "
+        f"peak traced memory {peak / 1024:.0f} KiB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    records = make_records(args.records)
+    assert legacy_walk(records) == single_pass_walk(records)
+    measure("legacy", legacy_walk, records, args.repeat)
+    measure("single", single_pass_walk, records, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Stress test for concurrent Beatport processing on overlapping data.
+
+Runs many process_batch calls at once, each on its own session, over shuffled
+batches of synthetic tracks that share labels, artists and releases, and
+reports how many batches failed with a deadlock. Every batch runs in its own
+transaction that is rolled back unless --commit is given, but row and advisory
+locks are still held until then, so overlapping batches contend exactly as
+concurrent collection tasks would. Point it at a scratch local Postgres:
+
+    python -m benchmarks.concurrent_ingestion --workers 8 --batches 40
+    python -m benchmarks.concurrent_ingestion --lock-stripes 256
+
+tests/test_concurrent_ingestion.py runs the same stress test with assertions.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+from typing import List, Tuple
+
+from sqlalchemy.exc import DBAPIError
+
+from app.db.models import ExternalData
+from app.db.session import AsyncSessionLocal
+from app.tasks.deps import _build_data_processing_service
+from benchmarks.beatport_parsing import make_records
+
+DEADLOCK_DETECTED = "40P01"
+
+
+def make_batches(
+    records: List[ExternalData], batches: int, batch_size: int, seed: int
+) -> List[List[ExternalData]]:
+    """Random, heavily overlapping samples of `records`, in random order."""
+    rng = random.Random(seed)
+    return [rng.sample(records, min(batch_size, len(records))) for _ in range(batches)]
+
+
+async def run_batch(
+    records: List[ExternalData],
+    lock_stripes: int,
+    commit: bool,
+    outcomes: Counter,
+) -> None:
+    async with AsyncSessionLocal() as session:
+        # The python engine, as the batches are not stored in external_data.
+        service = _build_data_processing_service(session, "python")
+        service.lock_stripes = lock_stripes
+        try:
+            await service.process_batch(records)
+            if commit:
+                await session.commit()
+            outcomes["ok"] += 1
+        except DBAPIError as e:
+            sqlstate = getattr(e.orig, "sqlstate", None)
+            outcomes["deadlock" if sqlstate == DEADLOCK_DETECTED else "error"] += 1
+        finally:
+            await session.rollback()
+
+
+def make_stress_batches(
+    records: int, batches: int, batch_size: int, seed: int
+) -> List[List[ExternalData]]:
+    stress_records = make_records(records)
+    for record in stress_records:
+        # Keep the synthetic tracks apart from real Beatport ids.
+        record.external_id = f"stress-{record.external_id}"
+    return make_batches(stress_records, batches, batch_size, seed)
+
+
+async def run_concurrently(
+    batches: List[List[ExternalData]],
+    workers: int,
+    lock_stripes: int,
+    commit: bool = False,
+) -> Tuple[Counter, float]:
+    """
+    Processes `batches` with at most `workers` at a time. Returns how many
+    batches succeeded ("ok"), deadlocked ("deadlock") or failed otherwise
+    ("error"), and the elapsed seconds.
+    """
+    outcomes: Counter = Counter()
+    semaphore = asyncio.Semaphore(workers)
+
+    async def worker(batch: List[ExternalData]) -> None:
+        async with semaphore:
+            await run_batch(batch, lock_stripes, commit, outcomes)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(worker(batch) for batch in batches))
+    return outcomes, time.perf_counter() - start_time
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=2_000)
+    parser.add_argument("--batches", type=int, default=40)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--lock-stripes", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--commit", action="store_true")
+    args = parser.parse_args()
+
+    batches = make_stress_batches(
+        args.records, args.batches, args.batch_size, args.seed
+    )
+    outcomes, elapsed = await run_concurrently(
+        batches, args.workers, args.lock_stripes, args.commit
+    )
+
+    print(
+        f"{len(batches)} batches with {args.workers} workers in {elapsed:.2f}s: "
+        f"{outcomes['ok']} ok, {outcomes['deadlock']} deadlocked, "
+        f"{outcomes['error']} other errors"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,133 @@
+"""
+Times the hot external_data queries, to compare table layouts.
+
+Run it once before and once after a schema change such as the partitioning
+migration, saving the first run and comparing the second against it:
+
+    python -m benchmarks.external_data_queries --style-id 1 --save before.json
+    alembic upgrade head
+    python -m benchmarks.external_data_queries --style-id 1 --compare before.json
+
+Every query runs read-only in a transaction that is rolled back.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import date, timedelta
+from typing import Awaitable, Callable, Dict
+
+from sqlalchemy import text
+
+from app.db.session import AsyncSessionLocal
+from app.repositories import (
+    ArtistRepository,
+    ExternalDataRepository,
+    RawLayerRepository,
+    TrackRepository,
+)
+
+RELATION_SIZES = text("""
+    SELECT c.relname, c.relkind,
+        coalesce(sum(pg_total_relation_size(p.relid)), 0)::bigint AS bytes
+    FROM pg_class c
+    LEFT JOIN LATERAL pg_partition_tree(c.oid) p ON p.isleaf
+    WHERE c.relname LIKE 'external_data%' AND c.relkind IN ('r', 'p')
+    GROUP BY c.relname, c.relkind
+    ORDER BY c.relname
+    """)
+
+
+async def time_query(
+    query: Callable[[], Awaitable[object]], repeat: int
+) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await query()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(timings), "best_ms": min(timings)}
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    end_date = args.end_date or date.today()
+    start_date = end_date - timedelta(days=args.days)
+    results = {}
+    async with AsyncSessionLocal() as session:
+        tracks = TrackRepository(session)
+        artists = ArtistRepository(session)
+        external_data = ExternalDataRepository(session)
+        raw_layer = RawLayerRepository(session)
+        queries: Dict[str, Callable[[], Awaitable[object]]] = {
+            "select_tracks_for_block": lambda: raw_layer.select_tracks_for_block(
+                start_date=start_date, end_date=end_date, style_id=args.style_id
+            ),
+            "count_tracks_missing_spotify_link": (
+                tracks.count_tracks_missing_spotify_link
+            ),
+            "get_tracks_missing_spotify_link": lambda: (
+                tracks.get_tracks_missing_spotify_link(after_id=0, limit=args.limit)
+            ),
+            "count_artists_missing_spotify_link": (
+                artists.count_artists_missing_spotify_link
+            ),
+            "get_artists_missing_spotify_link": lambda: (
+                artists.get_artists_missing_spotify_link(after_id=0, limit=args.limit)
+            ),
+            "count_unprocessed_beatport_tracks": (
+                external_data.count_unprocessed_beatport_tracks
+            ),
+            "get_unprocessed_beatport_rows": lambda: (
+                external_data.get_unprocessed_beatport_rows(
+                    after_id=0, limit=args.limit
+                )
+            ),
+        }
+        try:
+            for name, query in queries.items():
+                results[name] = await time_query(query, args.repeat)
+                session.expunge_all()
+
+            for relname, relkind, size in await session.execute(RELATION_SIZES):
+                kind = "partitioned" if relkind == "p" else "table"
+                print(f"{relname:>40} ({kind}): {size / 2**20:,.1f} MiB")
+        finally:
+            await session.rollback()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--style-id", type=int, required=True)
+    parser.add_argument("--end-date", type=date.fromisoformat, default=None)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", help="write the timings to this JSON file")
+    parser.add_argument("--compare", help="compare with timings saved by --save")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    for name, timing in results.items():
+        line = f"{name:>40}: median {timing['median_ms']:8.1f} ms"
+        if name in baseline:
+            before = baseline[name]["median_ms"]
+            line += f" (before {before:8.1f} ms, {before / timing['median_ms']:.1f}x)"
+        print(line)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Compares the Python and SQL Beatport processing engines.
+
+Each engine processes the same unprocessed Beatport tracks in a transaction
+that is rolled back afterwards, so the database is left unchanged. Run it from
+the backend directory against a database with collected raw data:
+
+    python -m benchmarks.processing_engines --batches 10 --batch-size 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from app.core.settings import settings
+from app.db.session import AsyncSessionLocal
+from app.repositories import ExternalDataRepository
+from app.tasks.deps import _build_data_processing_service
+
+
+async def run_engine(engine: str, batches: int, batch_size: int) -> None:
+    async with AsyncSessionLocal() as session:
+        service = _build_data_processing_service(session, engine)
+        repo = ExternalDataRepository(session)
+        last_id = 0
+        processed = 0
+        start_time = time.perf_counter()
+        try:
+            for _ in range(batches):
+                records = await repo.get_unprocessed_beatport_rows(
+                    after_id=last_id,
+                    limit=batch_size,
+                    with_payload=service.loads_payload,
+                )
+                if not records:
+                    break
+                last_id = records[-1].id
+                await service.process_batch(records)
+                await session.flush()
+                processed += len(records)
+        finally:
+            elapsed = time.perf_counter() - start_time
+            await session.rollback()
+
+    rate = processed / elapsed if elapsed else 0.0
+    print(f"{engine:>6}: {processed} records in {elapsed:.2f}s ({rate:.0f} records/s)")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batches", type=int, default=10)
+    parser.add_argument(
+        "--batch-size", type=int, default=settings.BEATPORT_PROCESSING_BATCH_SIZE
+    )
+    parser.add_argument("--engines", nargs="+", default=["python", "sql"])
+    args = parser.parse_args()
+
+    for engine in args.engines:
+        await run_engine(engine, args.batches, args.batch_size)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.repositories.advisory_locks import (
+    LockNamespace,
+    hold_session_lock,
+    is_session_lock_held,
+    lock_natural_keys,
+    lock_stripe,
+)
+
+BLOCK = LockNamespace.RAW_LAYER_BLOCK
+
+
+async def claim_twice(url: str) -> list:
+    engine = create_async_engine(make_url(url).set(drivername="postgresql+asyncpg"))
+    seen = []
+    try:
+        async with AsyncSession(engine) as session:
+            async with hold_session_lock(engine, BLOCK, 42) as first:
+                # Commits elsewhere must not release it.
+                await session.commit()
+                async with hold_session_lock(engine, BLOCK, 42) as second:
+                    seen += [first, second]
+                async with hold_session_lock(engine, BLOCK, 43) as other:
+                    seen.append(other)
+                seen.append(await is_session_lock_held(session, BLOCK, 42))
+            seen.append(await is_session_lock_held(session, BLOCK, 42))
+            async with hold_session_lock(engine, BLOCK, 42) as again:
+                seen.append(again)
+    finally:
+        await engine.dispose()
+    return seen
+
+
+def test_session_lock_admits_one_holder_per_key(migrated_db: str) -> None:
+    assert asyncio.run(claim_twice(migrated_db)) == [
+        True,
+        False,
+        True,
+        True,
+        False,
+        True,
+    ]
+
+
+async def lock_stripes(url: str) -> int:
+    engine = create_async_engine(make_url(url).set(drivername="postgresql+asyncpg"))
+    try:
+        async with AsyncSession(engine) as session:
+            await lock_natural_keys(
+                session, LockNamespace.TRACK, ["a", "b", "c", "a"], stripes=1024
+            )
+            held = await session.execute(
+                text(
+                    "SELECT count(*) FROM pg_locks WHERE locktype = 'advisory' "
+                    "AND pid = pg_backend_pid() AND classid = :namespace"
+                ),
+                {"namespace": int(LockNamespace.TRACK)},
+            )
+            return held.scalar_one()
+    finally:
+        await engine.dispose()
+
+
+def test_natural_key_locks_are_taken_per_stripe(migrated_db: str) -> None:
+    expected = len({lock_stripe(key, 1024) for key in "abc"})
+    assert asyncio.run(lock_stripes(migrated_db)) == expected
@@ -0,0 +1,37 @@
+from types import SimpleNamespace
+
+from app.services.beatport_batch import parse_beatport_tracks
+
+
+def record(id: int, raw_data):
+    return SimpleNamespace(id=id, external_id=str(id), raw_data=raw_data)
+
+
+def track(id: int, release: str | None, label: str | None, artists: list) -> dict:
+    raw_data = {"id": id, "name": f"Track {id}", "artists": artists}
+    if release:
+        raw_data["release"] = {"id": id, "name": release}
+        if label:
+            raw_data["release"]["label"] = {"id": id, "name": label}
+    return raw_data
+
+
+def test_parse_keeps_distinct_entities_and_trackable_records() -> None:
+    a, b, c = ({"id": i, "name": name} for i, name in enumerate("ABC"))
+    records = [
+        record(1, track(1, "R1", "L1", [a, b])),
+        record(2, track(2, "R1", "L1", [b])),
+        record(3, track(3, "R2", None, [c])),
+        record(4, None),
+        record(5, track(5, "R1", "L2", [])),
+    ]
+    batch = parse_beatport_tracks(records)
+
+    assert list(batch.labels) == ["L1", "L2"]
+    assert list(batch.artists) == ["A", "B", "C"]
+    assert list(batch.releases) == [("R1", "L1"), ("R1", "L2")]
+    assert [r.id for r in batch.tracks] == [1, 2, 5]
+    assert batch.release_keys == [("R1", "L1"), ("R1", "L1"), ("R1", "L2")]
+    # Tracks of one release share a single key tuple.
+    assert batch.release_keys[0] is batch.release_keys[1]
+    assert len(batch) == 3
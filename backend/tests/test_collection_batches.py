@@ -0,0 +1,39 @@
+import asyncio
+from types import SimpleNamespace
+from typing import List
+
+from app.services.collection import CollectionService
+
+
+class FakeExternalDataRepo:
+    """Hands out unprocessed ids; ids in `processed` disappear between calls."""
+
+    def __init__(self, ids: List[int]):
+        self.ids = ids
+        self.processed: set = set()
+        self.calls: List[int] = []
+
+    async def get_unprocessed_beatport_rows(self, *, after_id, limit, with_payload):
+        self.calls.append(after_id)
+        ids = [i for i in self.ids if i > after_id and i not in self.processed]
+        return [SimpleNamespace(id=i) for i in ids[:limit]]
+
+
+async def collect(service: CollectionService, repo: FakeExternalDataRepo) -> list:
+    seen = []
+    async for batch in service._unprocessed_batches(
+        after_id=0, batch_size=2, with_payload=True
+    ):
+        seen.append([r.id for r in batch])
+        # Records handled elsewhere meanwhile must not be handed out.
+        repo.processed.add(5)
+    return seen
+
+
+def test_batches_are_read_with_a_fresh_keyset_query_each() -> None:
+    repo = FakeExternalDataRepo([1, 2, 3, 4, 5, 6, 7])
+    service = CollectionService(
+        external_data_repo=repo, data_processing_service=None  # type: ignore
+    )
+    assert asyncio.run(collect(service, repo)) == [[1, 2], [3, 4], [6, 7]]
+    assert repo.calls == [0, 2, 4, 7]
@@ -0,0 +1,98 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Any, List
+
+import pytest
+from taskiq import TaskiqResult
+
+from app.core.settings import settings
+from app.db.models.external_data import ExternalDataEntityType
+from app.tasks import data_tasks
+from app.tasks.data_tasks import _enrichment_checkpoint_key, _wait_for_shard
+
+
+class FakeShardTask:
+    """Serves one stored result per poll, repeating the last one."""
+
+    task_id = "shard"
+
+    def __init__(self, results: List[TaskiqResult | None]):
+        self.results = results
+        self.polls = 0
+
+    def _current(self) -> TaskiqResult | None:
+        result = self.results[min(self.polls, len(self.results) - 1)]
+        self.polls += 1
+        return result
+
+    async def is_ready(self) -> bool:
+        self._result = self._current()
+        return self._result is not None
+
+    async def get_result(self) -> TaskiqResult:
+        return self._result
+
+
+def progress(at: float, phase: str = "enriching", **state: Any) -> TaskiqResult:
+    return TaskiqResult(
+        is_err=False, execution_time=at, return_value={"phase": phase, **state}
+    )
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(data_tasks, "SHARD_POLL_INTERVAL_S", 0)
+
+
+def wait(task: FakeShardTask, stall_timeout: float = 60) -> tuple[bool, list]:
+    seen: list = []
+
+    async def on_progress(state: dict) -> None:
+        seen.append(state["processed"])
+
+    succeeded = asyncio.run(
+        _wait_for_shard(task, on_progress, stall_timeout=stall_timeout)
+    )
+    return succeeded, seen
+
+
+def test_finished_shard_reports_each_new_state_once() -> None:
+    task = FakeShardTask(
+        [
+            None,
+            progress(1.0, processed=10),
+            progress(1.0, processed=10),
+            progress(2.0, processed=20),
+            progress(3.0, "finished", processed=30),
+        ]
+    )
+    assert wait(task) == (True, [10, 20, 30])
+
+
+def test_failed_shard_is_not_successful() -> None:
+    task = FakeShardTask([progress(1.0, processed=5), progress(2.0, "failed")])
+    assert wait(task) == (False, [5])
+
+
+def test_shard_without_new_progress_is_given_up() -> None:
+    task = FakeShardTask([progress(1.0, processed=5)])
+    assert wait(task, stall_timeout=0.05) == (False, [5])
+
+
+def test_shard_never_picked_up_is_given_up() -> None:
+    task = FakeShardTask([None])
+    assert wait(task, stall_timeout=0.05) == (False, [])
+
+
+def test_enrichment_checkpoints_are_per_task(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "TASK_BATCH_COMMIT", True)
+
+    def key(task_id: str, *args: Any) -> str | None:
+        message = SimpleNamespace(task_name="enrich", task_id=task_id)
+        context: Any = SimpleNamespace(message=message)
+        return _enrichment_checkpoint_key(context, *args)
+
+    track = ExternalDataEntityType.TRACK
+    assert key("a", track) == "enrich:TRACK:0:None:a"
+    assert key("a", "TRACK", 0, 100) == "enrich:TRACK:0:100:a"
+    assert key("b", track) != key("a", track)
@@ -0,0 +1,206 @@
+"""
+The hot external_data queries must be served by the partial indexes and the
+generated publish_date/genre_id columns.
+
+Each query is prepared with asyncpg-style positional parameters and explained
+as a generic plan, which is what a cached asyncpg statement ends up running.
+Sequential scans are disabled so that the small test data set cannot make a
+scan cheaper than the index; the test checks that the index can be used, not
+the planner's choice at production sizes.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, List, Set
+
+import pytest
+from sqlalchemy import Connection, Select, and_, func, insert, select, text
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+
+from app.db.models.external_data import (
+    ExternalData,
+    ExternalDataEntityType,
+    ExternalDataProvider,
+    external_data_kind,
+)
+from app.db.models.style import Style
+from app.repositories.external_data import ExternalDataRepository
+
+BEATPORT = ExternalDataProvider.BEATPORT
+SPOTIFY = ExternalDataProvider.SPOTIFY
+TRACK = ExternalDataEntityType.TRACK
+ARTIST = ExternalDataEntityType.ARTIST
+
+
+def explain(conn: Connection, stmt: Select) -> Dict[str, Any]:
+    """Returns the generic plan of `stmt` as prepared by asyncpg."""
+    compiled = stmt.compile(
+        dialect=asyncpg_dialect(), compile_kwargs={"render_postcompile": True}
+    )
+    params = [compiled.params[name] for name in compiled.positiontup or []]
+    conn.exec_driver_sql("SET LOCAL plan_cache_mode = force_generic_plan")
+    conn.exec_driver_sql(f"PREPARE hot_path AS {compiled}")
+    try:
+        arguments = f"({', '.join(['%s'] * len(params))})" if params else ""
+        plan = conn.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) EXECUTE hot_path{arguments}", tuple(params)
+        ).scalar_one()
+    finally:
+        conn.exec_driver_sql("DEALLOCATE hot_path")
+    return plan[0]["Plan"]
+
+
+def index_scans(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    if "Index Name" in plan:
+        yield plan
+    for child in plan.get("Plans", []):
+        yield from index_scans(child)
+
+
+def index_tree(conn: Connection, index: str) -> Set[str]:
+    """The index and, when external_data is partitioned, its partitions' indexes."""
+    rows = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_partition_tree(CAST(:index AS regclass)) p "
+            "JOIN pg_class c ON c.oid = p.relid"
+        ),
+        {"index": index},
+    )
+    return set(rows.scalars())
+
+
+def scans_of(conn: Connection, plan: Dict[str, Any], index: str) -> List[Dict]:
+    names = index_tree(conn, index)
+    return [scan for scan in index_scans(plan) if scan["Index Name"] in names]
+
+
+@pytest.fixture
+def external_data(conn: Connection) -> Connection:
+    """Beatport tracks over a few genres and dates, most already processed."""
+    rows: List[Dict[str, Any]] = []
+    for i in range(2000):
+        rows.append(
+            {
+                "provider": BEATPORT,
+                "entity_type": TRACK,
+                "entity_id": None if i % 10 == 0 else 1_000_000 + i,
+                "external_id": f"bp-{i}",
+                "raw_data": {
+                    "genre": {"id": 900_000 + i % 20},
+                    "publish_date": f"2026-{1 + i % 12:02d}-{1 + i % 28:02d}",
+                },
+            }
+        )
+    for i in range(500):
+        for entity_type in (TRACK, ARTIST):
+            rows.append(
+                {
+                    "provider": SPOTIFY,
+                    "entity_type": entity_type,
+                    "entity_id": 1_000_000 + i,
+                    "external_id": f"sp-{i}",
+                    "raw_data": {},
+                }
+            )
+    conn.execute(insert(ExternalData), rows)
+    conn.execute(
+        insert(Style),
+        [
+            {"name": f"test-style-{i}", "beatport_style_id": 900_000 + i}
+            for i in range(20)
+        ],
+    )
+    conn.exec_driver_sql("ANALYZE external_data")
+    conn.exec_driver_sql("ANALYZE styles")
+    conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    return conn
+
+
+def test_unprocessed_queue_uses_partial_index(external_data: Connection) -> None:
+    stmt = (
+        select(ExternalData.id)
+        .where(*ExternalDataRepository._unprocessed_beatport_tracks(0))
+        .order_by(ExternalData.id)
+        .limit(500)
+    )
+    plan = explain(external_data, stmt)
+    assert scans_of(external_data, plan, "ix_external_data_beatport_track_unprocessed")
+
+
+def test_style_track_counts_use_generated_genre_id(external_data: Connection) -> None:
+    # The join of StyleRepository.get_styles_with_track_counts.
+    stmt = (
+        select(Style.id, func.count(ExternalData.entity_id))
+        .outerjoin(
+            ExternalData,
+            and_(
+                external_data_kind(ExternalData, BEATPORT, TRACK),
+                ExternalData.genre_id == Style.beatport_style_id,
+            ),
+        )
+        .group_by(Style.id)
+    )
+    plan = explain(external_data, stmt)
+    scans = scans_of(
+        external_data, plan, "ix_external_data_beatport_track_genre_publish_date"
+    )
+    assert scans
+    # The index covers the count, so the heap is never read.
+    assert all(scan["Node Type"] == "Index Only Scan" for scan in scans)
+
+
+def test_genre_and_publish_date_range_use_composite_index(
+    external_data: Connection,
+) -> None:
+    stmt = select(ExternalData.entity_id).where(
+        external_data_kind(ExternalData, BEATPORT, TRACK),
+        ExternalData.genre_id == 900_003,
+        ExternalData.publish_date.between("2026-03-01", "2026-03-31"),
+    )
+    plan = explain(external_data, stmt)
+    scans = scans_of(
+        external_data, plan, "ix_external_data_beatport_track_genre_publish_date"
+    )
+    assert scans
+    condition = scans[0]["Index Cond"]
+    assert "genre_id" in condition and "publish_date" in condition
+
+
+@pytest.mark.parametrize(
+    ("entity_type", "index"),
+    [
+        (TRACK, "ix_external_data_spotify_track_entity_id"),
+        (ARTIST, "ix_external_data_spotify_artist_entity_id"),
+    ],
+)
+def test_spotify_link_lookup_uses_partial_index(
+    external_data: Connection, entity_type: ExternalDataEntityType, index: str
+) -> None:
+    stmt = select(ExternalData.id).where(
+        external_data_kind(ExternalData, SPOTIFY, entity_type),
+        ExternalData.entity_id == 1_000_042,
+    )
+    plan = explain(external_data, stmt)
+    assert scans_of(external_data, plan, index)
+
+
+def test_non_numeric_genre_ids_are_stored_as_null(conn: Connection) -> None:
+    genres = {"bp-g1": {"id": 7}, "bp-g2": {"id": "n/a"}, "bp-g3": {"id": 1e12}}
+    conn.execute(
+        insert(ExternalData),
+        [
+            {
+                "provider": BEATPORT,
+                "entity_type": TRACK,
+                "external_id": external_id,
+                "raw_data": {"genre": genre},
+            }
+            for external_id, genre in genres.items()
+        ],
+    )
+    rows = conn.execute(
+        select(ExternalData.external_id, ExternalData.genre_id).where(
+            ExternalData.external_id.in_(genres)
+        )
+    )
+    assert dict(rows.all()) == {"bp-g1": 7, "bp-g2": None, "bp-g3": None}
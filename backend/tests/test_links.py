@@ -0,0 +1,43 @@
+import asyncio
+from typing import List, Tuple
+
+from sqlalchemy import Column, Integer, MetaData, Table, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.repositories.links import bulk_insert_links
+
+links = Table(
+    "test_links",
+    MetaData(),
+    Column("left_id", Integer, primary_key=True),
+    Column("right_id", Integer, primary_key=True),
+)
+
+
+async def insert_twice(url: str) -> Tuple[int, int, List[tuple]]:
+    engine = create_async_engine(make_url(url).set(drivername="postgresql+asyncpg"))
+    try:
+        async with AsyncSession(engine) as session:
+            await session.execute(
+                text(
+                    "CREATE TEMP TABLE test_links (left_id int, right_id int, "
+                    "PRIMARY KEY (left_id, right_id)) ON COMMIT DROP"
+                )
+            )
+            first = await bulk_insert_links(session, links, [(2, 1), (1, 2), (1, 2)])
+            second = await bulk_insert_links(session, links, [(1, 2), (3, 3)])
+            rows = await session.execute(
+                select(links).order_by(links.c.left_id, links.c.right_id)
+            )
+            return first, second, [tuple(row) for row in rows]
+    finally:
+        await engine.dispose()
+
+
+def test_bulk_insert_links_skips_existing_pairs(migrated_db: str) -> None:
+    assert asyncio.run(insert_twice(migrated_db)) == (
+        2,
+        1,
+        [(1, 2), (2, 1), (3, 3)],
+    )
@@ -0,0 +1,258 @@
+"""
+Upgrades and downgrades the external_data partitioning migration over a
+populated table, checking that every row survives in the right partition,
+the keys and the id sequence are intact, and the ON CONFLICT upsert still
+resolves against uq_external_data_provider_entity_external_id.
+
+The migrations commit, so the test rows are deleted and the database is
+migrated back to head at the end.
+"""
+
+import asyncio
+import io
+from typing import Dict, Iterator, List, Tuple
+
+import pytest
+from alembic import command
+from sqlalchemy import Engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.models.external_data import ExternalDataEntityType, ExternalDataProvider
+from app.repositories.external_data import ExternalDataRepository, UpsertCounts
+
+PARTITIONING = "a8e3c5f1d7b2"
+BEFORE_PARTITIONING = "f2d7b9c4e6a1"
+PREFIX = "migration-test-"
+
+# (provider, entity_type, rows, partition the rows belong in)
+KINDS = [
+    ("BEATPORT", "TRACK", 300, "external_data_beatport_track"),
+    ("BEATPORT", "ARTIST", 50, "external_data_beatport_artist"),
+    ("BEATPORT", "LABEL", 20, "external_data_beatport_label"),
+    ("BEATPORT", "RELEASE", 40, "external_data_beatport_release"),
+    ("SPOTIFY", "TRACK", 100, "external_data_spotify_track"),
+    ("SPOTIFY", "ARTIST", 30, "external_data_spotify_artist"),
+    ("SPOTIFY", "LABEL", 5, "external_data_spotify_default"),
+    ("TIDAL", "TRACK", 10, "external_data_default"),
+]
+
+
+def populate(sync_engine: Engine) -> None:
+    with sync_engine.begin() as conn:
+        for provider, entity_type, rows, _ in KINDS:
+            conn.execute(
+                text(
+                    "INSERT INTO external_data "
+                    "(provider, entity_type, entity_id, external_id, raw_data) "
+                    "SELECT CAST(:provider AS provider_enum), "
+                    "CAST(:entity_type AS entity_type_enum), "
+                    "CASE WHEN i % 2 = 0 THEN i END, :prefix || i, "
+                    "jsonb_build_object('id', i, 'genre', jsonb_build_object("
+                    "'id', i % 5), 'publish_date', '2026-01-01') "
+                    "FROM generate_series(1, :rows) AS i"
+                ),
+                {
+                    "provider": provider,
+                    "entity_type": entity_type,
+                    "prefix": PREFIX,
+                    "rows": rows,
+                },
+            )
+
+
+def snapshot(sync_engine: Engine) -> Dict[Tuple[str, str], List[tuple]]:
+    with sync_engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT provider::text, entity_type::text, id, entity_id, "
+                "external_id, raw_data::text, genre_id, publish_date, content_hash "
+                "FROM external_data WHERE external_id LIKE :prefix ORDER BY id"
+            ),
+            {"prefix": PREFIX + "%"},
+        )
+        result: Dict[Tuple[str, str], List[tuple]] = {}
+        for row in rows:
+            result.setdefault((row[0], row[1]), []).append(tuple(row[2:]))
+        return result
+
+
+def table_shape(sync_engine: Engine) -> Tuple[str, List[str]]:
+    """The relkind of external_data and the columns of its primary key."""
+    with sync_engine.connect() as conn:
+        relkind = conn.execute(
+            text("SELECT relkind FROM pg_class WHERE relname = 'external_data'")
+        ).scalar_one()
+        primary_key = conn.execute(
+            text(
+                "SELECT a.attname FROM pg_index i "
+                "JOIN pg_attribute a ON a.attrelid = i.indrelid "
+                "AND a.attnum = ANY(i.indkey) "
+                "WHERE i.indrelid = 'external_data'::regclass AND i.indisprimary "
+                "ORDER BY array_position(i.indkey, a.attnum)"
+            )
+        ).scalars()
+        return relkind, list(primary_key)
+
+
+def partitions(sync_engine: Engine) -> Dict[Tuple[str, str], set]:
+    with sync_engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT provider::text, entity_type::text, "
+                "array_agg(DISTINCT tableoid::regclass::text) "
+                "FROM external_data WHERE external_id LIKE :prefix "
+                "GROUP BY provider, entity_type"
+            ),
+            {"prefix": PREFIX + "%"},
+        )
+        return {(row[0], row[1]): set(row[2]) for row in rows}
+
+
+def next_id_is_fresh(sync_engine: Engine) -> bool:
+    with sync_engine.begin() as conn:
+        max_id = conn.execute(text("SELECT max(id) FROM external_data")).scalar_one()
+        next_id = conn.execute(
+            text("SELECT nextval('external_data_id_seq')")
+        ).scalar_one()
+        owner = conn.execute(
+            text("SELECT pg_get_serial_sequence('external_data', 'id')")
+        ).scalar_one()
+        return next_id > max_id and owner == "public.external_data_id_seq"
+
+
+async def upsert(url: str, records: List[dict]) -> UpsertCounts:
+    """Runs ExternalDataRepository.bulk_upsert on asyncpg, as the app does."""
+    engine = create_async_engine(make_url(url).set(drivername="postgresql+asyncpg"))
+    try:
+        async with AsyncSession(engine) as session:
+            counts = await ExternalDataRepository(session).bulk_upsert(records)
+            await session.commit()
+            return counts
+    finally:
+        await engine.dispose()
+
+
+def check_upsert(sync_engine: Engine, url: str, round: int) -> None:
+    """Of the upserted records one is new, one changed and one is unchanged."""
+    records = [
+        {
+            "provider": ExternalDataProvider.SPOTIFY,
+            "entity_type": ExternalDataEntityType.TRACK,
+            "external_id": f"{PREFIX}new-{round}",
+            "raw_data": {"id": "new"},
+        },
+        {
+            "provider": ExternalDataProvider.BEATPORT,
+            "entity_type": ExternalDataEntityType.TRACK,
+            "external_id": f"{PREFIX}1",
+            "raw_data": {"id": 1, "round": round},
+        },
+        {
+            "provider": ExternalDataProvider.SPOTIFY,
+            "entity_type": ExternalDataEntityType.ARTIST,
+            "external_id": f"{PREFIX}2",
+            "raw_data": stored_raw_data(sync_engine, "SPOTIFY", "ARTIST", "2"),
+        },
+    ]
+    assert asyncio.run(upsert(url, records)) == UpsertCounts(
+        inserted=1, updated=1, unchanged=1
+    )
+
+
+def stored_raw_data(
+    sync_engine: Engine, provider: str, entity_type: str, suffix: str
+) -> dict:
+    with sync_engine.connect() as conn:
+        return conn.execute(
+            text(
+                "SELECT raw_data FROM external_data WHERE provider::text = :p "
+                "AND entity_type::text = :e AND external_id = :x"
+            ),
+            {"p": provider, "e": entity_type, "x": PREFIX + suffix},
+        ).scalar_one()
+
+
+@pytest.fixture
+def before_partitioning(alembic_config, sync_engine: Engine) -> Iterator[Engine]:
+    """external_data as it was before partitioning, with test rows in it."""
+    command.downgrade(alembic_config, BEFORE_PARTITIONING)
+    try:
+        populate(sync_engine)
+        yield sync_engine
+    finally:
+        with sync_engine.begin() as conn:
+            conn.execute(
+                text("DELETE FROM external_data WHERE external_id LIKE :prefix"),
+                {"prefix": PREFIX + "%"},
+            )
+        command.upgrade(alembic_config, "head")
+
+
+def test_partitioning_upgrade_and_downgrade(
+    alembic_config, migrated_db: str, before_partitioning: Engine
+) -> None:
+    sync_engine = before_partitioning
+    assert table_shape(sync_engine) == ("r", ["id"])
+    before = snapshot(sync_engine)
+    assert {kind: len(rows) for kind, rows in before.items()} == {
+        (provider, entity_type): rows for provider, entity_type, rows, _ in KINDS
+    }
+
+    command.upgrade(alembic_config, PARTITIONING)
+    assert table_shape(sync_engine) == ("p", ["id", "provider", "entity_type"])
+    assert snapshot(sync_engine) == before
+    assert partitions(sync_engine) == {
+        (provider, entity_type): {partition}
+        for provider, entity_type, _, partition in KINDS
+    }
+    assert next_id_is_fresh(sync_engine)
+    check_upsert(sync_engine, migrated_db, round=1)
+
+    upgraded = snapshot(sync_engine)
+    command.downgrade(alembic_config, BEFORE_PARTITIONING)
+    assert table_shape(sync_engine) == ("r", ["id"])
+    assert snapshot(sync_engine) == upgraded
+    assert next_id_is_fresh(sync_engine)
+    check_upsert(sync_engine, migrated_db, round=2)
+
+
+def render_sql(alembic_config, upgrade: bool) -> str:
+    buffer = io.StringIO()
+    alembic_config.output_buffer = buffer
+    try:
+        if upgrade:
+            command.upgrade(
+                alembic_config, f"{BEFORE_PARTITIONING}:{PARTITIONING}", sql=True
+            )
+        else:
+            command.downgrade(
+                alembic_config, f"{PARTITIONING}:{BEFORE_PARTITIONING}", sql=True
+            )
+    finally:
+        alembic_config.output_buffer = None
+    return buffer.getvalue()
+
+
+def test_partitioning_renders_offline(alembic_config) -> None:
+    """Needs no database: checks the DDL both directions emit, in order."""
+    upgrade = render_sql(alembic_config, upgrade=True)
+    assert ") PARTITION BY LIST (provider);" in upgrade
+    for *_, partition in KINDS:
+        if not partition.endswith("default"):
+            assert f"CREATE TABLE {partition} PARTITION OF" in upgrade
+    assert upgrade.index("INSERT INTO external_data") < upgrade.index(
+        "DROP TABLE external_data_old"
+    )
+    assert "PRIMARY KEY (id, provider, entity_type)" in upgrade
+    # A payload whose genre.id is not a number must not fail the copy.
+    assert "CASE WHEN ((raw_data -> 'genre') ->> 'id') ~" in upgrade
+    assert (
+        "CONSTRAINT uq_external_data_provider_entity_external_id "
+        "UNIQUE (provider, entity_type, external_id)"
+    ) in upgrade
+
+    downgrade = render_sql(alembic_config, upgrade=False)
+    assert "PARTITION" not in downgrade
+    assert "PRIMARY KEY (id);" in downgrade
+    assert "uq_external_data_provider_entity_external_id" in downgrade
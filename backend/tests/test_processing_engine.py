@@ -0,0 +1,19 @@
+import pytest
+
+from app.core.settings import settings
+from app.tasks.deps import resolve_processing_engine
+
+
+@pytest.mark.parametrize("engine", ["python", "sql"])
+def test_known_engines_are_kept(engine: str) -> None:
+    assert resolve_processing_engine(engine) == engine
+
+
+def test_none_falls_back_to_setting() -> None:
+    assert resolve_processing_engine(None) == settings.BEATPORT_PROCESSING_ENGINE
+
+
+@pytest.mark.parametrize("engine", ["SQL", "", "postgres"])
+def test_unknown_engines_are_rejected(engine: str) -> None:
+    with pytest.raises(ValueError, match="Unknown processing engine"):
+        resolve_processing_engine(engine)
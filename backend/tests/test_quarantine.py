@@ -0,0 +1,112 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import List, Sequence
+
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+from app.services.beatport_batch import PayloadError, parse_beatport_tracks
+from app.services.data_processing import DataProcessingService, _is_data_error
+
+
+class DriverError(Exception):
+    def __init__(self, sqlstate: str):
+        super().__init__(f"SQLSTATE {sqlstate}")
+        self.sqlstate = sqlstate
+
+
+def db_error(sqlstate: str) -> DBAPIError:
+    return DBAPIError("INSERT ...", {}, DriverError(sqlstate))
+
+
+@pytest.mark.parametrize(
+    "sqlstate", ["21000", "22001", "22P02", "23502", "23505", "54000"]
+)
+def test_data_sqlstates_are_bisected(sqlstate: str) -> None:
+    assert _is_data_error(db_error(sqlstate))
+
+
+@pytest.mark.parametrize(
+    "sqlstate", ["08006", "40001", "40P01", "53300", "55P03", "57014", "42P01"]
+)
+def test_transient_and_systemic_sqlstates_are_not(sqlstate: str) -> None:
+    assert not _is_data_error(db_error(sqlstate))
+
+
+def test_only_payload_errors_are_python_data_errors() -> None:
+    assert _is_data_error(PayloadError("KeyError: 'release'"))
+    assert not _is_data_error(KeyError("release"))
+    assert not _is_data_error(AttributeError("'NoneType' has no attribute 'id'"))
+    assert not _is_data_error(ConnectionResetError())
+    assert not _is_data_error(TimeoutError())
+
+
+def test_unreadable_payload_raises_payload_error() -> None:
+    record = SimpleNamespace(id=1, external_id="1", raw_data={"artists": [{"id": 1}]})
+    with pytest.raises(PayloadError):
+        parse_beatport_tracks([record])
+
+
+class FakeSession:
+    @asynccontextmanager
+    async def begin_nested(self):
+        yield
+
+
+class FakeQuarantine:
+    def __init__(self) -> None:
+        self.ids: List[int] = []
+
+    async def quarantine(self, *, external_data_id: int, error: str) -> None:
+        self.ids.append(external_data_id)
+
+
+class FailingProcessing(DataProcessingService):
+    """Fails every batch that contains a record with an id in `failing`."""
+
+    def __init__(self, failing: dict):
+        self.db = FakeSession()
+        self.quarantine_repo = FakeQuarantine()
+        self.failing = failing
+        self.processed: List[int] = []
+
+    async def process_batch(self, records: Sequence) -> None:
+        for record in records:
+            if record.id in self.failing:
+                raise self.failing[record.id]
+        self.processed.extend(record.id for record in records)
+
+
+def records(*ids: int) -> list:
+    return [SimpleNamespace(id=i, external_id=str(i), raw_data={}) for i in ids]
+
+
+def test_poison_records_are_isolated_and_quarantined() -> None:
+    service = FailingProcessing({3: db_error("22P02"), 6: PayloadError("name")})
+    quarantined = asyncio.run(
+        service.process_batch_with_quarantine(records(1, 2, 3, 4, 5, 6, 7))
+    )
+    assert quarantined == 2
+    assert service.quarantine_repo.ids == [3, 6]
+    assert sorted(service.processed) == [1, 2, 4, 5, 7]
+
+
+def test_batch_of_only_poison_records_is_quarantined() -> None:
+    service = FailingProcessing({1: db_error("23502"), 2: db_error("23502")})
+    assert asyncio.run(service.process_batch_with_quarantine(records(1, 2))) == 2
+    assert service.quarantine_repo.ids == [1, 2]
+
+
+def test_transient_errors_are_raised_without_quarantine() -> None:
+    service = FailingProcessing({2: db_error("40P01")})
+    with pytest.raises(DBAPIError):
+        asyncio.run(service.process_batch_with_quarantine(records(1, 2, 3, 4)))
+    assert service.quarantine_repo.ids == []
+
+
+def test_code_errors_are_raised_without_quarantine() -> None:
+    service = FailingProcessing({2: AttributeError("id")})
+    with pytest.raises(AttributeError):
+        asyncio.run(service.process_batch_with_quarantine(records(1, 2, 3, 4)))
+    assert service.quarantine_repo.ids == []
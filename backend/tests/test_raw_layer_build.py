@@ -0,0 +1,130 @@
+import asyncio
+from datetime import date
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+
+from app.db.models.raw_layer import RawLayerBlockStatus, RawLayerPlaylistType
+from app.services.raw_layer import RawLayerService
+
+START = date(2026, 1, 1)
+
+
+class FakeCheckpointer:
+    def __init__(self, state: Dict[str, Any]):
+        self.state = state
+
+    async def load(self) -> Tuple[int, Dict[str, Any]]:
+        return 0, self.state
+
+    async def commit_batch(self, *, cursor: int, state: Dict[str, Any]) -> None:
+        self.state = state
+
+    async def complete(self) -> None:
+        self.state = {}
+
+
+class FakeRawLayerRepo:
+    def __init__(self, catalog: List[Any]):
+        self.catalog = catalog
+
+    async def get_block_catalog(self, *, block_id: int) -> List[Any]:
+        return self.catalog
+
+
+class FakeSpotify:
+    def __init__(self) -> None:
+        self.added: Dict[str, List[str]] = {}
+
+    async def add_items_to_playlist(
+        self, *, playlist_id: str, track_uris: List[str], ready_timeout: float
+    ) -> None:
+        self.added.setdefault(playlist_id, []).extend(track_uris)
+
+
+class FakeSession:
+    def add(self, instance: Any) -> None:
+        pass
+
+    async def flush(self) -> None:
+        pass
+
+
+def catalog_row(uri: str, released: date) -> Any:
+    return SimpleNamespace(
+        spotify_uri=uri, album_type="single", album_release_date=released
+    )
+
+
+def build(catalog: List[Any], state: Dict[str, Any]) -> Tuple[FakeSpotify, Dict]:
+    checkpointer = FakeCheckpointer(state)
+    spotify = FakeSpotify()
+    service = RawLayerService(
+        db=FakeSession(),  # type: ignore[arg-type]
+        user_spotify_client=spotify,  # type: ignore[arg-type]
+        checkpointer=checkpointer,  # type: ignore[arg-type]
+    )
+    service.raw_layer_repo = FakeRawLayerRepo(catalog)  # type: ignore[assignment]
+
+    async def get_style(*, id: int) -> Any:
+        return SimpleNamespace(id=id, name="Style")
+
+    async def get_categories(*, user_id: int, style_id: int) -> List[Any]:
+        return []
+
+    service.style_repo = SimpleNamespace(get=get_style)  # type: ignore[assignment]
+    service.category_repo = SimpleNamespace(  # type: ignore[assignment]
+        get_by_user_and_style=get_categories
+    )
+    block = SimpleNamespace(
+        id=1,
+        name="Week",
+        style_id=2,
+        user_id=3,
+        start_date=START,
+        end_date=date(2026, 1, 7),
+        status=RawLayerBlockStatus.CREATING,
+        playlists=[
+            SimpleNamespace(
+                playlist_type=p_type,
+                category_id=None,
+                category=None,
+                spotify_playlist_id=p_type.value,
+                spotify_playlist_url=f"https://open.spotify.com/{p_type.value}",
+            )
+            for p_type in RawLayerPlaylistType
+            if p_type != RawLayerPlaylistType.TARGET
+        ],
+    )
+    asyncio.run(service._build_block(block))  # type: ignore[arg-type]
+    return spotify, checkpointer.state
+
+
+def test_fresh_build_checkpoints_the_categorized_uris() -> None:
+    catalog = [
+        catalog_row("spotify:track:new", START),
+        catalog_row("spotify:track:old", date(2020, 1, 1)),
+    ]
+    spotify, _ = build(catalog, {})
+    assert spotify.added == {
+        "INBOX_NEW": ["spotify:track:new"],
+        "INBOX_OLD": ["spotify:track:old"],
+    }
+
+
+def test_resume_adds_the_checkpointed_uris_not_the_current_catalog() -> None:
+    # Since the first run, enrichment moved "b" to an old album and dropped "c".
+    catalog = [
+        catalog_row("spotify:track:a", START),
+        catalog_row("spotify:track:b", date(2020, 1, 1)),
+    ]
+    state = {
+        "categorized": {
+            "INBOX_NEW": ["spotify:track:a", "spotify:track:b", "spotify:track:c"],
+            "INBOX_OLD": [],
+            "INBOX_NOT": [],
+        },
+        "added": {"INBOX_NEW": 1},
+    }
+    spotify, final_state = build(catalog, state)
+    assert spotify.added == {"INBOX_NEW": ["spotify:track:b", "spotify:track:c"]}
+    assert final_state == {}
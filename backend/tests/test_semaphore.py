@@ -0,0 +1,45 @@
+import asyncio
+from typing import Any, List
+
+from app.tasks.semaphore import _ACQUIRE, RedisSemaphore
+
+
+class FakeRedis:
+    """Grants a slot on the given poll, and records what is released."""
+
+    def __init__(self, granted_on: int):
+        self.granted_on = granted_on
+        self.polls = 0
+        self.released: List[str] = []
+
+    def register_script(self, script: str) -> Any:
+        async def acquire(*, keys: List[str], args: List[Any]) -> int:
+            self.polls += 1
+            return int(self.polls >= self.granted_on)
+
+        async def renew(*, keys: List[str], args: List[Any]) -> int:
+            return 1
+
+        return acquire if script == _ACQUIRE else renew
+
+    async def zrem(self, key: str, token: str) -> None:
+        self.released.append(key)
+
+
+def test_waiters_report_while_polling_and_release_their_slot() -> None:
+    redis = FakeRedis(granted_on=3)
+    semaphore = RedisSemaphore(
+        "test", 1, poll_interval=0, client=redis  # type: ignore[arg-type]
+    )
+    events: List[str] = []
+
+    async def on_wait() -> None:
+        events.append("waiting")
+
+    async def run() -> None:
+        async with semaphore.slot(on_wait=on_wait):
+            events.append("working")
+
+    asyncio.run(run())
+    assert events == ["waiting", "waiting", "working"]
+    assert redis.released == ["semaphore:test"]
@@ -0,0 +1,60 @@
+import asyncio
+from typing import List, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.models import Artist, Release, Track
+from app.db.models.external_data import (
+    ExternalData,
+    ExternalDataEntityType,
+    ExternalDataProvider,
+)
+from app.db.models.track import track_artists
+from app.repositories.track import TrackRepository
+
+
+async def candidates(url: str) -> Tuple[int, List[Tuple[int, str, str]]]:
+    engine = create_async_engine(make_url(url).set(drivername="postgresql+asyncpg"))
+    try:
+        async with AsyncSession(engine) as session:
+            release = Release(name="candidates-test-release")
+            artist = Artist(name="candidates-test-artist")
+            session.add_all([release, artist])
+            await session.flush()
+            track = Track(name="candidates-test-track", release_id=release.id)
+            session.add(track)
+            await session.flush()
+            await session.execute(
+                insert(track_artists).values(track_id=track.id, artist_id=artist.id)
+            )
+            session.add(
+                ExternalData(
+                    provider=ExternalDataProvider.SPOTIFY,
+                    entity_type=ExternalDataEntityType.TRACK,
+                    entity_id=track.id,
+                    external_id="candidates-test-spotify-track",
+                    raw_data={
+                        "artists": [
+                            {"id": "sp-b", "name": "B"},
+                            {"id": "", "name": "No id"},
+                            {"id": "sp-a", "name": "A"},
+                        ]
+                    },
+                )
+            )
+            await session.flush()
+            rows = await TrackRepository(session).get_spotify_artist_candidates(
+                artist_ids=[artist.id]
+            )
+            artist_id = artist.id
+            await session.rollback()
+            return artist_id, rows
+    finally:
+        await engine.dispose()
+
+
+def test_candidates_keep_payload_order(migrated_db: str) -> None:
+    artist_id, rows = asyncio.run(candidates(migrated_db))
+    assert rows == [(artist_id, "sp-b", "B"), (artist_id, "sp-a", "A")]
@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, List
+
+import httpx
+import pytest
+from structlog.testing import capture_logs
+
+from app.clients.spotify import SpotifyNotFoundError, UserSpotifyClient
+from app.core.security import encrypt_data
+from app.core.settings import settings
+
+PLAYLIST_URL = f"{settings.SPOTIFY_API_URL}/playlists/abc/tracks"
+
+
+def add_to_playlist(statuses: List[int], ready_timeout: float) -> List[dict]:
+    """Adds one batch, answered with `statuses` in turn; returns the logs."""
+    answers = iter(statuses)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(next(answers), json={})
+
+    async def run() -> None:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            token: Any = SimpleNamespace(
+                user_id=1,
+                scope="",
+                expires_at=datetime.now(timezone.utc) + timedelta(hours=1),
+                encrypted_access_token=encrypt_data("access"),
+                encrypted_refresh_token=encrypt_data("refresh"),
+            )
+            # The token is fresh, so the repository is never used.
+            no_refreshes: Any = None
+            spotify = UserSpotifyClient(
+                client=client,
+                token_repo=no_refreshes,
+                token_obj=token,
+                spotify_user_id="u",
+            )
+            await spotify.add_items_to_playlist(
+                playlist_id="abc",
+                track_uris=["spotify:track:1"],
+                ready_timeout=ready_timeout,
+            )
+
+    with capture_logs() as logs:
+        try:
+            asyncio.run(run())
+        except SpotifyNotFoundError:
+            pass
+    return logs
+
+
+@pytest.fixture(autouse=True)
+def short_delays(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "SPOTIFY_PLAYLIST_READY_INITIAL_DELAY_S", 0.001)
+    monkeypatch.setattr(settings, "SPOTIFY_PLAYLIST_READY_MAX_DELAY_S", 0.001)
+
+
+def errors(logs: List[dict]) -> List[str]:
+    return [entry["event"] for entry in logs if entry["log_level"] == "error"]
+
+
+def test_not_ready_retries_are_not_logged_as_errors() -> None:
+    logs = add_to_playlist([404, 404, 404, 201], ready_timeout=5)
+    assert errors(logs) == []
+    assert any(entry["event"] == "Playlist ready after retries" for entry in logs)
+
+
+def test_only_the_timeout_is_logged_as_an_error() -> None:
+    logs = add_to_playlist([404] * 1000, ready_timeout=0.05)
+    assert errors(logs) == ["Failed to add batch to playlist"]
+
+
+def test_unexpected_not_found_is_still_an_error() -> None:
+    logs = add_to_playlist([404], ready_timeout=0)
+    assert errors(logs) == [
+        "Spotify API request failed",
+        "Failed to add batch to playlist",
+    ]